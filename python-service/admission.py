@@ -0,0 +1,95 @@
+"""Admission control for resume analyses.
+
+Without a bound on concurrent analyses a load spike piles requests up inside
+the service until the Node proxy times out. AdmissionController allows a fixed
+number of analyses in flight per worker process plus a short queue; requests
+beyond that are rejected immediately so the caller can retry with backoff.
+"""
+
+import os
+import threading
+
+DEFAULT_MAX_IN_FLIGHT = int(os.environ.get('MAX_IN_FLIGHT_ANALYSES', 4))
+DEFAULT_MAX_QUEUED = int(os.environ.get('MAX_QUEUED_ANALYSES', 16))
+DEFAULT_QUEUE_TIMEOUT = float(os.environ.get('ANALYSIS_QUEUE_TIMEOUT_SECONDS', 10))
+
+
+class Rejected(Exception):
+    """An analysis was not admitted; status is the HTTP status to answer with"""
+
+    def __init__(self, message, status, retry_after):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded in-flight work plus a bounded wait queue.
+
+    A full queue is rejected at once with 429; a request that waited in the
+    queue for queue_timeout seconds without a slot is rejected with 503.
+    """
+
+    def __init__(self, max_in_flight=DEFAULT_MAX_IN_FLIGHT, max_queued=DEFAULT_MAX_QUEUED,
+                 queue_timeout=DEFAULT_QUEUE_TIMEOUT):
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def retry_after(self):
+        """Seconds a rejected caller should wait before retrying"""
+        return max(1, int(round(self.queue_timeout / 2)))
+
+    def _reject(self, message, status):
+        with self._lock:
+            self.rejected += 1
+        return Rejected(message, status, self.retry_after())
+
+    def acquire(self):
+        """Take an analysis slot, waiting in the queue if needed; raises Rejected"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                if self.queued >= self.max_queued:
+                    self.rejected += 1
+                    raise Rejected('Too many analyses queued. Please retry later.', 429, self.retry_after())
+                self.queued += 1
+            try:
+                acquired = self._slots.acquire(timeout=self.queue_timeout)
+            finally:
+                with self._lock:
+                    self.queued -= 1
+            if not acquired:
+                raise self._reject('Service is saturated. Please retry later.', 503)
+
+        with self._lock:
+            self.in_flight += 1
+            self.admitted += 1
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'inFlight': self.in_flight,
+                'queued': self.queued,
+                'maxInFlight': self.max_in_flight,
+                'maxQueued': self.max_queued,
+                'admitted': self.admitted,
+                'rejected': self.rejected
+            }
@@ -0,0 +1,474 @@
+"""Asynchronous analysis jobs on a durable local queue.
+
+A synchronous analysis holds its HTTP connection for as long as extraction
+and scoring take, and the Node proxy gives up after 60 seconds. Submitting
+an analysis job stores its request in a SQLite database (form fields) and
+a directory beside it (uploaded files, copied in chunks, one file per
+document) and returns a job ID at once; worker threads in every service
+process drain the queue, store the result, and POST it to the job's
+callback URL if one was given. Clients poll the job or wait for the callback.
+
+The database and its documents directory are the only shared state, so no
+broker is needed and queued jobs survive restarts. A running job holds a lease that its worker renews;
+a job whose worker died is picked up again once the lease expires, up to
+ANALYSIS_JOB_MAX_ATTEMPTS times.
+"""
+
+import ipaddress
+import json
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import urllib.request
+import uuid
+from contextlib import closing, contextmanager
+from urllib.parse import urlparse
+
+from admission import Rejected
+
+# Next to this module unless configured, not wherever the service happens to be started from
+DEFAULT_DB_PATH = os.environ.get('ANALYSIS_JOBS_DB') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'analysis_jobs.sqlite3')
+DEFAULT_WORKERS = int(os.environ.get('ANALYSIS_JOB_WORKERS', 2))
+DEFAULT_MAX_QUEUED = int(os.environ.get('MAX_QUEUED_ANALYSIS_JOBS', 1000))
+# Total size of the documents of queued and running jobs
+DEFAULT_MAX_QUEUED_BYTES = int(os.environ.get('MAX_QUEUED_ANALYSIS_JOB_BYTES', 4 * 1024 * 1024 * 1024))
+DEFAULT_LEASE_SECONDS = float(os.environ.get('ANALYSIS_JOB_LEASE_SECONDS', 60))
+DEFAULT_MAX_ATTEMPTS = int(os.environ.get('ANALYSIS_JOB_MAX_ATTEMPTS', 3))
+DEFAULT_RETENTION_SECONDS = float(os.environ.get('ANALYSIS_JOB_RETENTION_HOURS', 24)) * 3600
+DEFAULT_POLL_SECONDS = float(os.environ.get('ANALYSIS_JOB_POLL_SECONDS', 1))
+
+# Completion callbacks: only to these hosts (comma-separated), and none at all when unset. The hosts
+# must resolve to public addresses unless callbacks into private networks are allowed as well
+CALLBACK_HOSTS = [host.strip() for host in os.environ.get('ANALYSIS_CALLBACK_HOSTS', '').split(',') if host.strip()]
+CALLBACK_PRIVATE_NETWORKS = os.environ.get('ANALYSIS_CALLBACK_PRIVATE_NETWORKS', '').strip().lower() in ('1', 'true', 'yes')
+CALLBACK_TIMEOUT = float(os.environ.get('ANALYSIS_CALLBACK_TIMEOUT_SECONDS', 10))
+CALLBACK_MAX_ATTEMPTS = int(os.environ.get('ANALYSIS_CALLBACK_MAX_ATTEMPTS', 5))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = 'queued', 'running', 'succeeded', 'failed'
+PENDING, SENDING, DELIVERED = 'pending', 'sending', 'delivered'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_expires REAL,
+    result TEXT,
+    result_status INTEGER,
+    callback_url TEXT,
+    callback_status TEXT,
+    callback_attempts INTEGER NOT NULL DEFAULT 0,
+    callback_next_at REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS jobs_by_callback ON jobs (callback_status, callback_next_at);
+CREATE TABLE IF NOT EXISTS job_documents (
+    job_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (job_id, position)
+);
+"""
+
+
+def validate_callback_url(url):
+    """Raise ValueError unless url is an http(s) URL to an allowed host that resolves to allowed addresses"""
+    if not CALLBACK_HOSTS:
+        raise ValueError('Callbacks are disabled: set ANALYSIS_CALLBACK_HOSTS to the hosts that may receive them')
+    parsed = urlparse(url)
+    try:
+        port = parsed.port
+    except ValueError:
+        raise ValueError('callbackUrl has an invalid port')
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        raise ValueError('callbackUrl must be an http or https URL')
+    if parsed.hostname not in CALLBACK_HOSTS:
+        raise ValueError(f'callbackUrl host is not allowed: {parsed.hostname}')
+    if not CALLBACK_PRIVATE_NETWORKS:
+        for address in resolve_host(parsed.hostname, port or (443 if parsed.scheme == 'https' else 80)):
+            if not is_public_address(address):
+                raise ValueError(f'callbackUrl host resolves to a non-public address: {parsed.hostname}')
+    return url
+
+
+def resolve_host(hostname, port):
+    """Every address hostname resolves to; raises ValueError if it does not resolve"""
+    try:
+        infos = socket.getaddrinfo(hostname, port, proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError):
+        raise ValueError(f'callbackUrl host cannot be resolved: {hostname}')
+    return {info[4][0] for info in infos}
+
+
+def is_public_address(address):
+    """Whether address is globally routable: not loopback, private, link-local, reserved or multicast"""
+    ip = ipaddress.ip_address(address.split('%', 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+class _RefuseRedirects(urllib.request.HTTPRedirectHandler):
+    """Fail a callback on redirect rather than follow it to a host that was never validated"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+_callback_opener = urllib.request.build_opener(_RefuseRedirects)
+
+
+class AnalysisJob:
+    """A claimed job: what to run and on which documents"""
+
+    def __init__(self, job_id, kind, payload, documents, attempts):
+        self.id = job_id
+        self.kind = kind
+        self.payload = payload          # form fields of the request
+        self.documents = documents      # [(filename, path)], opened by the handler one at a time
+        self.attempts = attempts
+
+
+class AnalysisJobQueue:
+    """Jobs and results in one SQLite database, the jobs' documents in files beside it.
+
+    Every operation opens its own connection, so the queue can be shared by
+    threads and by forked worker processes alike.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, max_queued=DEFAULT_MAX_QUEUED, lease_seconds=DEFAULT_LEASE_SECONDS,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS, retention_seconds=DEFAULT_RETENTION_SECONDS,
+                 max_queued_bytes=DEFAULT_MAX_QUEUED_BYTES):
+        self.path = path
+        self.documents_dir = f"{path}-documents"
+        self.max_queued = max_queued
+        self.max_queued_bytes = max_queued_bytes
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+        self._schema_ready = False
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        connection.execute('PRAGMA synchronous = NORMAL')
+        if not self._schema_ready:
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.executescript(SCHEMA)
+            self._schema_ready = True
+        return connection
+
+    @contextmanager
+    def _transaction(self):
+        """A write transaction (taken at once, so concurrent claims serialize)"""
+        with closing(self._connect()) as db:
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                yield db
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+            db.execute('COMMIT')
+
+    def submit(self, kind, payload, documents=(), callback_url=None):
+        """Queue a job on documents given as (filename, readable stream); returns its ID.
+
+        Each stream is copied to its own file in chunks, before the job is
+        inserted, so neither the documents nor the write lock are held for
+        the whole upload. Raises Rejected when the queue is full.
+        """
+        job_id = uuid.uuid4().hex
+        with closing(self._connect()) as db:
+            self._check_capacity(db)
+
+        job_dir = self._job_dir(job_id)
+        os.makedirs(job_dir)
+        try:
+            rows = []
+            for position, (filename, stream) in enumerate(documents):
+                with open(os.path.join(job_dir, str(position)), 'wb') as f:
+                    shutil.copyfileobj(stream, f)
+                    rows.append((job_id, position, filename, f.tell()))
+
+            with self._transaction() as db:
+                self._check_capacity(db, sum(row[3] for row in rows))
+                db.execute(
+                    'INSERT INTO jobs (id, kind, status, payload, callback_url, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+                    (job_id, kind, QUEUED, json.dumps(payload), callback_url, time.time()))
+                db.executemany('INSERT INTO job_documents (job_id, position, filename, size) VALUES (?, ?, ?, ?)', rows)
+        except BaseException:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+        return job_id
+
+    def _check_capacity(self, db, size=0):
+        """Raise Rejected if a job with documents of size bytes does not fit in the queue"""
+        waiting = db.execute('SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)', (QUEUED, RUNNING)).fetchone()[0]
+        if waiting >= self.max_queued:
+            raise Rejected('Too many analysis jobs queued. Please retry later.', 429, 30)
+        # Documents are deleted when their job finishes: what is left belongs to queued and running jobs
+        queued_bytes = db.execute('SELECT COALESCE(SUM(size), 0) FROM job_documents').fetchone()[0]
+        if queued_bytes + size > self.max_queued_bytes:
+            raise Rejected('Too many documents queued for analysis. Please retry later.', 429, 30)
+
+    def _job_dir(self, job_id):
+        return os.path.join(self.documents_dir, job_id)
+
+    def _remove_documents(self, job_ids):
+        """Delete the files of finished jobs (after the transaction that deleted their rows)"""
+        for job_id in job_ids:
+            shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+
+    def claim(self):
+        """Lease the oldest runnable job (queued, or running under an expired lease), or None"""
+        now = time.time()
+        given_up = []
+        with self._transaction() as db:
+            job = self._claim(db, now, given_up)
+        self._remove_documents(given_up)
+        return job
+
+    def _claim(self, db, now, given_up):
+        """claim in its transaction; the IDs of jobs it gives up on are added to given_up"""
+        while True:
+            row = db.execute(
+                'SELECT id, kind, payload, attempts FROM jobs WHERE status = ? OR (status = ? AND lease_expires < ?) '
+                'ORDER BY created_at LIMIT 1', (QUEUED, RUNNING, now)).fetchone()
+            if row is None:
+                return None
+            if row['attempts'] >= self.max_attempts:
+                # Its worker died every time; give up instead of taking the next one down too
+                self._finish(db, row['id'], {
+                    'error': 'Analysis was interrupted too many times', 'success': False}, 500)
+                given_up.append(row['id'])
+                continue
+            db.execute('UPDATE jobs SET status = ?, attempts = attempts + 1, started_at = ?, lease_expires = ? '
+                       'WHERE id = ?', (RUNNING, now, now + self.lease_seconds, row['id']))
+            job_dir = self._job_dir(row['id'])
+            documents = [(document['filename'], os.path.join(job_dir, str(document['position'])))
+                         for document in db.execute('SELECT filename, position FROM job_documents '
+                                                    'WHERE job_id = ? ORDER BY position', (row['id'],))]
+            return AnalysisJob(row['id'], row['kind'], json.loads(row['payload']), documents, row['attempts'] + 1)
+
+    def renew(self, job_id):
+        """Extend the lease of a job this process is running"""
+        with self._transaction() as db:
+            db.execute('UPDATE jobs SET lease_expires = ? WHERE id = ? AND status = ?',
+                       (time.time() + self.lease_seconds, job_id, RUNNING))
+
+    def finish(self, job_id, result, result_status):
+        """Store a job's result (the response body and HTTP status of the equivalent request)"""
+        with self._transaction() as db:
+            self._finish(db, job_id, result, result_status)
+        self._remove_documents([job_id])
+
+    def _finish(self, db, job_id, result, result_status):
+        now = time.time()
+        db.execute(
+            'UPDATE jobs SET status = ?, result = ?, result_status = ?, finished_at = ?, lease_expires = NULL, '
+            'callback_status = CASE WHEN callback_url IS NULL THEN NULL ELSE ? END, callback_next_at = ? '
+            'WHERE id = ? AND status IN (?, ?)',
+            (SUCCEEDED if result_status < 400 else FAILED, json.dumps(result), result_status, now, PENDING, now,
+             job_id, QUEUED, RUNNING))
+        db.execute('DELETE FROM job_documents WHERE job_id = ?', (job_id,))
+
+    def claim_callback(self):
+        """Lease the next due completion callback as (job ID, URL, body), or None"""
+        now = time.time()
+        with self._transaction() as db:
+            row = db.execute(
+                'SELECT id FROM jobs WHERE (callback_status = ? AND callback_next_at <= ?) '
+                'OR (callback_status = ? AND lease_expires < ?) ORDER BY callback_next_at LIMIT 1',
+                (PENDING, now, SENDING, now)).fetchone()
+            if row is None:
+                return None
+            db.execute('UPDATE jobs SET callback_status = ?, callback_attempts = callback_attempts + 1, '
+                       'lease_expires = ? WHERE id = ?', (SENDING, now + 2 * CALLBACK_TIMEOUT, row['id']))
+            job = self._describe(db.execute('SELECT * FROM jobs WHERE id = ?', (row['id'],)).fetchone())
+            return row['id'], job['callbackUrl'], job
+
+    def callback_done(self, job_id, delivered):
+        """Record a callback attempt; failed ones are retried with exponential backoff"""
+        with self._transaction() as db:
+            attempts = db.execute('SELECT callback_attempts FROM jobs WHERE id = ?', (job_id,)).fetchone()[0]
+            if delivered:
+                status, next_at = DELIVERED, None
+            elif attempts >= CALLBACK_MAX_ATTEMPTS:
+                status, next_at = FAILED, None
+            else:
+                status, next_at = PENDING, time.time() + 5 * 2 ** (attempts - 1)
+            db.execute('UPDATE jobs SET callback_status = ?, callback_next_at = ?, lease_expires = NULL WHERE id = ?',
+                       (status, next_at, job_id))
+
+    def purge(self):
+        """Forget finished jobs older than the retention period whose callbacks are settled"""
+        cutoff = time.time() - self.retention_seconds
+        with self._transaction() as db:
+            db.execute('DELETE FROM jobs WHERE finished_at < ? AND (callback_status IS NULL OR callback_status IN (?, ?))',
+                       (cutoff, DELIVERED, FAILED))
+            with_documents = {row[0] for row in db.execute('SELECT DISTINCT job_id FROM job_documents')}
+        # Files of jobs whose submission or removal was interrupted
+        try:
+            job_ids = os.listdir(self.documents_dir)
+        except FileNotFoundError:
+            job_ids = []
+        self._remove_documents([job_id for job_id in job_ids if job_id not in with_documents
+                                and os.path.getmtime(self._job_dir(job_id)) < cutoff])
+
+    def get(self, job_id):
+        """JSON-friendly description of a job, or None"""
+        with closing(self._connect()) as db:
+            row = db.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            return self._describe(row) if row is not None else None
+
+    def _describe(self, row):
+        job = {
+            'jobId': row['id'],
+            'kind': row['kind'],
+            'status': row['status'],
+            'attempts': row['attempts'],
+            'submittedAt': row['created_at'],
+            'startedAt': row['started_at'],
+            'finishedAt': row['finished_at'],
+            'callbackUrl': row['callback_url'],
+            'callbackStatus': row['callback_status']
+        }
+        if row['result'] is not None:
+            job['result'] = json.loads(row['result'])
+            job['resultStatus'] = row['result_status']
+        return job
+
+    def stats(self):
+        with closing(self._connect()) as db:
+            counts = dict(db.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+            oldest = db.execute('SELECT MIN(created_at) FROM jobs WHERE status = ?', (QUEUED,)).fetchone()[0]
+            queued_bytes = db.execute('SELECT COALESCE(SUM(size), 0) FROM job_documents').fetchone()[0]
+        return {
+            **{status: counts.get(status, 0) for status in (QUEUED, RUNNING, SUCCEEDED, FAILED)},
+            'oldestQueuedSeconds': round(time.time() - oldest, 3) if oldest else 0.0,
+            'maxQueued': self.max_queued,
+            'queuedBytes': queued_bytes,
+            'maxQueuedBytes': self.max_queued_bytes
+        }
+
+
+class AnalysisJobWorkers:
+    """Threads running queued jobs (and delivering their callbacks) in this process.
+
+    handlers maps a job kind to handler(payload, documents) -> (result, HTTP status).
+    """
+
+    def __init__(self, queue, handlers, threads=DEFAULT_WORKERS, poll_seconds=DEFAULT_POLL_SECONDS):
+        self.queue = queue
+        self.handlers = handlers
+        self.threads = threads
+        self.poll_seconds = poll_seconds
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._workers = []
+        self._lock = threading.Lock()
+        self.completed = 0
+
+    def start(self):
+        """Start the worker threads (after forking: threads do not survive a fork)"""
+        with self._lock:
+            if self._workers or self.threads <= 0:
+                return
+            self._stopping.clear()
+            for i in range(self.threads):
+                worker = threading.Thread(target=self._run, name=f'analysis-job-worker-{i}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def stop(self, timeout=None):
+        """Stop after the jobs in progress; unfinished ones are picked up again after their lease"""
+        self._stopping.set()
+        self._wake.set()
+        with self._lock:
+            for worker in self._workers:
+                worker.join(timeout)
+            self._workers = []
+
+    @property
+    def running(self):
+        return bool(self._workers)
+
+    def wake(self):
+        """Look at the queue now instead of at the next poll (a job was just submitted)"""
+        self._wake.set()
+
+    def _run(self):
+        last_purge = 0.0
+        while not self._stopping.is_set():
+            try:
+                job = self.queue.claim()
+                if job is not None:
+                    self._process(job)
+                    continue
+                callback = self.queue.claim_callback()
+                if callback is not None:
+                    self._deliver(*callback)
+                    continue
+                if time.time() - last_purge > 3600:
+                    self.queue.purge()
+                    last_purge = time.time()
+            except sqlite3.Error as e:
+                print(f"Analysis job queue error: {e}")
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+    def _process(self, job):
+        # Renew the lease while the job runs so that no other worker takes it over
+        done = threading.Event()
+
+        def renew():
+            while not done.wait(self.queue.lease_seconds / 3):
+                try:
+                    self.queue.renew(job.id)
+                except sqlite3.Error as e:
+                    print(f"Could not renew analysis job lease: {e}")
+
+        renewer = threading.Thread(target=renew, name=f'analysis-job-lease-{job.id}', daemon=True)
+        renewer.start()
+        try:
+            handler = self.handlers.get(job.kind)
+            if handler is None:
+                result, status = {'error': f'Unknown job kind: {job.kind}', 'success': False}, 400
+            else:
+                result, status = handler(job.payload, job.documents)
+        except Exception as e:
+            print(f"Error running analysis job {job.id}: {e}")
+            result, status = {'error': f'Failed to run analysis job: {str(e)}', 'success': False}, 500
+        finally:
+            done.set()
+            renewer.join()
+        self.queue.finish(job.id, result, status)
+        self.completed += 1
+
+    def _deliver(self, job_id, url, job):
+        try:
+            # Checked again: what the host resolves to may have changed since the job was submitted
+            validate_callback_url(url)
+        except ValueError as e:
+            print(f"Callback for analysis job {job_id} refused: {e}")
+            self.queue.callback_done(job_id, False)
+            return
+        request = urllib.request.Request(url, data=json.dumps(job).encode('utf-8'), method='POST',
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with _callback_opener.open(request, timeout=CALLBACK_TIMEOUT) as response:
+                delivered = 200 <= response.status < 300
+        except (OSError, ValueError) as e:
+            print(f"Callback for analysis job {job_id} failed: {e}")
+            delivered = False
+        self.queue.callback_done(job_id, delivered)
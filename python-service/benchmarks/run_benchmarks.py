@@ -0,0 +1,479 @@
+"""Benchmark suite for the resume matchers.
+
+Runs micro-benchmarks for each scoring stage of ImprovedResumeMatcher and
+EnhancedMERNResumeMatcher, document extraction per format, and end-to-end
+requests through the Flask test client, all on a seeded synthetic corpus
+(see synthetic_corpus.py). Results are written as JSON so runs can be
+compared over time:
+
+    python benchmarks/run_benchmarks.py --output results/baseline.json
+    python benchmarks/run_benchmarks.py --output results/change.json --compare results/baseline.json
+
+Use --quick for a smoke run and --suite to select api, mern, extraction or e2e.
+
+The fast paths promise the scores of the reference implementations. --verify
+checks that on the same corpus instead of timing anything, and exits with
+status 1 on any difference:
+
+    python benchmarks/run_benchmarks.py --verify
+
+api: ScoringEngine and ResumeIndex.search against calculate_similarity.
+mern: text_normalizer against the original chain of substitutions (on the
+corpus and on fuzzed fragments) and IncrementalScorer against
+calculate_advanced_similarity over a series of edits.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVICE_DIR = os.path.dirname(BENCHMARK_DIR)
+for path in (SERVICE_DIR, BENCHMARK_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from synthetic_corpus import FORMATS, SyntheticCorpus, load_vocabulary, render
+
+SUITES = ('api', 'mern', 'extraction', 'e2e')
+
+# Years-of-experience patterns, each applied with its own findall by the original parser
+REFERENCE_EXPERIENCE_PATTERNS = [
+    r'(\d+)[\+\-\s]*years?\s+(?:of\s+)?experience',
+    r'(\d+)[\+\-\s]*yrs?\s+(?:of\s+)?experience',
+    r'experience[:\s]+(\d+)[\+\-\s]*years?',
+    r'(\d+)[\+\-\s]*years?\s+in',
+    r'over\s+(\d+)\s+years?',
+    r'more\s+than\s+(\d+)\s+years?'
+]
+
+# Fragments the fuzzed normalizer inputs are made of: spellings of the
+# normalized terms, their parts, stop words, experience phrases and characters
+# that case folding or the cleanup treat specially
+FUZZ_FRAGMENTS = [
+    'node.js', 'nodejs', 'node js', 'react.js', 'express.js', 'next.js', 'mongo db', 'mongodb', 'type script',
+    'j s', 'js', 'j', 's', 'html', 'html5', 'html 5', 'HTML', 'css', 'css3', 'css 3', 'rest', 'restful', 'rest ful',
+    'restfu', 'api', 'apis', 'api s', 'ci/cd', 'ci / cd', 'cicd', 'ci', 'cd', 'aws', 'gcp', 'AWS', 'script', 'db',
+    'ful', 'the', 'with', 'were', 'been', 'being', 'and', 'in', 'of', 'experience', 'experience:', 'years', 'year',
+    'yrs', 'yr', 'over', 'more', 'than', '5', '12', '3+', '10-', 'ſ', 'ı', 'İ', 'K', 'ß', 'é', '²', '٣',
+    '/', '.', '+', '#', '-', '_', '(', ')', ',', ';', '—'
+]
+FUZZ_SEPARATORS = [' ', '', '  ', '\n', ' \t ']
+
+
+def reference_preprocessing(text):
+    """advanced_text_preprocessing as the original chain: one re.sub per normalization, then cleanup"""
+    from text_normalizer import BASIC_STOPWORDS, TECH_NORMALIZATIONS
+    if not text:
+        return ""
+    text = text.lower()
+    for pattern, replacement in TECH_NORMALIZATIONS:
+        text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
+    text = re.sub(r'[^\w\s\.\+\#\-/]', ' ', text)
+    text = re.sub(r'\s+', ' ', text)
+    return " ".join(word for word in text.split()
+                    if word not in BASIC_STOPWORDS or len(word) <= 3 or word.isdigit())
+
+
+def reference_experience_years(text):
+    """extract_experience_years as the original findall passes"""
+    text_lower = text.lower()
+    years = [int(match) for pattern in REFERENCE_EXPERIENCE_PATTERNS
+             for match in re.findall(pattern, text_lower) if match.isdigit()]
+    return max(years) if years else 0
+
+
+def measure(fn, repeat, items=1):
+    """Time fn() repeat times; items is how many documents one call processes"""
+    fn()  # Warm-up call, not recorded
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    per_item = [t * 1000 / items for t in timings]
+    per_item.sort()
+    return {
+        'runs': repeat,
+        'items': items,
+        'meanMs': round(statistics.mean(per_item), 4),
+        'medianMs': round(statistics.median(per_item), 4),
+        'minMs': round(per_item[0], 4),
+        'p95Ms': round(per_item[min(len(per_item) - 1, int(0.95 * len(per_item)))], 4),
+        'stdevMs': round(statistics.stdev(per_item), 4) if len(per_item) > 1 else 0.0
+    }
+
+
+class BenchmarkRun:
+    def __init__(self, corpus, args):
+        self.corpus = corpus
+        self.args = args
+        self.results = []
+        self.resumes = corpus.resumes(args.resumes, args.resume_words)
+        self.jobs = corpus.job_postings(args.jobs, args.job_words)
+        self.long_resumes = corpus.resumes(args.long_resumes, args.long_resume_words)
+
+    def record(self, suite, name, fn, items=1, repeat=None, **params):
+        result = measure(fn, repeat or self.args.repeat, items)
+        result.update({'suite': suite, 'name': name, 'params': params})
+        self.results.append(result)
+        print(f"{suite:<11} {name:<40} {result['medianMs']:>10.3f} ms/item (p95 {result['p95Ms']:.3f})",
+              file=sys.stderr)
+
+    def api_suite(self):
+        from resume_matcher_api import ImprovedResumeMatcher
+        matcher = ImprovedResumeMatcher()
+        resumes = [matcher.preprocess_text(cv) for cv in self.resumes]
+        jobs = [matcher.preprocess_text(jd) for jd in self.jobs]
+        jd = jobs[0]
+        n = len(resumes)
+
+        self.record('api', 'preprocess_text', lambda: [matcher.preprocess_text(cv) for cv in self.resumes], n)
+        self.record('api', 'extract_key_technical_terms', lambda: [matcher.extract_key_technical_terms(cv) for cv in resumes], n)
+        self.record('api', 'fuzzy_match_skills', lambda: [matcher.fuzzy_match_skills(cv, jd) for cv in resumes], n)
+        self.record('api', 'tfidf_similarity (per pair)', lambda: [matcher.tfidf_similarity(cv, jd) for cv in resumes], n)
+        self.record('api', 'build_job_profile', lambda: [matcher.build_job_profile(job) for job in jobs], len(jobs))
+
+        job_profile = matcher.job_profiles.get_or_build(jd)
+        self.record('api', 'batch_tfidf_similarity', lambda: matcher.batch_tfidf_similarity(resumes, job_profile), n)
+        self.record('api', 'calculate_similarity', lambda: [matcher.calculate_similarity(cv, jd) for cv in resumes], n)
+        self.record('api', 'calculate_similarity_batch', lambda: matcher.calculate_similarity_batch(resumes, jd), n)
+        features = [matcher.document_features(cv) for cv in resumes]
+        self.record('api', 'calculate_similarity (per pair, all jobs)',
+                    lambda: [[matcher.calculate_similarity(cv, job) for job in jobs] for cv in features], n * len(jobs))
+        self.record('api', 'calculate_similarity_matrix', lambda: matcher.calculate_similarity_matrix(features, jobs),
+                    n * len(jobs))
+        from resume_index import ResumeIndex
+        index = ResumeIndex(matcher, journal_path=None)
+        for i, cv in enumerate(resumes):
+            index.add(str(i), cv)
+        index.compact()
+        self.record('api', 'ResumeIndex.search top 10', lambda: [index.search(job, 10) for job in jobs], len(jobs),
+                    indexed=n)
+        import tempfile
+        from feature_store import FeatureStore, StoredScoringEngine
+        with tempfile.TemporaryDirectory() as store_dir:
+            store = FeatureStore(matcher, store_dir)
+            for cv in features:
+                for job in jobs:
+                    store.record(cv, job, 0.0)
+            reader = FeatureStore(matcher, store_dir, readonly=True)
+            pairs = reader.pairs
+            # A fresh engine per run, so stored documents are loaded from the store every time
+            self.record('api', 'StoredScoringEngine.score_pairs (rescore)',
+                        lambda: StoredScoringEngine(matcher, reader).score_pairs(pairs['resume'], pairs['job']),
+                        len(pairs))
+
+        self.record('api', 'document_features', lambda: [matcher.document_features(cv) for cv in resumes], n)
+        self.record('api', 'generate_detailed_feedback',
+                    lambda: [matcher.generate_detailed_feedback(cv, jd, 50.0) for cv in resumes], n)
+
+    def mern_suite(self):
+        from mern_engine import EnhancedMERNResumeMatcher
+        matcher = EnhancedMERNResumeMatcher()
+        jd = self.jobs[0]
+        n = len(self.resumes)
+        processed = [matcher.advanced_text_preprocessing(cv) for cv in self.resumes]
+        jd_processed = matcher.advanced_text_preprocessing(jd)
+        skills = [matcher.extract_skills_with_context(cv) for cv in self.resumes]
+        jd_skills = matcher.extract_skills_with_context(jd)
+
+        self.record('mern', 'advanced_text_preprocessing', lambda: [matcher.advanced_text_preprocessing(cv) for cv in self.resumes], n)
+        self.record('mern', 'extract_skills_with_context', lambda: [matcher.extract_skills_with_context(cv) for cv in self.resumes], n)
+        self.record('mern', 'calculate_semantic_similarity',
+                    lambda: [matcher.calculate_semantic_similarity(cv, jd_processed) for cv in processed], n)
+        self.record('mern', 'calculate_skill_match_score',
+                    lambda: [matcher.calculate_skill_match_score(cv_skills, jd_skills) for cv_skills in skills], n)
+        self.record('mern', 'extract_experience_years', lambda: [matcher.extract_experience_years(cv) for cv in self.resumes], n)
+        self.record('mern', 'calculate_education_bonus', lambda: [matcher.calculate_education_bonus(cv, jd) for cv in self.resumes], n)
+        self.record('mern', 'calculate_advanced_similarity',
+                    lambda: [matcher.calculate_advanced_similarity(cv, jd) for cv in self.resumes], n)
+
+        jd_features = matcher.document_features(jd)
+        self.record('mern', 'document_features', lambda: [matcher.document_features(cv) for cv in self.resumes], n)
+        self.record('mern', 'calculate_advanced_similarity (features)',
+                    lambda: [matcher.calculate_advanced_similarity(matcher.document_features(cv), jd_features)
+                             for cv in self.resumes], n)
+
+        # Live scoring: each call applies one edit of the job description (inserted, then removed) per resume
+        from incremental_scoring import IncrementalScorer
+        middle = len(jd) // 2
+        edits = [jd[:middle] + " react native" + jd[middle:], jd]
+        scorers = [IncrementalScorer(matcher, matcher.document_features(cv)) for cv in self.resumes]
+        for scorer in scorers:
+            scorer.update(jd)
+
+        def edit_job_description():
+            edits.reverse()
+            return [scorer.update(edits[0]) for scorer in scorers]
+
+        self.record('mern', 'IncrementalScorer.update (one edit)', edit_job_description, n)
+
+        # Normalization cost grows with document length; measured separately on long resumes
+        long_n = len(self.long_resumes)
+        words = self.args.long_resume_words
+        self.record('mern', 'advanced_text_preprocessing (long)',
+                    lambda: [matcher.advanced_text_preprocessing(cv) for cv in self.long_resumes], long_n, words=words)
+        self.record('mern', 'extract_experience_years (long)',
+                    lambda: [matcher.extract_experience_years(cv) for cv in self.long_resumes], long_n, words=words)
+        self.record('mern', 'document_features (long)',
+                    lambda: [matcher.document_features(cv) for cv in self.long_resumes], long_n, words=words)
+
+        analyses = [matcher.calculate_advanced_similarity(cv, jd) for cv in self.resumes]
+        self.record('mern', 'generate_comprehensive_feedback',
+                    lambda: [matcher.generate_comprehensive_feedback(cv, jd, score, details)
+                             for cv, (score, details) in zip(self.resumes, analyses)], n)
+
+    def extraction_suite(self):
+        from text_extraction import parse_file
+        documents = self.resumes[:self.args.documents]
+        for ext in FORMATS:
+            rendered = [render(cv, ext) for cv in documents]
+            size_kb = round(sum(len(data) for data in rendered) / len(rendered) / 1024, 1)
+            self.record('extraction', f"parse_file {ext}", lambda: [parse_file(data, ext) for data in rendered],
+                        len(rendered), format=ext, averageKb=size_kb)
+
+    def e2e_suite(self):
+        import resume_matcher_api
+        app = resume_matcher_api.app
+        matcher = resume_matcher_api.matcher
+        client = app.test_client()
+        jd = self.jobs[0]
+        documents = self.resumes[:self.args.documents]
+
+        def post_each(rendered, ext):
+            # Cleared every call so extraction is measured, not the cache
+            matcher.extraction_cache.clear()
+            for i, data in enumerate(rendered):
+                response = client.post('/api/match-resume', content_type='multipart/form-data', data={
+                    'jobDescription': jd, 'resume': (io.BytesIO(data), f"resume_{i}{ext}")})
+                assert response.status_code == 200, response.get_json()
+
+        for ext in FORMATS:
+            rendered = [render(cv, ext) for cv in documents]
+            self.record('e2e', f"POST /api/match-resume {ext}", lambda: post_each(rendered, ext), len(rendered),
+                        repeat=max(1, self.args.repeat // 2), format=ext)
+
+        rendered = [render(cv, '.txt') for cv in documents]
+
+        def post_cached():
+            for i, data in enumerate(rendered):
+                client.post('/api/match-resume', content_type='multipart/form-data', data={
+                    'jobDescription': jd, 'resume': (io.BytesIO(data), f"resume_{i}.txt")})
+
+        self.record('e2e', 'POST /api/match-resume .txt (cached)', post_cached, len(rendered))
+
+        def post_batch(scoring_mode):
+            matcher.extraction_cache.clear()
+            response = client.post('/api/match-resumes', content_type='multipart/form-data', data={
+                'jobDescription': jd, 'scoringMode': scoring_mode,
+                'resumes': [(io.BytesIO(data), f"resume_{i}.txt") for i, data in enumerate(rendered)]})
+            assert response.status_code == 200, response.get_json()
+
+        self.record('e2e', 'POST /api/match-resumes .txt', lambda: post_batch('standard'), len(rendered),
+                    repeat=max(1, self.args.repeat // 2))
+        self.record('e2e', 'POST /api/match-resumes .txt (mern)', lambda: post_batch('mern'), len(rendered),
+                    repeat=max(1, self.args.repeat // 2))
+
+
+class ParityCheck:
+    """Compares each fast path with the reference implementation it replaces, on the benchmark corpus"""
+
+    def __init__(self, corpus, args):
+        self.corpus = corpus
+        self.args = args
+        self.failures = 0
+        self.resumes = corpus.resumes(args.resumes, args.resume_words)
+        self.jobs = corpus.job_postings(args.jobs, args.job_words)
+        self.long_resumes = corpus.resumes(args.long_resumes, args.long_resume_words)
+
+    def check(self, suite, name, pairs):
+        """pairs yields (case, fast result, reference result); prints a summary and the first differences"""
+        checked = mismatches = 0
+        for case, got, expected in pairs:
+            checked += 1
+            if got != expected:
+                mismatches += 1
+                if mismatches <= 3:
+                    print(f"  {name} differs for {case!r:.80}: {got!r:.200} != {expected!r:.200}", file=sys.stderr)
+        self.failures += mismatches
+        print(f"{suite:<11} {name:<40} {checked:>7} checked, {mismatches} different", file=sys.stderr)
+
+    def api_suite(self):
+        from resume_matcher_api import ImprovedResumeMatcher
+        from resume_index import ResumeIndex
+        matcher = ImprovedResumeMatcher()
+        resumes = [matcher.preprocess_text(cv) for cv in self.resumes]
+        jobs = [matcher.preprocess_text(jd) for jd in self.jobs]
+        features = [matcher.document_features(cv) for cv in resumes]
+        reference = [[matcher.calculate_similarity(cv, job) for job in jobs] for cv in features]
+
+        # The engine itself, not calculate_similarity_matrix, which falls back to pairs on errors
+        matrix = matcher.scoring_engine.score_matrix(features, jobs).tolist()
+        self.check('api', 'ScoringEngine.score_matrix', (
+            ((i, j), matrix[i][j], reference[i][j]) for i in range(len(resumes)) for j in range(len(jobs))))
+
+        # Small segments, and replaced and deleted rows, as a long-running index has them
+        index = ResumeIndex(matcher, journal_path=None, delta_size=max(2, len(resumes) // 7))
+        live = {}
+        for i, cv in enumerate(resumes):
+            index.add(f"{i:05d}", cv)
+            live[f"{i:05d}"] = i
+        for i in range(0, len(resumes), 5):
+            index.delete(f"{i:05d}")
+            del live[f"{i:05d}"]
+        for i in range(1, len(resumes), 7):
+            replacement = (i * 3) % len(resumes)
+            index.add(f"{i:05d}", resumes[replacement])
+            live[f"{i:05d}"] = replacement
+
+        def searches():
+            for j, job in enumerate(jobs):
+                expected = sorted(((reference[row][j], resume_id) for resume_id, row in live.items()),
+                                  key=lambda result: (-result[0], result[1]))
+                for top_k in (1, 10, len(live)):
+                    got = [(score, resume.id) for score, resume in index.search(job, top_k)]
+                    yield (j, top_k), got, expected[:top_k]
+
+        self.check('api', 'ResumeIndex.search', searches())
+
+    def mern_suite(self):
+        from mern_engine import EnhancedMERNResumeMatcher
+        from incremental_scoring import IncrementalScorer
+        matcher = EnhancedMERNResumeMatcher()
+        documents = self.resumes + self.jobs + self.long_resumes
+
+        rng = random.Random(self.args.seed)
+        fuzzed = []
+        for _ in range(self.args.fuzz):
+            text = ''.join(rng.choice(FUZZ_FRAGMENTS) + rng.choice(FUZZ_SEPARATORS) for _ in range(rng.randint(1, 14)))
+            fuzzed.append(text.upper() if rng.random() < 0.3 else text)
+
+        self.check('mern', 'advanced_text_preprocessing', (
+            (text, matcher.advanced_text_preprocessing(text), reference_preprocessing(text))
+            for text in documents + fuzzed))
+        self.check('mern', 'extract_experience_years', (
+            (text, matcher.extract_experience_years(text), reference_experience_years(text))
+            for text in documents + fuzzed))
+
+        # Typing, deleting and pasting into a job description, scored live against each resume
+        def edit(text):
+            position = rng.randint(0, len(text))
+            kind = rng.random()
+            if kind < 0.4:
+                return text[:position] + rng.choice([' ', '']) + rng.choice(FUZZ_FRAGMENTS + self.corpus.vocabulary) \
+                    + rng.choice([' ', '']) + text[position:]
+            if kind < 0.65:
+                return text[:position] + text[position + rng.randint(1, 30):]
+            if kind < 0.9:
+                return text[:position] + rng.choice('abcdefghijklmnopqrstuvwxyz .,+/\n') + text[position:]
+            return rng.choice(self.jobs + [''])
+
+        def updates():
+            for cv in self.resumes[:self.args.documents]:
+                scorer = IncrementalScorer(matcher, matcher.document_features(cv))
+                jd = rng.choice(self.jobs)
+                for step in range(self.args.edits):
+                    if step:
+                        jd = edit(jd)
+                    yield (cv[:40], step), scorer.update(jd), matcher.calculate_advanced_similarity(cv, jd)
+
+        self.check('mern', 'IncrementalScorer.update', updates())
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=SERVICE_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Print median ratios against an earlier run"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['suite'], r['name']): r for r in json.load(f)['results']}
+
+    print(f"\n{'benchmark':<52} {'before':>10} {'after':>10} {'ratio':>7}")
+    for result in results:
+        before = baseline.get((result['suite'], result['name']))
+        if not before:
+            continue
+        ratio = result['medianMs'] / before['medianMs'] if before['medianMs'] else float('inf')
+        print(f"{result['suite'] + ' ' + result['name']:<52} {before['medianMs']:>10.3f} "
+              f"{result['medianMs']:>10.3f} {ratio:>6.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--suite', nargs='+', choices=SUITES, default=list(SUITES))
+    parser.add_argument('--resumes', type=int, default=200, help='Resumes scored per stage benchmark')
+    parser.add_argument('--jobs', type=int, default=10)
+    parser.add_argument('--documents', type=int, default=30, help='Documents per extraction/e2e benchmark')
+    parser.add_argument('--resume-words', type=int, default=600)
+    parser.add_argument('--job-words', type=int, default=250)
+    parser.add_argument('--long-resumes', type=int, default=20, help='Long resumes per normalization benchmark')
+    parser.add_argument('--long-resume-words', type=int, default=6000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--quick', action='store_true', help='Small corpus and few repeats')
+    parser.add_argument('--output', help='Write JSON results here (default: stdout)')
+    parser.add_argument('--compare', metavar='BASELINE_JSON', help='Print ratios against an earlier result file')
+    parser.add_argument('--verify', action='store_true',
+                        help='Check the fast paths against the reference implementations instead of timing them')
+    parser.add_argument('--fuzz', type=int, default=20000, help='Fuzzed normalizer inputs checked by --verify')
+    parser.add_argument('--edits', type=int, default=40, help='Job description edits per resume checked by --verify')
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.resumes, args.jobs, args.documents, args.repeat = 20, 3, 5, 2
+        args.long_resumes = 5
+        args.fuzz, args.edits = 2000, 10
+
+    if args.verify:
+        check = ParityCheck(SyntheticCorpus(load_vocabulary(), seed=args.seed), args)
+        for suite in args.suite:
+            if hasattr(check, f"{suite}_suite"):
+                getattr(check, f"{suite}_suite")()
+        sys.exit(1 if check.failures else 0)
+
+    run = BenchmarkRun(SyntheticCorpus(load_vocabulary(), seed=args.seed), args)
+    for suite in args.suite:
+        getattr(run, f"{suite}_suite")()
+
+    report = {
+        'meta': {
+            'createdAt': datetime.now(timezone.utc).isoformat(),
+            'gitRevision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpuCount': os.cpu_count(),
+            'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')}
+        },
+        'results': run.results
+    }
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        compare(run.results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
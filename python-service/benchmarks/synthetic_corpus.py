@@ -0,0 +1,260 @@
+"""Synthetic resumes and job postings for benchmarking the matchers.
+
+Documents are assembled from the matchers' own skill vocabularies
+(ImprovedResumeMatcher.skill_synonyms and
+EnhancedMERNResumeMatcher.skill_categories) with resume/posting structure,
+experience statements and a sprinkling of typos, and are fully determined
+by the seed. Each document can be rendered as TXT, DOCX or multi-page PDF.
+
+Write a corpus to disk (also usable with fit_tfidf_model.py):
+    python benchmarks/synthetic_corpus.py --output /tmp/corpus --resumes 200 --jobs 20
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import textwrap
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SERVICE_DIR not in sys.path:
+    sys.path.insert(0, SERVICE_DIR)
+
+FORMATS = ('.txt', '.docx', '.pdf')
+
+FIRST_NAMES = ['Alex', 'Sam', 'Jordan', 'Priya', 'Wei', 'Maria', 'Omar', 'Elena', 'Kofi', 'Yuki']
+LAST_NAMES = ['Smith', 'Patel', 'Garcia', 'Chen', 'Okafor', 'Novak', 'Kim', 'Silva', 'Haddad', 'Berg']
+TITLES = ['Software Engineer', 'Full Stack Developer', 'Frontend Developer', 'Backend Engineer',
+          'MERN Stack Developer', 'Data Scientist', 'DevOps Engineer', 'Senior Software Engineer']
+COMPANIES = ['Acme Corp', 'Globex', 'Initech', 'Umbrella Labs', 'Hooli', 'Vandelay Industries', 'Stark Digital']
+DEGREES = ['Bachelor of Science in Computer Science', 'Master of Science in Software Engineering',
+           'B.Tech in Information Technology', 'PhD in Computer Science']
+CERTIFICATIONS = ['AWS Certified Developer', 'Certified Kubernetes Administrator', 'MongoDB Certified Developer',
+                  'Azure Fundamentals certification']
+
+VERBS = ['Built', 'Designed', 'Led', 'Implemented', 'Maintained', 'Migrated', 'Optimized', 'Shipped', 'Automated']
+OBJECTS = ['a customer-facing dashboard', 'REST services for payments', 'the deployment pipeline',
+           'a real-time chat feature', 'internal tooling', 'the search backend', 'an analytics platform',
+           'a component library', 'the authentication flow']
+OUTCOMES = ['reducing latency by 40%', 'serving 2M monthly users', 'cutting release time in half',
+            'improving test coverage to 90%', 'with a team of five engineers', 'ahead of schedule']
+FILLER = ['collaborated closely with product and design', 'mentored junior developers',
+          'participated in code reviews', 'wrote technical documentation', 'worked in an agile team',
+          'owned features end to end', 'communicated with stakeholders', 'handled on-call rotations']
+POSTING_LINES = ['You will design, build and maintain scalable web applications.',
+                 'You will collaborate with product managers and designers.',
+                 'You will review code and mentor other engineers.',
+                 'We value ownership, curiosity and clear communication.',
+                 'We offer flexible hours, remote work and a learning budget.']
+
+
+def load_vocabulary():
+    """Skill terms from both matchers' dictionaries"""
+    from resume_matcher_api import ImprovedResumeMatcher
+    api_matcher = ImprovedResumeMatcher()
+    terms = {var for variations in api_matcher.skill_synonyms.values() for var in variations}
+    terms.update(api_matcher.technical_terms)
+
+    from mern_engine import EnhancedMERNResumeMatcher
+    mern_matcher = EnhancedMERNResumeMatcher()
+    for skill_data in mern_matcher.skill_categories.values():
+        terms.update(skill_data['terms'])
+
+    return sorted(terms)
+
+
+def add_typo(rng, word):
+    """Drop, double or swap one character"""
+    if len(word) < 5:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    kind = rng.randrange(3)
+    if kind == 0:
+        return word[:i] + word[i + 1:]
+    if kind == 1:
+        return word[:i] + word[i] + word[i:]
+    return word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
+
+
+class SyntheticCorpus:
+    """Deterministic generator of resumes and job postings of controlled length"""
+
+    def __init__(self, vocabulary=None, seed=0, typo_rate=0.03):
+        self.vocabulary = vocabulary or load_vocabulary()
+        self.seed = seed
+        self.typo_rate = typo_rate
+
+    def _skill(self, rng):
+        skill = rng.choice(self.vocabulary)
+        if rng.random() < self.typo_rate:
+            skill = add_typo(rng, skill)
+        return skill
+
+    def _skills(self, rng, n):
+        return ', '.join(self._skill(rng) for _ in range(n))
+
+    def _bullet(self, rng):
+        return (f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} using {self._skill(rng)} and "
+                f"{self._skill(rng)}, {rng.choice(OUTCOMES)}; {rng.choice(FILLER)}.")
+
+    def resume(self, index, words=600):
+        """Resume text of roughly the given number of words"""
+        rng = random.Random(f"{self.seed}-resume-{index}")
+        years = rng.randint(1, 15)
+        lines = [
+            f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            f"{rng.choice(TITLES)} | {rng.choice(FIRST_NAMES).lower()}@example.com | +1 555 0100",
+            "",
+            "SUMMARY",
+            f"{rng.choice(TITLES)} with {years}+ years of experience in {self._skills(rng, 4)}.",
+            "",
+            "SKILLS",
+            self._skills(rng, rng.randint(8, 20)),
+            "",
+            "EXPERIENCE"
+        ]
+
+        count = sum(len(line.split()) for line in lines)
+        tail = [
+            "",
+            "EDUCATION",
+            f"{rng.choice(DEGREES)}, {rng.randint(2000, 2022)}",
+            "",
+            "CERTIFICATIONS",
+            rng.choice(CERTIFICATIONS)
+        ]
+        count += sum(len(line.split()) for line in tail)
+
+        while count < words:
+            start = rng.randint(2008, 2022)
+            header = f"{rng.choice(TITLES)}, {rng.choice(COMPANIES)} ({start} - {start + rng.randint(1, 4)})"
+            lines.append(header)
+            count += len(header.split())
+            for _ in range(rng.randint(3, 6)):
+                bullet = self._bullet(rng)
+                lines.append(bullet)
+                count += len(bullet.split())
+                if count >= words:
+                    break
+        return "\n".join(lines + tail)
+
+    def job_posting(self, index, words=250):
+        """Job posting text of roughly the given number of words"""
+        rng = random.Random(f"{self.seed}-job-{index}")
+        lines = [
+            f"{rng.choice(TITLES)} - {rng.choice(COMPANIES)}",
+            "",
+            "About the role",
+            rng.choice(POSTING_LINES),
+            "",
+            "Requirements",
+            f"- {rng.randint(1, 8)}+ years of experience with {self._skill(rng)}",
+            f"- Strong knowledge of {self._skills(rng, 3)}",
+            f"- {rng.choice(DEGREES)} or equivalent experience"
+        ]
+
+        count = sum(len(line.split()) for line in lines)
+        while count < words:
+            if rng.random() < 0.3:
+                line = rng.choice(POSTING_LINES)
+            else:
+                line = f"- Experience with {self._skills(rng, rng.randint(1, 3))} is {rng.choice(['required', 'a plus', 'preferred'])}"
+            lines.append(line)
+            count += len(line.split())
+        return "\n".join(lines)
+
+    def resumes(self, n, words=600):
+        return [self.resume(i, words) for i in range(n)]
+
+    def job_postings(self, n, words=250):
+        return [self.job_posting(i, words) for i in range(n)]
+
+
+def to_docx(text):
+    """DOCX bytes with one paragraph per line"""
+    import docx
+    document = docx.Document()
+    for line in text.split("\n"):
+        document.add_paragraph(line)
+    output = io.BytesIO()
+    document.save(output)
+    return output.getvalue()
+
+
+def _pdf_escape(line):
+    line = line.encode('latin-1', 'replace').decode('latin-1')
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def to_pdf(text, lines_per_page=50, width=90):
+    """Multi-page PDF bytes (Helvetica text, no dependencies)"""
+    lines = []
+    for paragraph in text.split("\n"):
+        lines.extend(textwrap.wrap(paragraph, width) or [''])
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    # Objects: 1 catalog, 2 page tree, 3 font, then a page and a content stream per page
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{pid} 0 R' for pid in page_ids)}] /Count {len(pages)} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    ]
+    for page_id, page_lines in zip(page_ids, pages):
+        content = "BT /F1 10 Tf 14 TL 50 770 Td " + " ".join(f"({_pdf_escape(line)}) '" for line in page_lines) + " ET"
+        content = content.encode('latin-1')
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode())
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(output.tell())
+        output.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = output.tell()
+    output.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        output.write(b"%010d 00000 n \n" % offset)
+    output.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return output.getvalue()
+
+
+def render(text, ext):
+    """Document bytes in the given format"""
+    if ext == '.txt':
+        return text.encode('utf-8')
+    if ext == '.docx':
+        return to_docx(text)
+    if ext == '.pdf':
+        return to_pdf(text)
+    raise ValueError(f"Unsupported format: {ext}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', required=True, help='Directory receiving resumes/ and jobs/')
+    parser.add_argument('--resumes', type=int, default=100)
+    parser.add_argument('--jobs', type=int, default=10)
+    parser.add_argument('--resume-words', type=int, default=600)
+    parser.add_argument('--job-words', type=int, default=250)
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=list(FORMATS))
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    corpus = SyntheticCorpus(seed=args.seed)
+    for kind, texts in (('resumes', corpus.resumes(args.resumes, args.resume_words)),
+                        ('jobs', corpus.job_postings(args.jobs, args.job_words))):
+        directory = os.path.join(args.output, kind)
+        os.makedirs(directory, exist_ok=True)
+        for i, text in enumerate(texts):
+            ext = args.formats[i % len(args.formats)]
+            with open(os.path.join(directory, f"{kind[:-1]}_{i:05d}{ext}"), 'wb') as f:
+                f.write(render(text, ext))
+    print(f"Wrote {args.resumes} resumes and {args.jobs} job postings to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Per-document features computed once and shared by scoring and feedback.
+
+Scoring and feedback used to re-tokenize the same resume several times per
+request (word sets, bigrams and technical terms were rebuilt for each step).
+A matcher now analyzes each document once into a DocumentFeatures, which
+both its scoring and its feedback consume.
+
+The fields are shared by both matchers; each fills the ones it uses and
+leaves the rest as None.
+
+Word n-grams are not kept as strings. Each token gets a 64-bit ID (the
+first 8 bytes of its BLAKE2b digest, so IDs are the same in every process
+and run), an n-gram is a polynomial rolling hash of its token IDs, and a
+document's n-grams are a sorted, duplicate-free uint64 array. Overlaps are
+counted by binary search of one array in the other. Two different n-grams
+share a hash with probability about 2**-64, so counts equal those of the
+string sets for any realistic corpus, at a small fraction of the memory.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+
+# Token IDs kept per process; the cache is dropped and refilled once it outgrows this
+MAX_CACHED_TOKENS = int(os.environ.get('TOKEN_ID_CACHE_SIZE', 200000))
+
+# Multiplier of the rolling hash; odd, so that multiplying by it is invertible modulo 2**64
+ROLLING_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+_token_ids = {}
+
+
+def token_id(token):
+    """Stable 64-bit ID of a token"""
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8', 'surrogatepass'), digest_size=8).digest(), 'little')
+
+
+def token_ids(tokens):
+    """uint64 array of the IDs of a token list"""
+    global _token_ids
+    cache = _token_ids
+    missing = set(tokens).difference(cache)
+    if missing:
+        if len(cache) + len(missing) > MAX_CACHED_TOKENS:
+            # Replaced rather than cleared: other threads may be reading the old one
+            cache = _token_ids = {}
+            missing = set(tokens)
+        for token in missing:
+            cache[token] = token_id(token)
+    return np.fromiter(map(cache.__getitem__, tokens), dtype=np.uint64, count=len(tokens))
+
+
+def ngram_sequence(ids, n):
+    """Hashes of the contiguous n-grams of a token ID array, in order and with repeats"""
+    count = len(ids) - n + 1
+    if count <= 0:
+        return np.zeros(0, dtype=np.uint64)
+    hashes = ids[:count].copy()
+    for k in range(1, n):
+        # Wraps modulo 2**64
+        hashes *= ROLLING_MULTIPLIER
+        hashes += ids[k:k + count]
+    return hashes
+
+
+def ngram_hashes(ids, n):
+    """Sorted unique hashes of the contiguous n-grams of a token ID array"""
+    return np.unique(ngram_sequence(ids, n))
+
+
+def shared_count(a, b):
+    """Number of hashes in both of two sorted, duplicate-free hash arrays"""
+    if len(a) > len(b):
+        a, b = b, a
+    if not len(a):
+        return 0
+    positions = np.minimum(np.searchsorted(b, a), len(b) - 1)
+    return int(np.count_nonzero(b[positions] == a))
+
+
+class DocumentFeatures:
+    """Everything a matcher derives from one document"""
+
+    __slots__ = (
+        'text',          # the document as given to the matcher
+        'lower',         # text lowercased
+        'processed',     # matcher-specific preprocessed text, if different from text
+        'tokens',        # whitespace tokens of the (processed) lowercased text
+        'token_set',     # unique tokens
+        'bigrams',       # word bigram hashes (see ngram_hashes), None if they could not be built
+        'trigrams',      # word trigram hashes
+        'tech_terms',    # technical terms
+        'skill_hits',    # skill terms (or skills with context) found in the text
+        'fuzzy_terms',   # skill terms fuzzily matched by the tokens, computed on demand
+        'years',         # years of experience stated
+        'length'         # number of words
+    )
+
+    def __init__(self, text, lower=None, processed=None, tokens=None, token_set=None, bigrams=None,
+                 trigrams=None, tech_terms=None, skill_hits=None, years=None, length=None):
+        self.text = text
+        self.lower = lower
+        self.processed = processed
+        self.tokens = tokens
+        self.token_set = token_set
+        self.bigrams = bigrams
+        self.trigrams = trigrams
+        self.tech_terms = tech_terms
+        self.skill_hits = skill_hits
+        self.fuzzy_terms = None
+        self.years = years
+        self.length = length
@@ -0,0 +1,173 @@
+"""Content-addressed cache for text extracted from resume files.
+
+Candidates re-submit the same resume against many postings, so the text
+extracted from a file is cached under the SHA-256 of its bytes. A bounded
+in-memory LRU tier serves hot documents and an optional on-disk tier keeps
+extractions across restarts, so a repeat upload never reaches the parsers.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+
+from text_extraction import ExtractedText
+
+DEFAULT_MAX_BYTES = int(os.environ.get('EXTRACTION_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+DEFAULT_CACHE_DIR = os.environ.get('EXTRACTION_CACHE_DIR') or None
+
+
+class ExtractionCache:
+    """Two-tier (memory LRU + optional disk) cache of extracted text.
+
+    The memory tier is bounded by the total size of the cached strings;
+    least recently used entries are evicted first. Keys are built with
+    make_key so that different extractors (namespace) and file formats
+    never share an entry for the same bytes; callers fold their parser
+    version and extraction budgets into the namespace (see
+    text_extraction.extraction_namespace), so the disk tier is not served
+    to parsers or budgets that would extract different text.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, cache_dir=DEFAULT_CACHE_DIR):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(data, ext, namespace='default'):
+        """Cache key for the raw bytes of a file"""
+        return ExtractionCache.key_for_digest(hashlib.sha256(data).hexdigest(), ext, namespace)
+
+    @staticmethod
+    def key_for_digest(digest, ext, namespace='default'):
+        """Cache key for a SHA-256 hex digest computed elsewhere (e.g. while receiving an upload)"""
+        return f"{namespace}-{digest}{ext.lower()}"
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, key[-2:], f"{key}.txt")
+
+    def _store(self, key, text):
+        """Insert into the memory tier and evict down to the size bound (lock held)"""
+        size = sys.getsizeof(text)
+        if size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._current_bytes -= sys.getsizeof(self._entries.pop(key))
+        self._entries[key] = text
+        self._current_bytes += size
+
+        while self._current_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._current_bytes -= sys.getsizeof(evicted)
+            self.evictions += 1
+
+    def get(self, key):
+        """Return the cached text for key, or None"""
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return text
+
+        if self.cache_dir:
+            try:
+                # newline='' on both sides: the text comes back with the line endings it was extracted with
+                with open(self._disk_path(key), 'r', encoding='utf-8', newline='') as f:
+                    text = f.read()
+                text = ExtractedText(text, self._read_truncation(key))
+            except OSError:
+                text = None
+
+            if text is not None:
+                with self._lock:
+                    self._store(key, text)
+                    self.hits += 1
+                    self.disk_hits += 1
+                return text
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, text):
+        """Cache extracted text under key"""
+        with self._lock:
+            self._store(key, text)
+
+        if self.cache_dir:
+            path = self._disk_path(key)
+            tmp_path = None
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Write to a temporary file first so readers never see partial text
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+                with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+                    f.write(text)
+                # The truncation note is written first so that it is never missing for a visible entry
+                truncated = getattr(text, 'truncated', None)
+                if truncated:
+                    with open(f"{path}.truncated", 'w', encoding='utf-8') as f:
+                        json.dump(truncated, f)
+                elif os.path.exists(f"{path}.truncated"):
+                    os.remove(f"{path}.truncated")
+                os.replace(tmp_path, path)
+            except (OSError, UnicodeError):
+                # The entry stays in memory only; no temporary file is left behind
+                if tmp_path is not None:
+                    try:
+                        os.remove(tmp_path)
+                    except OSError:
+                        pass
+
+    def _read_truncation(self, key):
+        """The truncation note stored beside a disk entry (see text_extraction.TextBudget), or None"""
+        try:
+            with open(f"{self._disk_path(key)}.truncated", 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def get_or_extract(self, key, extract):
+        """Return cached text for key, calling extract() and caching its result on a miss"""
+        text = self.get(key)
+        if text is None:
+            text = extract()
+            self.put(key, text)
+        return text
+
+    def clear(self):
+        """Drop the memory tier (the disk tier is left in place)"""
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+
+    def stats(self):
+        """Hit, miss and eviction counters plus current usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'diskHits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hitRatio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._current_bytes,
+                'maxBytes': self.max_bytes,
+                'diskTier': bool(self.cache_dir)
+            }
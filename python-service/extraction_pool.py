@@ -0,0 +1,221 @@
+"""Isolated worker processes for document parsing.
+
+pdfplumber is CPU-bound and holds the GIL, so a malformed or very long PDF
+could pin a Flask worker indefinitely. ExtractionPool runs parsing in a
+bounded set of worker processes instead: every call has a hard deadline after
+which the worker is killed and replaced, workers run under an address-space
+limit, and each worker is recycled after a fixed number of documents.
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+DEFAULT_WORKERS = int(os.environ.get('EXTRACTION_POOL_WORKERS', min(4, os.cpu_count() or 1)))
+DEFAULT_TIMEOUT = float(os.environ.get('EXTRACTION_TIMEOUT_SECONDS', 30))
+DEFAULT_MAX_DOCUMENTS = int(os.environ.get('EXTRACTION_WORKER_MAX_DOCUMENTS', 100))
+DEFAULT_MEMORY_LIMIT_MB = int(os.environ.get('EXTRACTION_MEMORY_LIMIT_MB', 1024))
+# Spawned, not forked: the service and the Streamlit server are multi-threaded, and a forked
+# worker would inherit their locks and the parent ends of every other worker's pipe
+DEFAULT_START_METHOD = os.environ.get('EXTRACTION_POOL_START_METHOD') or 'spawn'
+
+# How often an idle worker checks that the process that started it is still alive
+PARENT_CHECK_SECONDS = 1.0
+
+
+class ExtractionError(ValueError):
+    """A document could not be extracted by the pool"""
+
+
+class ExtractionTimeout(ExtractionError):
+    """A document exceeded its extraction deadline and its worker was killed"""
+
+
+def _current_address_space():
+    """Virtual memory size of this process in bytes (0 if unknown)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmSize:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def _apply_memory_limit(memory_limit_bytes):
+    """Cap how much more address space the worker may map"""
+    if not memory_limit_bytes:
+        return
+    try:
+        import resource
+    except ImportError:
+        return  # Not available on this platform
+    limit = _current_address_space() + memory_limit_bytes
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _worker_main(conn, parse, memory_limit_bytes, parent_pid):
+    """Worker loop: parse documents until told to stop or the parent process exits"""
+    _apply_memory_limit(memory_limit_bytes)
+    while True:
+        try:
+            # A parent killed without stopping its workers leaves them reparented, not at EOF
+            while not conn.poll(PARENT_CHECK_SECONDS):
+                if os.getppid() != parent_pid:
+                    return
+            task = conn.recv()
+        except (EOFError, OSError):
+            break
+        if task is None:
+            break
+
+        try:
+            result = ('ok', parse(*task))
+        except MemoryError:
+            result = ('memory', 'Document exceeded the extraction memory limit')
+        except Exception as e:
+            result = ('error', str(e))
+
+        try:
+            conn.send(result)
+        except (EOFError, OSError):
+            break
+
+
+class _Worker:
+    def __init__(self, context, parse, memory_limit_bytes):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, parse, memory_limit_bytes, os.getpid()),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.documents = 0
+
+    def stop(self, kill=False):
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except (EOFError, OSError):
+                pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class ExtractionPool:
+    """Bounded pool of parser processes with per-document deadlines.
+
+    parse must be a module-level function; extract(*args) runs parse(*args) in
+    a worker and returns its result. Errors raised by parse come back as
+    ValueError with the same message; ExtractionError means the worker itself
+    failed (deadline, memory limit or crash).
+    """
+
+    def __init__(self, parse, workers=DEFAULT_WORKERS, timeout=DEFAULT_TIMEOUT,
+                 max_documents_per_worker=DEFAULT_MAX_DOCUMENTS,
+                 memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB, start_method=DEFAULT_START_METHOD):
+        self.parse = parse
+        self.workers = workers
+        self.timeout = timeout
+        self.max_documents_per_worker = max_documents_per_worker
+        self.memory_limit_bytes = memory_limit_mb * 1024 * 1024 if memory_limit_mb else 0
+        self._context = multiprocessing.get_context(start_method)
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.recycled = 0
+
+    def _start(self):
+        # Workers are started on first use, not at import time
+        with self._lock:
+            if not self._started:
+                for _ in range(self.workers):
+                    self._idle.put(self._spawn())
+                self._started = True
+
+    def _spawn(self):
+        return _Worker(self._context, self.parse, self.memory_limit_bytes)
+
+    def _replace(self, worker, kill):
+        worker.stop(kill=kill)
+        self._idle.put(self._spawn())
+
+    def extract(self, *args):
+        """Run parse(*args) in a worker within the deadline"""
+        if not self._started:
+            self._start()
+
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise ExtractionError("All extraction workers are busy. Please try again later.")
+
+        deadline = time.monotonic() + self.timeout
+        try:
+            worker.conn.send(args)
+            if not worker.conn.poll(max(deadline - time.monotonic(), 0)):
+                with self._lock:
+                    self.timeouts += 1
+                self._replace(worker, kill=True)
+                raise ExtractionTimeout(f"Document extraction exceeded the {self.timeout:g}s limit and was stopped")
+            status, payload = worker.conn.recv()
+        except (EOFError, OSError):
+            # The worker died (e.g. killed by the OS for memory)
+            with self._lock:
+                self.failed += 1
+            self._replace(worker, kill=True)
+            raise ExtractionError("Document extraction worker crashed")
+
+        worker.documents += 1
+        if status == 'memory' or worker.documents >= self.max_documents_per_worker:
+            with self._lock:
+                self.recycled += 1
+            self._replace(worker, kill=False)
+        else:
+            self._idle.put(worker)
+
+        with self._lock:
+            if status == 'ok':
+                self.completed += 1
+            else:
+                self.failed += 1
+        if status == 'memory':
+            raise ExtractionError(payload)
+        if status == 'error':
+            raise ValueError(payload)
+        return payload
+
+    def shutdown(self):
+        """Stop every idle worker"""
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().stop()
+                except queue.Empty:
+                    break
+            self._started = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'idleWorkers': self._idle.qsize() if self._started else self.workers,
+                'completed': self.completed,
+                'failed': self.failed,
+                'timeouts': self.timeouts,
+                'recycled': self.recycled,
+                'timeoutSeconds': self.timeout
+            }
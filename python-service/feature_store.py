@@ -0,0 +1,384 @@
+"""Append-only store of the features behind past analyses, for re-scoring.
+
+Changing a weight or threshold of calculate_similarity used to mean
+re-uploading and re-extracting every resume to re-score past analyses. With
+FEATURE_STORE_PATH set, every standard-mode analysis appends what its score
+was computed from: once per distinct (preprocessed) resume or job
+description its token IDs, technical terms, skill hits, fuzzily matched
+skill terms, years of experience and TF-IDF n-gram counts, and per analysis
+the pair of documents and the score given. rescore_applications.py scores
+every stored pair again from these features alone.
+
+Layout (one directory):
+    manifest.json    format version
+    documents.bin    one DOCUMENT_DTYPE record per document
+    pairs.bin        one PAIR_DTYPE record per analysis
+    <column>.bin     one variable-length feature of every document, back to
+                     back; a document's record holds its start and count
+
+Files are only ever appended to, by one writer at a time across processes
+(an flock). A document's values are written before its record and both
+documents before their pair, so readers memory-map the complete records of
+each file read-only and never see a half-written entry.
+
+Strings are stored as their 64-bit token_id (document_features.py): token,
+term and n-gram hashes are compared as they are, and skill terms are mapped
+back through the matcher's current skill dictionary when read.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from scipy import sparse
+
+from document_features import DocumentFeatures, token_id, token_ids, ngram_hashes
+from scoring_engine import ScoringEngine
+from text_normalizer import experience_years
+
+DEFAULT_STORE_PATH = os.environ.get('FEATURE_STORE_PATH')
+DEFAULT_CACHED_DOCUMENTS = int(os.environ.get('FEATURE_STORE_CACHED_DOCUMENTS', 2000))
+FORMAT_VERSION = 1
+
+# Variable-length features, one file each
+COLUMNS = {
+    'tokens': np.dtype('<u8'),          # token IDs, in document order
+    'tech_terms': np.dtype('<u8'),      # technical terms
+    'skill_hits': np.dtype('<u8'),      # skill variations found
+    'fuzzy_terms': np.dtype('<u8'),     # skill variations fuzzily matched by the words
+    'ngrams': np.dtype('<u8'),          # TF-IDF n-grams, in the order the analyzer yields them
+    'ngram_counts': np.dtype('<u4')     # occurrences of each of ngrams
+}
+
+DOCUMENT_DTYPE = np.dtype(
+    [('digest', 'V32'),                 # SHA-256 of the preprocessed text
+     ('length', '<i4'),                 # number of words
+     ('first_token_chars', '<i4'),      # length of the first word (see token_bigrams), -1 without words
+     ('years', '<i4')]                  # years of experience stated
+    + [(f'{name}_start', '<i8') for name in COLUMNS]
+    + [(f'{name}_count', '<i4') for name in COLUMNS])
+
+PAIR_DTYPE = np.dtype([
+    ('resume', '<i8'),                  # document rows
+    ('job', '<i8'),
+    ('score', '<f8'),                   # score given when the pair was analyzed
+    ('recorded_at', '<f8')              # UNIX time of the analysis
+])
+
+
+def text_digest(text):
+    return hashlib.sha256(text.encode('utf-8')).digest()
+
+
+def hashes_of(terms):
+    """uint64 array of the token_id of each term"""
+    return np.fromiter(map(token_id, terms), dtype=np.uint64, count=len(terms))
+
+
+class FeatureStore:
+    """Features of the documents and pairs analyzed by an ImprovedResumeMatcher.
+
+    Without a path nothing is stored. Read-only stores (readonly=True) only
+    memory-map what other processes appended; call refresh to see more.
+    """
+
+    def __init__(self, matcher, path=DEFAULT_STORE_PATH, readonly=False):
+        self.matcher = matcher
+        self.path = path
+        self.readonly = readonly
+        self._lock = threading.Lock()
+        self._rows = {}                 # digest -> row of the documents known to this process
+        self._known = 0                 # documents.bin records read into _rows
+        self._maps = {}
+        self.recorded = 0
+
+        if path:
+            manifest_path = os.path.join(path, 'manifest.json')
+            if not readonly and not os.path.exists(manifest_path):
+                os.makedirs(path, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=path)
+                with os.fdopen(fd, 'w') as f:
+                    json.dump({'format': FORMAT_VERSION}, f)
+                os.replace(tmp_path, manifest_path)
+            with open(manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('format') != FORMAT_VERSION:
+                raise ValueError(f"Unsupported feature store format: {manifest.get('format')}")
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def _file(self, name):
+        return os.path.join(self.path, f"{name}.bin")
+
+    @contextmanager
+    def _locked(self):
+        """This process's lock, then the store's lock across processes"""
+        with self._lock, open(os.path.join(self.path, 'store.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _append(self, name, records):
+        """Append records to a file and return the index of the first (store lock held)"""
+        with open(self._file(name), 'ab') as f:
+            size = os.fstat(f.fileno()).st_size
+            # Drop what an interrupted append left behind
+            torn = size % records.dtype.itemsize
+            if torn:
+                f.truncate(size - torn)
+            f.write(records.tobytes())
+        return (size - torn) // records.dtype.itemsize
+
+    def _sync(self):
+        """Learn the documents appended since the last sync (this process's lock held)"""
+        try:
+            count = os.path.getsize(self._file('documents')) // DOCUMENT_DTYPE.itemsize
+        except OSError:
+            return
+        if count <= self._known:
+            return
+        with open(self._file('documents'), 'rb') as f:
+            f.seek(self._known * DOCUMENT_DTYPE.itemsize)
+            records = np.frombuffer(f.read((count - self._known) * DOCUMENT_DTYPE.itemsize), dtype=DOCUMENT_DTYPE)
+        for row, digest in enumerate(records['digest'].tolist(), self._known):
+            self._rows[digest] = row
+        self._known = count
+
+    def document_values(self, features):
+        """What is stored of a standard matcher's DocumentFeatures: (record fields, column values)"""
+        matcher = self.matcher
+        term_counts = matcher.tfidf_term_counts(features.text)
+        values = {
+            'tokens': token_ids(features.tokens),
+            'tech_terms': hashes_of(features.tech_terms),
+            'skill_hits': hashes_of(features.skill_hits),
+            'fuzzy_terms': hashes_of(matcher.fuzzy_terms(features)),
+            'ngrams': hashes_of(term_counts),
+            'ngram_counts': np.fromiter(term_counts.values(), dtype=np.uint32, count=len(term_counts))
+        }
+        fields = {
+            'length': features.length,
+            'first_token_chars': len(features.tokens[0]) if features.tokens else -1,
+            'years': experience_years(features.lower)
+        }
+        return fields, values
+
+    def _add_document(self, digest, fields, values):
+        """Append a document and return its row (store lock held)"""
+        record = np.zeros(1, dtype=DOCUMENT_DTYPE)
+        record['digest'] = np.frombuffer(digest, dtype='V32')
+        for field, value in fields.items():
+            record[field] = value
+        for name, column_values in values.items():
+            record[f'{name}_start'] = self._append(name, column_values.astype(COLUMNS[name], copy=False))
+            record[f'{name}_count'] = len(column_values)
+        row = self._append('documents', record)
+        # Every earlier row was synced before the store lock was taken
+        self._rows[digest] = row
+        self._known = row + 1
+        return row
+
+    def record(self, cv_features, job_description, score):
+        """Store a resume's DocumentFeatures, scored score against a preprocessed job description.
+
+        Returns the pair's row, or None when the store is disabled.
+        """
+        if not self.enabled or self.readonly:
+            return None
+
+        resume_digest, job_digest = text_digest(cv_features.text), text_digest(job_description)
+        with self._lock:
+            self._sync()
+            missing = {resume_digest: cv_features, job_digest: job_description}
+            missing = {digest: document for digest, document in missing.items() if digest not in self._rows}
+
+        # Analyzed outside the lock; usually only the resume is new
+        values = {}
+        for digest, document in missing.items():
+            features = document if isinstance(document, DocumentFeatures) else self.matcher.document_features(document)
+            values[digest] = self.document_values(features)
+
+        with self._locked():
+            self._sync()
+            for digest, (fields, column_values) in values.items():
+                if digest not in self._rows:
+                    self._add_document(digest, fields, column_values)
+            pair = np.array([(self._rows[resume_digest], self._rows[job_digest], score, time.time())], dtype=PAIR_DTYPE)
+            row = self._append('pairs', pair)
+            self.recorded += 1
+        return row
+
+    def _map(self, name, dtype, needed=None):
+        """Read-only memory map of a file's complete records, remapped when it has grown (or is shorter than needed)"""
+        mapped = self._maps.get(name)
+        if mapped is not None and (needed is None or len(mapped) >= needed):
+            return mapped
+        try:
+            count = os.path.getsize(self._file(name)) // dtype.itemsize
+        except OSError:
+            count = 0
+        mapped = np.memmap(self._file(name), dtype=dtype, mode='r', shape=(count,)) if count else np.zeros(0, dtype)
+        self._maps[name] = mapped
+        return mapped
+
+    def refresh(self):
+        """See the documents and pairs appended since they were mapped"""
+        self._maps.clear()
+
+    @property
+    def documents(self):
+        return self._map('documents', DOCUMENT_DTYPE)
+
+    @property
+    def pairs(self):
+        return self._map('pairs', PAIR_DTYPE)
+
+    def values(self, name, record):
+        """A document's values of one column"""
+        start, count = int(record[f'{name}_start']), int(record[f'{name}_count'])
+        return np.asarray(self._map(name, COLUMNS[name], start + count)[start:start + count])
+
+    def __len__(self):
+        return len(self.pairs) if self.enabled else 0
+
+    def stats(self):
+        if not self.enabled:
+            return {'path': None, 'documents': 0, 'pairs': 0, 'bytes': 0, 'recorded': 0}
+        self.refresh()
+        names = ['documents', 'pairs', *COLUMNS]
+        return {
+            'path': self.path,
+            'documents': len(self.documents),
+            'pairs': len(self.pairs),
+            'bytes': sum(os.path.getsize(self._file(name)) for name in names if os.path.exists(self._file(name))),
+            'recorded': self.recorded
+        }
+
+
+class StoredDocument:
+    """A stored document with what ScoringEngine reads of resumes (DocumentFeatures) and jobs (JobProfile)"""
+
+    def __init__(self, length, token_set, bigrams, tech_terms, skill_hits, fuzzy_terms, years, term_weights,
+                 skills=None, tfidf_vector=None):
+        self.length = length
+        self.token_set = token_set
+        self.words = token_set
+        self.bigrams = bigrams              # None if they could not be built
+        self.tech_terms = tech_terms
+        self.skill_hits = skill_hits
+        self.fuzzy_terms = fuzzy_terms
+        self.years = years
+        self.term_weights = term_weights
+        self.squared_norm = sum(weight ** 2 for weight in term_weights.values())
+        self.skills = skills                # required skills, when scored as a job
+        self.tfidf_vector = tfidf_vector    # row from the corpus TF-IDF model, if one is loaded
+
+
+class StoredScoringEngine(ScoringEngine):
+    """ScoringEngine scoring stored documents (see rescore_applications.py).
+
+    Scores equal calculate_similarity's with the matcher's current weights,
+    except for the cells ScoringEngine would score pair by pair from the
+    text (marked approximate): a score within float error of a rounding or
+    scaling threshold, or a pair whose joint vocabulary exceeds the
+    vectorizer's max_features. With a corpus TF-IDF model, it must have been
+    fitted with the matcher's analyzer (fit_tfidf_model.py --preset api).
+    """
+
+    def __init__(self, matcher, store, max_cached=DEFAULT_CACHED_DOCUMENTS):
+        super().__init__(matcher)
+        self.store = store
+        self.max_cached = max_cached
+        self._documents = {}
+        self._variations = {token_id(var): var for variations in matcher.skill_synonyms.values() for var in variations}
+        self._model_columns = None
+
+    def document(self, row):
+        """The StoredDocument of a document row, cached"""
+        document = self._documents.get(row)
+        if document is None:
+            if len(self._documents) >= self.max_cached:
+                self._documents.clear()
+            document = self._documents[row] = self._load(row)
+        return document
+
+    def _load(self, row):
+        store = self.store
+        record = store.documents[row]
+        tokens = store.values('tokens', record)
+
+        # As token_bigrams: bounded by the length of the first word, failed past the last word
+        first_token_chars = int(record['first_token_chars'])
+        if first_token_chars < 0 or first_token_chars > len(tokens):
+            bigrams = None
+        else:
+            bigrams = ngram_hashes(tokens[:first_token_chars], 2)
+
+        skill_hits = set(self._variations[h] for h in store.values('skill_hits', record).tolist() if h in self._variations)
+        ngrams = store.values('ngrams', record)
+        counts = store.values('ngram_counts', record)
+        term_weights = {ngram: 1 + np.log(count) for ngram, count in zip(ngrams.tolist(), counts.tolist())}
+
+        return StoredDocument(
+            length=int(record['length']),
+            token_set=set(tokens.tolist()),
+            bigrams=bigrams,
+            tech_terms=set(store.values('tech_terms', record).tolist()),
+            skill_hits=skill_hits,
+            fuzzy_terms=set(self._variations[h] for h in store.values('fuzzy_terms', record).tolist() if h in self._variations),
+            years=int(record['years']),
+            term_weights=term_weights,
+            skills=self.matcher.required_skills(None, skill_hits),
+            tfidf_vector=self._model_row(ngrams, counts) if self.matcher.tfidf_model is not None else None
+        )
+
+    def _model_row(self, ngrams, counts):
+        """The corpus model's row for stored n-gram counts"""
+        model = self.matcher.tfidf_model
+        if self._model_columns is None:
+            self._model_columns = {token_id(term): column for term, column in model.vocabulary.items()}
+        columns = np.fromiter((self._model_columns.get(ngram, -1) for ngram in ngrams.tolist()), dtype=np.int64,
+                              count=len(ngrams))
+        present = columns >= 0
+        order = np.argsort(columns[present])
+        return model.transform_counts(sparse.csr_matrix(
+            (counts[present][order].astype(np.int64), columns[present][order], [0, int(present.sum())]),
+            shape=(1, len(model.vocabulary))))
+
+    def term_weights(self, cvs):
+        return [cv.term_weights for cv in cvs]
+
+    def tfidf_vectors(self, cvs):
+        return sparse.vstack([cv.tfidf_vector for cv in cvs], format='csr')
+
+    def score_pairs(self, resume_rows, job_rows):
+        """Scores of stored (resume row, job row) pairs, and which of them are approximate.
+
+        Every resume is scored against every job in one block, so pairs
+        sharing their documents are best scored together.
+        """
+        resumes, resume_index = np.unique(np.asarray(resume_rows), return_inverse=True)
+        jobs, job_index = np.unique(np.asarray(job_rows), return_inverse=True)
+        cvs = [self.document(row) for row in resumes.tolist()]
+        job_documents = [self.document(row) for row in jobs.tolist()]
+        scores = np.zeros((len(cvs), len(job_documents)))
+        approximate = np.zeros(scores.shape, dtype=bool)
+
+        # Empty documents score 0
+        rows = [i for i, cv in enumerate(cvs) if cv.length]
+        columns = [j for j, job in enumerate(job_documents) if job.length]
+        if rows and columns:
+            block, ambiguous = self._score_block([cvs[i] for i in rows], [job_documents[j] for j in columns])
+            scores[np.ix_(rows, columns)] = block
+            approximate[np.ix_(rows, columns)] = ambiguous
+        return scores[resume_index, job_index], approximate[resume_index, job_index]
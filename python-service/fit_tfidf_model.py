@@ -0,0 +1,106 @@
+"""Offline fit of the corpus TF-IDF model used by the matchers.
+
+Fit a new model from historical resumes and job postings:
+    python fit_tfidf_model.py --corpus data/resumes data/jobs --output models/tfidf
+
+Fold newly arrived documents into the latest model (IDF only, same vocabulary):
+    python fit_tfidf_model.py --corpus data/new --output models/tfidf --update models/tfidf
+
+Point the service at the output with TFIDF_MODEL_PATH (resume_matcher_api.py)
+or MERN_TFIDF_MODEL_PATH (mern_engine.py).
+"""
+
+import argparse
+import os
+import sys
+
+from tfidf_model import TfidfModel, new_version
+
+CORPUS_EXTENSIONS = ('.pdf', '.docx', '.txt')
+
+# Analyzer settings matching each matcher's vectorizer and preprocessing
+PRESETS = {
+    'api': {
+        'ngram_range': (1, 3),
+        'token_pattern': r'\b\w+\b',
+        'max_df': 1.0
+    },
+    'mern': {
+        'ngram_range': (1, 4),
+        'token_pattern': r'\b\w+(?:\.\w+)*\b',
+        'max_df': 0.95
+    }
+}
+
+
+def iter_corpus_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if name.lower().endswith(CORPUS_EXTENSIONS):
+                        yield os.path.join(root, name)
+        elif path.lower().endswith(CORPUS_EXTENSIONS):
+            yield path
+
+
+def load_corpus(paths, preset):
+    """Extract and preprocess every document the way the matcher will see it"""
+    from resume_matcher_api import ImprovedResumeMatcher
+    extractor = ImprovedResumeMatcher()
+
+    if preset == 'mern':
+        from mern_engine import EnhancedMERNResumeMatcher
+        preprocess = EnhancedMERNResumeMatcher().advanced_text_preprocessing
+    else:
+        preprocess = extractor.preprocess_text
+
+    documents = []
+    for file_path in iter_corpus_files(paths):
+        try:
+            text = preprocess(extractor.extract_text_from_path(file_path))
+        except ValueError as e:
+            print(f"Skipping {file_path}: {e}", file=sys.stderr)
+            continue
+        if text:
+            documents.append(text)
+    return documents
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', nargs='+', required=True, help='Files or directories of PDF, DOCX and TXT documents')
+    parser.add_argument('--output', required=True, help='Directory receiving versioned model artifacts')
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='api', help='Matcher whose analyzer to use')
+    parser.add_argument('--update', metavar='MODEL_PATH', help='Update the IDF of an existing model instead of refitting')
+    parser.add_argument('--version', help='Version name (default: UTC timestamp)')
+    parser.add_argument('--max-features', type=int, default=100000)
+    parser.add_argument('--min-df', type=int, default=2)
+    args = parser.parse_args(argv)
+
+    documents = load_corpus(args.corpus, args.preset)
+    if not documents:
+        parser.error('No usable documents found in the corpus')
+
+    if args.update:
+        model = TfidfModel.load(args.update, mmap=False).partial_fit(documents)
+        model.version = args.version or new_version()
+    else:
+        preset = PRESETS[args.preset]
+        model = TfidfModel.fit(
+            documents,
+            ngram_range=preset['ngram_range'],
+            token_pattern=preset['token_pattern'],
+            max_df=preset['max_df'],
+            max_features=args.max_features,
+            min_df=args.min_df if len(documents) >= args.min_df else 1,
+            version=args.version
+        )
+
+    model_dir = model.save(args.output)
+    print(f"Saved TF-IDF model {model.version} ({len(model.vocabulary)} terms, "
+          f"{model.n_documents} documents) to {model_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Indexed typo-tolerant lookup of skill terms.
+
+fuzzy_match_skills gives partial credit when a CV word is close to a missing
+skill term (difflib ratio above a threshold). Comparing every CV word with
+every term is the slowest part of a request, so FuzzySkillIndex keeps a
+character-bigram index of the vocabulary, bucketed by length. Each unique CV
+token is probed once; only candidates that can still reach the threshold are
+checked with SequenceMatcher, so results are exactly those of the full loop.
+
+Why the filters are exact: SequenceMatcher's matching blocks form a common
+subsequence of M characters. With d unmatched characters across both strings
+there are at most d + 1 blocks, which share at least M - d - 1 bigram
+occurrences. ratio = 2M / (la + lb) > r bounds both the length ratio and
+that bigram count from below.
+"""
+
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+# Slack for float comparisons in the (conservative) filters
+EPSILON = 1e-9
+
+
+def bigrams(text):
+    return [text[i:i + 2] for i in range(len(text) - 1)]
+
+
+class FuzzySkillIndex:
+    """Character-bigram index over a vocabulary for SequenceMatcher ratio > threshold"""
+
+    def __init__(self, terms, threshold=0.8, cache_size=65536):
+        self.threshold = threshold
+        self.terms = sorted(set(term.lower() for term in terms))
+        self._lengths = [len(term) for term in self.terms]
+        self._bigram_counts = [Counter(bigrams(term)) for term in self.terms]
+        self._min_length = min(self._lengths) if self.terms else 0
+
+        self._postings = defaultdict(set)
+        self._by_length = defaultdict(list)
+        for term_id, term in enumerate(self.terms):
+            for bigram in self._bigram_counts[term_id]:
+                self._postings[bigram].add(term_id)
+            self._by_length[len(term)].append(term_id)
+
+        # Tokens repeat across CVs, so probe results are memoised
+        self.probe = lru_cache(maxsize=cache_size)(self._probe)
+
+    def _length_range(self, length):
+        """Term lengths that can reach the threshold against a token of this length"""
+        # 2 * min(la, lb) / (la + lb) > r
+        r = self.threshold
+        low = r * length / (2 - r) - EPSILON
+        high = (2 - r) * length / r + EPSILON
+        return low, high
+
+    def _min_shared_bigrams(self, total_length):
+        """Shared bigram occurrences must exceed this for ratio > threshold"""
+        r = self.threshold
+        return (0.5 - 1.5 * (1 - r)) * total_length - 1 - EPSILON
+
+    def _probe(self, token):
+        """Terms whose SequenceMatcher ratio with token exceeds the threshold"""
+        length = len(token)
+        low, high = self._length_range(length)
+
+        if self._min_shared_bigrams(length + self._min_length) >= 0:
+            # At least one shared bigram is required, so the postings list every candidate
+            token_bigrams = Counter(bigrams(token))
+            candidates = set()
+            for bigram in token_bigrams:
+                candidates.update(self._postings.get(bigram, ()))
+        else:
+            token_bigrams = None
+            candidates = [term_id for term_length, term_ids in self._by_length.items()
+                          if low <= term_length <= high for term_id in term_ids]
+
+        matched = []
+        for term_id in candidates:
+            term_length = self._lengths[term_id]
+            if not low <= term_length <= high:
+                continue
+            if token_bigrams is not None:
+                shared = sum((token_bigrams & self._bigram_counts[term_id]).values())
+                if shared <= self._min_shared_bigrams(length + term_length):
+                    continue
+            term = self.terms[term_id]
+            if SequenceMatcher(None, term, token).ratio() > self.threshold:
+                matched.append(term)
+        return frozenset(matched)
+
+    def match_tokens(self, tokens):
+        """Every vocabulary term fuzzily matched by at least one of the tokens"""
+        matched = set()
+        for token in set(tokens):
+            matched.update(self.probe(token))
+        return matched
@@ -0,0 +1,64 @@
+"""Production serving configuration.
+
+    gunicorn -c gunicorn.conf.py resume_matcher_api:app
+
+The application is imported and both matchers (one per scoring mode) warmed
+up once in the master process, then the heap is frozen and the workers are
+forked, so the skill indexes, vectorizers and any loaded TF-IDF models stay
+shared copy-on-write between workers instead of being rebuilt in each.
+"""
+
+import gc
+import multiprocessing
+import os
+
+from admission import DEFAULT_MAX_IN_FLIGHT, DEFAULT_MAX_QUEUED
+
+bind = os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', 5001)}")
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+
+# One thread per admitted or queued analysis, so admission control (not the
+# socket backlog) decides what is rejected
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', DEFAULT_MAX_IN_FLIGHT + DEFAULT_MAX_QUEUED + 2))
+
+preload_app = True
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+
+def when_ready(server):
+    """Runs in the master after the app is preloaded and before workers are forked"""
+    from resume_matcher_api import matcher, mern_matcher, resume_index
+    matcher.warm_up()
+    mern_matcher.warm_up()
+
+    # Replay the resume index journal once here; workers only replay what follows
+    resume_index.sync()
+    resume_index.compact()
+
+    # Keep the warmed objects out of the collector so that its scans do not
+    # dirty (and un-share) their pages in every worker
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"Matcher warmed up; {gc.get_freeze_count()} objects frozen")
+
+
+def post_worker_init(worker):
+    """Start draining the analysis job queue in each worker (threads do not survive the fork)"""
+    from resume_matcher_api import analysis_job_workers
+    analysis_job_workers.start()
+
+
+def worker_exit(server, worker):
+    """Let jobs in progress finish; unfinished ones are retried by another worker after their lease"""
+    from resume_matcher_api import analysis_job_workers
+    analysis_job_workers.stop(timeout=graceful_timeout)
+
+
+def child_exit(server, worker):
+    """Drop the exited worker's live gauges from the aggregated metrics"""
+    from metrics import mark_process_dead
+    mark_process_dead(worker.pid)
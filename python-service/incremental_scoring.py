@@ -0,0 +1,342 @@
+"""Incremental MERN scoring of one resume while its job description is edited.
+
+calculate_advanced_similarity analyzes both documents from scratch and fits
+a TF-IDF vectorizer on the pair, which is too slow to repeat on every edit
+of a long posting. An IncrementalScorer keeps the resume's DocumentFeatures
+fixed and holds the job description as running state: the counts of its
+words, word bigram and trigram hashes and TF-IDF n-grams (with how many of
+each the resume shares), its skill term hits, and the sums its TF-IDF
+cosine with the resume is computed from.
+
+An edit is located as the span between the longest common prefix and
+suffix of the old and new text (and of the old and new token lists). Only
+the n-grams overlapping that span are removed and added again, and only a
+window around it is scanned for skill terms; hits whose characters and word
+boundaries lie outside the span are kept. Normalization, tokenization and
+the experience and education checks are single C-level scans of the whole
+text and are simply repeated.
+
+Scores equal calculate_advanced_similarity's. Only the TF-IDF cosine is
+summed in a different order than a fit (see TfidfTerms.similarity), which
+for the MERN vectorizer makes no difference: its max_df prunes every term
+two documents share, so the cosine of a pair fit is 0.
+"""
+
+import math
+import numbers
+import re
+from collections import Counter
+from operator import itemgetter
+
+import numpy as np
+
+from document_features import DocumentFeatures, token_ids, ngram_sequence
+from text_normalizer import normalize, experience_years
+
+# Order of SkillAutomaton.find_all: by end offset, longer terms first
+_hit_order = itemgetter(1, 0)
+
+
+def common_affixes(old, new):
+    """Lengths of the longest common prefix and suffix of two strings or lists, not overlapping"""
+    # Binary searches comparing slices in C; each step only compares the part not yet known to match
+    low, high = 0, min(len(old), len(new))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[low:middle] == new[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    prefix = low
+
+    low, high = 0, min(len(old), len(new)) - prefix
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[len(old) - middle:len(old) - low] == new[len(new) - middle:len(new) - low]:
+            low = middle
+        else:
+            high = middle - 1
+    return prefix, low
+
+
+def edited_starts(length, prefix, suffix, n):
+    """Starts of the n-grams of a sequence that overlap its edited span, or straddle it if it is empty"""
+    return range(max(prefix - n + 1, 0), min(length - suffix, length - n + 1))
+
+
+class NgramCounts:
+    """Multiset of the job description's n-grams, and how many distinct ones the resume has too"""
+
+    def __init__(self, resume_ngrams):
+        self.resume_ngrams = resume_ngrams
+        self.counts = {}
+        self.shared = 0
+
+    def __len__(self):
+        return len(self.counts)
+
+    def apply(self, removed, added):
+        counts, resume_ngrams = self.counts, self.resume_ngrams
+        deltas = Counter(added)
+        deltas.subtract(removed)
+        for ngram, delta in deltas.items():
+            if not delta:
+                continue
+            count = counts.get(ngram, 0)
+            if count + delta:
+                counts[ngram] = count + delta
+            else:
+                del counts[ngram]
+            if ngram in resume_ngrams:
+                self.shared += (count + delta > 0) - (count > 0)
+
+
+class TfidfTerms:
+    """The job description's TF-IDF n-gram counts and the running sums of its cosine with the resume.
+
+    Without a corpus model, resume_weights holds the resume's term
+    frequencies and the similarity is that of a TfidfVectorizer fitted on the
+    pair; with one, the resume's L2-normalised row of the model.
+    """
+
+    def __init__(self, resume_processed, vectorizer=None, model=None):
+        settings = model if model is not None else vectorizer
+        self.pattern = re.compile(settings.token_pattern)
+        self.lowercase = settings.lowercase
+        self.ngram_range = tuple(settings.ngram_range)
+        self.sublinear_tf = settings.sublinear_tf
+        self.vectorizer = vectorizer
+        self.model = model
+        self.resume_processed = resume_processed
+
+        resume_counts = Counter(self.ngrams(self.tokenize(resume_processed)))
+        if model is None:
+            self.resume_weights = {term: self.tf(count) for term, count in resume_counts.items()}
+        else:
+            row = model.transform([resume_processed])
+            by_column = dict(zip(row.indices.tolist(), row.data.tolist()))
+            self.resume_weights = {term: by_column[model.vocabulary[term]] for term in resume_counts
+                                   if model.vocabulary.get(term) in by_column}
+        self.resume_squared = sum(weight * weight for weight in self.resume_weights.values())
+
+        self.processed = ""
+        self.tokens = []
+        self.counts = {}
+        self._reset_sums()
+
+    def _reset_sums(self):
+        self.squared = 0.0                  # job description weights
+        self.shared = 0                     # terms in both documents
+        self.shared_squared = 0.0           # job description weights of shared terms
+        self.resume_shared_squared = 0.0    # resume weights of shared terms
+        self.dot = 0.0
+
+    def tokenize(self, processed):
+        return self.pattern.findall(processed.lower() if self.lowercase else processed)
+
+    def ngrams(self, tokens, prefix=0, suffix=0):
+        """Analyzer n-grams overlapping the edited span tokens[prefix:len(tokens) - suffix] (all by default)"""
+        min_n, max_n = self.ngram_range
+        ngrams = []
+        for n in range(min_n, max_n + 1):
+            ngrams.extend(" ".join(tokens[i:i + n]) for i in edited_starts(len(tokens), prefix, suffix, n))
+        return ngrams
+
+    def tf(self, count):
+        return 1 + math.log(count) if self.sublinear_tf else count
+
+    def weight(self, term, count):
+        if not count:
+            return 0.0
+        if self.model is None:
+            return self.tf(count)
+        return self.tf(count) * float(self.model.idf[self.model.vocabulary[term]])
+
+    def update(self, processed):
+        """Apply an edit of the job description's preprocessed text"""
+        tokens = self.tokenize(processed)
+        old = self.tokens
+        prefix, suffix = common_affixes(old, tokens)
+        deltas = Counter(self.ngrams(tokens, prefix, suffix))
+        deltas.subtract(self.ngrams(old, prefix, suffix))
+
+        counts, vocabulary = self.counts, self.model.vocabulary if self.model is not None else None
+        for term, delta in deltas.items():
+            if not delta or (vocabulary is not None and term not in vocabulary):
+                continue
+            count = counts.get(term, 0)
+            old_weight, new_weight = self.weight(term, count), self.weight(term, count + delta)
+            self.squared += new_weight * new_weight - old_weight * old_weight
+
+            resume_weight = self.resume_weights.get(term)
+            if resume_weight is not None:
+                self.shared_squared += new_weight * new_weight - old_weight * old_weight
+                self.dot += resume_weight * (new_weight - old_weight)
+                if not count:
+                    self.shared += 1
+                    self.resume_shared_squared += resume_weight * resume_weight
+                elif not count + delta:
+                    self.shared -= 1
+                    self.resume_shared_squared -= resume_weight * resume_weight
+
+            if count + delta:
+                counts[term] = count + delta
+            else:
+                del counts[term]
+
+        # Exact zeros rather than rounding residue once nothing is left to sum
+        if not counts:
+            self._reset_sums()
+        elif not self.shared:
+            self.shared_squared = self.resume_shared_squared = self.dot = 0.0
+        self.processed = processed
+        self.tokens = tokens
+
+    def similarity(self):
+        """TF-IDF cosine of the resume and the job description"""
+        if self.model is not None:
+            # Rows of a corpus model are L2-normalised over fixed IDF weights
+            if not self.squared or not self.resume_squared:
+                return 0.0
+            return self.dot / math.sqrt(self.resume_squared * self.squared)
+
+        # Fitting a pair gives each term a document frequency of 2 if both documents have it and 1
+        # otherwise, so the fit's min_df/max_df keep either kind of term or neither
+        vectorizer = self.vectorizer
+        min_count, max_count = (limit if isinstance(limit, numbers.Integral) else limit * 2
+                                for limit in (vectorizer.min_df, vectorizer.max_df))
+        keep_shared = min_count <= 2 <= max_count
+        keep_single = min_count <= 1 <= max_count
+        single = len(self.resume_weights) + len(self.counts) - 2 * self.shared
+        vocabulary_size = keep_shared * self.shared + keep_single * single
+        if not vocabulary_size:
+            raise ValueError("After pruning, no terms remain")
+        if not keep_shared or not self.shared:
+            return 0.0
+        if vectorizer.max_features and vocabulary_size > vectorizer.max_features:
+            # Which terms the fit keeps depends on their total counts: fit the pair
+            return self._fitted_similarity()
+
+        if vectorizer.use_idf:
+            # ln((n + smooth) / (df + smooth)) + 1 with n = 2 documents
+            smooth = int(vectorizer.smooth_idf)
+            shared_idf = 1.0
+            single_idf = math.log((2 + smooth) / (1 + smooth)) + 1
+        else:
+            shared_idf = single_idf = 1.0
+        resume_norm = (self.resume_shared_squared * shared_idf ** 2
+                       + keep_single * (self.resume_squared - self.resume_shared_squared) * single_idf ** 2)
+        job_norm = (self.shared_squared * shared_idf ** 2
+                    + keep_single * (self.squared - self.shared_squared) * single_idf ** 2)
+        if resume_norm <= 0 or job_norm <= 0:
+            return 0.0
+        return self.dot * shared_idf ** 2 / math.sqrt(resume_norm * job_norm)
+
+    def _fitted_similarity(self):
+        from sklearn.base import clone
+        from sklearn.metrics.pairwise import cosine_similarity
+        vectors = clone(self.vectorizer).fit_transform([self.resume_processed, self.processed])
+        return cosine_similarity(vectors[0], vectors[1])[0][0]
+
+
+class IncrementalScorer:
+    """A resume's calculate_advanced_similarity against a job description edited in place"""
+
+    def __init__(self, matcher, cv_text):
+        self.matcher = matcher
+        self.cv = matcher.features_of(cv_text)
+        self.max_term_length = max(len(term) for skill_data in matcher.skill_categories.values()
+                                   for term in skill_data['terms'])
+
+        self.text = None
+        self.lower = ""
+        self.tokens = []
+        self.hits = []
+        self.years = 0
+        self.result = None
+        self.words = NgramCounts(self.cv.token_set)
+        self.bigrams = NgramCounts(set(self.cv.bigrams.tolist()))
+        self.trigrams = NgramCounts(set(self.cv.trigrams.tolist()))
+        model = matcher.tfidf_model
+        self.tfidf = TfidfTerms(self.cv.processed, None if model is not None else matcher.vectorizer, model)
+
+    def update(self, job_description):
+        """(score, analysis details) of the resume against the edited job description"""
+        if job_description == self.text:
+            return self.result
+        lower = job_description.lower()
+        if lower != self.lower:
+            self._apply(lower)
+        self.text = job_description
+        self.result = self._score()
+        return self.result
+
+    def _apply(self, lower):
+        prefix, suffix = common_affixes(self.lower, lower)
+        self._update_skill_hits(lower, prefix, suffix)
+        self.lower = lower
+        self.years = experience_years(lower)
+
+        processed = normalize(lower)
+        tokens = processed.split()
+        old = self.tokens
+        prefix, suffix = common_affixes(old, tokens)
+        self.words.apply(old[prefix:len(old) - suffix], tokens[prefix:len(tokens) - suffix])
+        for n, counts in ((2, self.bigrams), (3, self.trigrams)):
+            counts.apply(self._ngram_hashes(old, edited_starts(len(old), prefix, suffix, n), n),
+                         self._ngram_hashes(tokens, edited_starts(len(tokens), prefix, suffix, n), n))
+        self.tokens = tokens
+        self.tfidf.update(processed)
+
+    @staticmethod
+    def _ngram_hashes(tokens, starts, n):
+        if not starts:
+            return []
+        return ngram_sequence(token_ids(tokens[starts.start:starts.stop + n - 1]), n).tolist()
+
+    def _update_skill_hits(self, lower, prefix, suffix):
+        """Re-scan the skill terms around the edited span lower[prefix:len(lower) - suffix]"""
+        old_end = len(self.lower) - suffix
+        edited_end = len(lower) - suffix
+        shift = len(lower) - len(self.lower)
+
+        # A hit is unchanged if its characters and the one on each side are outside the span;
+        # any other hit lies within reach of the span, with both of its neighbours in the window
+        hits = [hit for hit in self.hits if hit[1] < prefix]
+        window_start = max(prefix - self.max_term_length - 1, 0)
+        window_end = min(edited_end + self.max_term_length + 1, len(lower))
+        for start, end, term, skill_names in self.matcher.skill_automaton.find_all(lower[window_start:window_end]):
+            start += window_start
+            end += window_start
+            if end >= prefix and start <= edited_end:
+                hits.append((start, end, term, skill_names))
+        hits.extend((start + shift, end + shift, term, skill_names)
+                    for start, end, term, skill_names in self.hits if start > old_end)
+        hits.sort(key=_hit_order)
+        self.hits = hits
+
+    def semantic_score(self):
+        """calculate_semantic_similarity of the resume and the job description"""
+        try:
+            # A NumPy scalar like cosine_similarity's, so that the final score is rounded the same way
+            tfidf_similarity = np.float64(self.tfidf.similarity())
+            words = self.words
+            jaccard_sim = words.shared / (len(self.cv.token_set) + len(words) - words.shared)
+            bigram_sim = self.bigrams.shared / max(len(self.bigrams), 1)
+            trigram_sim = self.trigrams.shared / max(len(self.trigrams), 1)
+            return self.matcher.blend_semantic_scores(tfidf_similarity, jaccard_sim, bigram_sim, trigram_sim)
+        except Exception as e:
+            print(f"Semantic similarity calculation error: {e}")
+            return 0.0
+
+    def _score(self):
+        matcher = self.matcher
+        if not self.cv.text or not self.text:
+            return 0.0, {}
+        try:
+            jd_skills = matcher.skills_from_hits(self.lower, self.hits, with_context=False)
+            education_bonus = matcher.calculate_education_bonus(self.cv, DocumentFeatures(self.text, lower=self.lower))
+            return matcher.combine_components(self.cv, jd_skills, self.years, self.semantic_score(), education_bonus)
+        except Exception as e:
+            print(f"Error in similarity calculation: {e}")
+            return 25.0, {}
@@ -0,0 +1,120 @@
+"""Precomputed job-description profiles shared by every resume scored against a job.
+
+A posting is matched against hundreds of resumes over its lifetime, so all
+job-side features are computed once into a JobProfile. Profiles are cached by
+the SHA-256 of the (preprocessed) job description, or registered explicitly
+and then referenced by that ID.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_PROFILES = int(os.environ.get('JOB_PROFILE_CACHE_SIZE', 256))
+
+
+def job_profile_id(job_description):
+    """Content hash used as the profile ID"""
+    return hashlib.sha256(job_description.encode('utf-8')).hexdigest()
+
+
+class JobProfile:
+    """Every job-side feature used by ImprovedResumeMatcher's scoring and feedback"""
+
+    def __init__(self, text, words, bigrams, tech_terms, skills, length, term_weights, tfidf_vector=None):
+        self.id = job_profile_id(text)
+        self.text = text
+        self.words = words                  # unique lowercased words
+        self.bigrams = bigrams              # sorted word bigram hashes, None if they could not be built
+        self.tech_terms = tech_terms        # technical terms
+        self.skills = skills                # (category, variations, matched variations)
+        self.length = length                # number of words
+        self.term_weights = term_weights    # TF-IDF n-gram -> sublinear term frequency
+        self.squared_norm = sum(weight ** 2 for weight in term_weights.values())
+        self.tfidf_vector = tfidf_vector    # row from the corpus TF-IDF model, if one is loaded
+
+    def summary(self):
+        """JSON-friendly description of the profile"""
+        return {
+            'jobProfileId': self.id,
+            'words': self.length,
+            'uniqueWords': len(self.words),
+            'techTerms': sorted(self.tech_terms),
+            'requiredSkills': [skill_category for skill_category, _, _ in self.skills],
+            'tfidfTerms': len(self.term_weights)
+        }
+
+
+class JobProfileRegistry:
+    """Registered profiles plus an LRU cache of profiles built on demand.
+
+    Registered profiles stay until they are unregistered; profiles built
+    implicitly while scoring are evicted least recently used first.
+    """
+
+    def __init__(self, build_profile, max_profiles=DEFAULT_MAX_PROFILES):
+        self.build_profile = build_profile
+        self.max_profiles = max_profiles
+        self._registered = {}
+        self._cached = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, profile_id):
+        """Find a profile without counting the lookup (lock held)"""
+        profile = self._registered.get(profile_id)
+        if profile is None:
+            profile = self._cached.get(profile_id)
+            if profile is not None:
+                self._cached.move_to_end(profile_id)
+        return profile
+
+    def get(self, profile_id):
+        """Profile for an ID, or None"""
+        with self._lock:
+            return self._lookup(profile_id)
+
+    def get_or_build(self, job_description):
+        """Profile for a job description, building and caching it on first use"""
+        profile_id = job_profile_id(job_description)
+        with self._lock:
+            profile = self._lookup(profile_id)
+            if profile is not None:
+                self.hits += 1
+                return profile
+            self.misses += 1
+
+        profile = self.build_profile(job_description)
+
+        with self._lock:
+            self._cached[profile_id] = profile
+            while len(self._cached) > self.max_profiles:
+                self._cached.popitem(last=False)
+        return profile
+
+    def register(self, job_description):
+        """Build (or reuse) a profile and keep it until it is unregistered"""
+        profile = self.get_or_build(job_description)
+        with self._lock:
+            self._registered[profile.id] = profile
+            self._cached.pop(profile.id, None)
+        return profile
+
+    def unregister(self, profile_id):
+        """Forget a registered profile; returns whether it existed"""
+        with self._lock:
+            return self._registered.pop(profile_id, None) is not None
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRatio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'registered': len(self._registered),
+                'cached': len(self._cached),
+                'maxCached': self.max_profiles
+            }
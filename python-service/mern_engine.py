@@ -0,0 +1,683 @@
+"""MERN stack scoring engine: weighted, category-aware matching of resumes to job descriptions.
+
+EnhancedMERNResumeMatcher scores skills by category weight (critical and
+nice-to-have skills are reported separately), and combines them with
+semantic similarity, experience and education factors. It has no UI
+dependency: the Streamlit app (streamlit_resume_matcher.py) renders its
+results, and the Flask service scores with it when a request asks for
+scoringMode=mern.
+
+sklearn is imported on first use so that importing the engine is cheap.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from skill_automaton import SkillAutomaton
+from extraction_cache import ExtractionCache
+from text_extraction import extraction_namespace, parse_with_tables
+from tfidf_model import load_tfidf_model
+from document_features import DocumentFeatures, token_ids, ngram_hashes, shared_count
+from text_normalizer import normalize, experience_years
+
+# No NLTK data is downloaded: nothing here uses its corpora or tokenizers
+
+# Cached text is reused only by the same parsers, run with the same budgets
+EXTRACTION_NAMESPACE = extraction_namespace('mern')
+
+
+class EnhancedMERNResumeMatcher:
+    def __init__(self):
+        self._vectorizer = None
+        self._stemmer = None
+        
+        # Enhanced skill categories with weighted importance for MERN stack
+        self.skill_categories = {
+            # Core MERN Stack (High Priority)
+            'mongodb': {
+                'terms': ['mongodb', 'mongo', 'mongoose', 'atlas', 'nosql', 'document database', 'bson'],
+                'weight': 2.5,
+                'category': 'Database'
+            },
+            'express': {
+                'terms': ['express', 'expressjs', 'express.js', 'express server', 'middleware'],
+                'weight': 2.5,
+                'category': 'Backend Framework'
+            },
+            'react': {
+                'terms': ['react', 'reactjs', 'react.js', 'jsx', 'react hooks', 'react router', 'redux', 
+                         'context api', 'react native', 'next.js', 'nextjs', 'gatsby'],
+                'weight': 2.5,
+                'category': 'Frontend Framework'
+            },
+            'nodejs': {
+                'terms': ['nodejs', 'node.js', 'node', 'npm', 'yarn', 'event loop', 'async/await'],
+                'weight': 2.5,
+                'category': 'Runtime Environment'
+            },
+            
+            # Essential JavaScript/TypeScript (High Priority)
+            'javascript': {
+                'terms': ['javascript', 'js', 'ecmascript', 'es6', 'es2015', 'es2017', 'es2020', 
+                         'vanilla js', 'modern javascript', 'async', 'promises', 'closures'],
+                'weight': 2.0,
+                'category': 'Programming Language'
+            },
+            'typescript': {
+                'terms': ['typescript', 'ts', 'type annotations', 'interfaces', 'generics'],
+                'weight': 1.8,
+                'category': 'Programming Language'
+            },
+            
+            # Frontend Technologies (Medium-High Priority)
+            'html_css': {
+                'terms': ['html', 'html5', 'css', 'css3', 'sass', 'scss', 'less', 'responsive design',
+                         'flexbox', 'grid', 'bootstrap', 'tailwind', 'material-ui', 'styled-components'],
+                'weight': 1.5,
+                'category': 'Frontend Technologies'
+            },
+            
+            # State Management (Medium-High Priority)
+            'state_management': {
+                'terms': ['redux', 'redux toolkit', 'context api', 'zustand', 'recoil', 'mobx',
+                         'state management', 'global state'],
+                'weight': 1.8,
+                'category': 'State Management'
+            },
+            
+            # Development Tools (Medium Priority)
+            'development_tools': {
+                'terms': ['webpack', 'babel', 'vite', 'parcel', 'eslint', 'prettier', 'git', 'github',
+                         'gitlab', 'version control', 'npm', 'yarn', 'package manager'],
+                'weight': 1.3,
+                'category': 'Development Tools'
+            },
+            
+            # Testing (Medium Priority)
+            'testing': {
+                'terms': ['jest', 'enzyme', 'react testing library', 'cypress', 'selenium', 'mocha',
+                         'chai', 'unit testing', 'integration testing', 'e2e testing', 'tdd', 'bdd'],
+                'weight': 1.4,
+                'category': 'Testing'
+            },
+            
+            # Cloud & Deployment (Medium Priority)
+            'cloud_deployment': {
+                'terms': ['aws', 'azure', 'gcp', 'heroku', 'netlify', 'vercel', 'docker', 'kubernetes',
+                         'k8s', 'ci/cd', 'jenkins', 'github actions', 'gitlab ci'],
+                'weight': 1.3,
+                'category': 'Cloud & Deployment'
+            },
+            
+            # API & Communication (Medium Priority)
+            'api_communication': {
+                'terms': ['rest', 'restful', 'api', 'graphql', 'apollo', 'axios', 'fetch', 'websockets',
+                         'socket.io', 'jwt', 'authentication', 'authorization'],
+                'weight': 1.6,
+                'category': 'API & Communication'
+            },
+            
+            # Additional Databases (Lower Priority for MERN but relevant)
+            'other_databases': {
+                'terms': ['postgresql', 'mysql', 'redis', 'elasticsearch', 'firebase', 'firestore'],
+                'weight': 1.0,
+                'category': 'Additional Databases'
+            },
+            
+            # Soft Skills & Methodologies (Lower Priority but Important)
+            'methodologies': {
+                'terms': ['agile', 'scrum', 'kanban', 'sprint', 'jira', 'trello', 'collaboration',
+                         'team work', 'problem solving', 'debugging'],
+                'weight': 0.8,
+                'category': 'Methodologies'
+            }
+        }
+        
+        # Single automaton over every skill term, built once
+        self.skill_automaton = SkillAutomaton()
+        for skill_name, skill_data in self.skill_categories.items():
+            for term in skill_data['terms']:
+                self.skill_automaton.add(term, skill_name)
+        
+        self.extraction_cache = ExtractionCache()
+        
+        # Parser processes (see load_matcher); without them files are parsed in this process
+        self.extraction_pool = None
+        
+        # Corpus-fitted TF-IDF model (fit_tfidf_model.py --preset mern); without one each pair is fitted on its own
+        self.tfidf_model = load_tfidf_model(os.environ.get('MERN_TFIDF_MODEL_PATH'))
+        
+        self.warmed_up = False
+
+    @property
+    def vectorizer(self):
+        """TF-IDF vectorizer, created on first use"""
+        if self._vectorizer is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            
+            # Advanced TF-IDF configuration for better semantic understanding
+            self._vectorizer = TfidfVectorizer(
+                max_features=25000,
+                stop_words=None,
+                ngram_range=(1, 4),  # Extended n-grams for better phrase matching
+                min_df=1,
+                max_df=0.95,
+                sublinear_tf=True,
+                token_pattern=r'\b\w+(?:\.\w+)*\b',  # Better pattern for tech terms
+                lowercase=True,
+                use_idf=True
+            )
+        return self._vectorizer
+
+    @property
+    def stemmer(self):
+        """Porter stemmer, created on first use (importing nltk takes seconds)"""
+        if self._stemmer is None:
+            from nltk.stem import PorterStemmer
+            self._stemmer = PorterStemmer()
+        return self._stemmer
+
+    def warm_up(self):
+        """Import sklearn and run every scoring stage once, so that no request pays for first use"""
+        skills = ", ".join(skill_data['terms'][0] for skill_data in self.skill_categories.values())
+        sample_jd = f"We need a developer with {skills} and 3+ years of experience."
+        sample_cv = f"I am a developer with 5 years of experience in {skills}."
+        score, analysis_details = self.calculate_advanced_similarity(sample_cv, sample_jd)
+        self.generate_comprehensive_feedback(sample_cv, sample_jd, score, analysis_details)
+        self.warmed_up = True
+
+    def extract_text(self, file):
+        """Enhanced text extraction with better error handling"""
+        if hasattr(file, 'name'):
+            _, ext = os.path.splitext(file.name)
+        else:
+            raise ValueError("Invalid file object")
+            
+        ext = ext.lower().strip()
+        
+        # Repeat uploads of the same file are served from the extraction cache
+        if hasattr(file, 'getvalue'):
+            data = file.getvalue()
+        else:
+            data = file.read()
+            file.seek(0)
+        cache_key = self.extraction_cache.make_key(data, ext, EXTRACTION_NAMESPACE)
+        
+        if self.extraction_pool is not None:
+            return self.extraction_cache.get_or_extract(cache_key, lambda: self.extraction_pool.extract(data, ext))
+        return self.extraction_cache.get_or_extract(cache_key, lambda: self.parse_file(file, ext))
+
+    def parse_file(self, file, ext):
+        """Parse an uploaded PDF, DOCX or TXT file, including tables, within the extraction budgets"""
+        return parse_with_tables(file, ext)
+
+    def advanced_text_preprocessing(self, text):
+        """Advanced preprocessing specifically optimized for tech resumes"""
+        if not text:
+            return ""
+        
+        # Tech term normalization, cleanup and stop-word filtering in one scan
+        return normalize(text.lower())
+
+    def document_features(self, text):
+        """Analyze a raw document once: preprocessing, n-grams, skills and experience"""
+        text_lower = text.lower()
+        features = self.processed_features(normalize(text_lower) if text else "")
+        features.text = text
+        features.lower = text_lower
+        features.skill_hits = self.extract_skills_with_context(text)
+        features.years = experience_years(text_lower)
+        features.length = len(text.split())
+        return features
+
+    def processed_features(self, processed):
+        """Token-level features of already preprocessed text (or the features themselves)"""
+        if isinstance(processed, DocumentFeatures):
+            return processed
+        tokens = processed.split()
+        ids = token_ids(tokens)
+        return DocumentFeatures(
+            text=processed,
+            processed=processed,
+            tokens=tokens,
+            token_set=set(tokens),
+            bigrams=ngram_hashes(ids, 2),
+            trigrams=ngram_hashes(ids, 3),
+            length=len(tokens)
+        )
+
+    def features_of(self, document):
+        """DocumentFeatures for a raw text, or the features themselves if already built"""
+        if isinstance(document, DocumentFeatures):
+            return document
+        return self.document_features(document)
+
+    @staticmethod
+    def text_of(document):
+        return document.text if isinstance(document, DocumentFeatures) else document
+
+    def extract_skills_with_context(self, text):
+        """Extract skills with surrounding context for better matching"""
+        text_lower = text.lower()
+        return self.skills_from_hits(text_lower, self.skill_automaton.find_all(text_lower))
+
+    def skills_from_hits(self, text_lower, hits, with_context=True):
+        """Skills with context from the automaton's hits in a lowercased text (ordered by end offset).
+
+        Without context only the counts, weights and categories that the scores use are given.
+        """
+        skills_found = {}
+        
+        # Like re.finditer, occurrences of a term don't overlap
+        term_positions = {}
+        term_ends = {}
+        skills_hit = set()
+        for start, end, term, skill_names in hits:
+            if start < term_ends.get(term, 0):
+                continue
+            term_ends[term] = end
+            term_positions.setdefault(term, []).append(start)
+            skills_hit.update(skill_names)
+        
+        for skill_name, skill_data in self.skill_categories.items():
+            if skill_name not in skills_hit:
+                continue
+            
+            terms = skill_data['terms']
+            weight = skill_data['weight']
+            category = skill_data['category']
+            
+            if not with_context:
+                count = sum(len(term_positions.get(term, ())) for term in terms)
+                if count:
+                    skills_found[skill_name] = {'count': count, 'weight': weight, 'category': category}
+                continue
+            
+            skill_matches = []
+            for term in terms:
+                for start in term_positions.get(term, ()):
+                    end = start + len(term)
+                    # Get context around the match
+                    context_start = max(0, start - 50)
+                    context_end = min(len(text_lower), end + 50)
+                    context = text_lower[context_start:context_end]
+                    
+                    skill_matches.append({
+                        'term': term,
+                        'context': context,
+                        'position': start
+                    })
+            
+            if skill_matches:
+                skills_found[skill_name] = {
+                    'matches': skill_matches,
+                    'count': len(skill_matches),
+                    'weight': weight,
+                    'category': category
+                }
+        
+        return skills_found
+
+    def calculate_semantic_similarity(self, cv_text, jd_text):
+        """Advanced semantic similarity using multiple techniques (preprocessed texts or DocumentFeatures)"""
+        from sklearn.base import clone
+        from sklearn.metrics.pairwise import cosine_similarity
+        
+        try:
+            cv_features = self.processed_features(cv_text)
+            jd_features = self.processed_features(jd_text)
+            
+            # TF-IDF Cosine Similarity
+            if self.tfidf_model is not None:
+                vectors = self.tfidf_model.transform([cv_features.processed, jd_features.processed])
+            else:
+                # Fitted on a copy: one matcher is shared by every Streamlit session or Flask request thread
+                vectors = clone(self.vectorizer).fit_transform([cv_features.processed, jd_features.processed])
+            tfidf_similarity = cosine_similarity(vectors[0], vectors[1])[0][0]
+            
+            # Jaccard Similarity for exact matches
+            cv_words = cv_features.token_set
+            jd_words = jd_features.token_set
+            jaccard_sim = len(cv_words.intersection(jd_words)) / len(cv_words.union(jd_words))
+            
+            # N-gram overlap
+            cv_bigrams = cv_features.bigrams
+            jd_bigrams = jd_features.bigrams
+            cv_trigrams = cv_features.trigrams
+            jd_trigrams = jd_features.trigrams
+            
+            bigram_sim = shared_count(cv_bigrams, jd_bigrams) / max(len(jd_bigrams), 1)
+            trigram_sim = shared_count(cv_trigrams, jd_trigrams) / max(len(jd_trigrams), 1)
+            
+            return self.blend_semantic_scores(tfidf_similarity, jaccard_sim, bigram_sim, trigram_sim)
+            
+        except Exception as e:
+            print(f"Semantic similarity calculation error: {e}")
+            return 0.0
+
+    @staticmethod
+    def blend_semantic_scores(tfidf_similarity, jaccard_sim, bigram_sim, trigram_sim):
+        """Weighted combination of the semantic similarity measures"""
+        semantic_score = (
+            tfidf_similarity * 0.4 +
+            jaccard_sim * 0.3 +
+            bigram_sim * 0.2 +
+            trigram_sim * 0.1
+        )
+        
+        return min(semantic_score, 1.0)
+
+    def calculate_skill_match_score(self, cv_skills, jd_skills):
+        """Calculate weighted skill matching score"""
+        total_weight = 0
+        matched_weight = 0
+        
+        skill_breakdown = {
+            'matched_skills': [],
+            'missing_critical': [],
+            'missing_nice_to_have': []
+        }
+        
+        for skill_name, jd_skill_data in jd_skills.items():
+            weight = jd_skill_data['weight']
+            category = jd_skill_data['category']
+            total_weight += weight
+            
+            if skill_name in cv_skills:
+                # Calculate match strength based on frequency and context
+                cv_count = cv_skills[skill_name]['count']
+                jd_count = jd_skill_data['count']
+                
+                # Higher score for multiple mentions
+                frequency_bonus = min(cv_count / max(jd_count, 1), 2.0)
+                match_score = weight * frequency_bonus
+                matched_weight += match_score
+                
+                skill_breakdown['matched_skills'].append({
+                    'skill': skill_name,
+                    'category': category,
+                    'strength': frequency_bonus
+                })
+            else:
+                if weight >= 2.0:  # Critical skills
+                    skill_breakdown['missing_critical'].append({
+                        'skill': skill_name,
+                        'category': category,
+                        'weight': weight
+                    })
+                else:  # Nice to have skills
+                    skill_breakdown['missing_nice_to_have'].append({
+                        'skill': skill_name,
+                        'category': category,
+                        'weight': weight
+                    })
+        
+        skill_score = matched_weight / max(total_weight, 1)
+        return skill_score, skill_breakdown
+
+    def calculate_advanced_similarity(self, cv_text, job_description):
+        """Enhanced similarity calculation with multiple factors (texts or DocumentFeatures)"""
+        if not self.text_of(cv_text) or not self.text_of(job_description):
+            return 0.0, {}
+        
+        try:
+            # Preprocess texts, extract skills with context and experience, once per document
+            cv_features = self.features_of(cv_text)
+            jd_features = self.features_of(job_description)
+            
+            # Calculate the similarity components that need both documents
+            semantic_score = self.calculate_semantic_similarity(cv_features, jd_features)
+            education_bonus = self.calculate_education_bonus(cv_features, jd_features)
+            
+            return self.combine_components(cv_features, jd_features.skill_hits, jd_features.years,
+                                           semantic_score, education_bonus)
+            
+        except Exception as e:
+            print(f"Error in similarity calculation: {e}")
+            return 25.0, {}
+
+    def combine_components(self, cv_features, jd_skills, jd_years, semantic_score, education_bonus):
+        """Weighted final score and analysis details from the components of calculate_advanced_similarity"""
+        cv_skills = cv_features.skill_hits
+        
+        skill_score, skill_breakdown = self.calculate_skill_match_score(cv_skills, jd_skills)
+        
+        # Experience and years calculation
+        cv_years = cv_features.years
+        experience_match = min(cv_years / max(jd_years, 1), 1.5) if jd_years > 0 else 1.0
+        
+        # Content quality factors
+        cv_length = cv_features.length
+        quality_factor = min(cv_length / 200, 1.2)  # Bonus for comprehensive resumes
+        
+        # Weighted final score calculation
+        base_score = (
+            semantic_score * 0.25 +      # General semantic similarity
+            skill_score * 0.45 +         # Technical skills (most important)
+            experience_match * 0.15 +    # Experience level match
+            education_bonus * 0.10 +     # Education/certification bonus
+            quality_factor * 0.05        # Content quality
+        )
+        
+        # Apply scaling for realistic scores
+        if base_score >= 0.8:
+            final_score = 85 + (base_score - 0.8) * 65  # 85-98%
+        elif base_score >= 0.6:
+            final_score = 70 + (base_score - 0.6) * 75  # 70-85%
+        elif base_score >= 0.4:
+            final_score = 50 + (base_score - 0.4) * 100 # 50-70%
+        elif base_score >= 0.2:
+            final_score = 30 + (base_score - 0.2) * 100 # 30-50%
+        else:
+            final_score = 15 + base_score * 75          # 15-30%
+        
+        # Additional bonuses
+        if skill_score > 0.7:
+            final_score += 5  # Strong technical skills bonus
+        if len(skill_breakdown['missing_critical']) == 0:
+            final_score += 8  # No missing critical skills bonus
+        
+        final_score = min(final_score, 98)  # Cap at 98%
+        
+        analysis_details = {
+            'semantic_score': round(semantic_score * 100, 2),
+            'skill_score': round(skill_score * 100, 2),
+            'experience_match': round(experience_match * 100, 2),
+            'education_bonus': round(education_bonus * 100, 2),
+            'skill_breakdown': skill_breakdown,
+            'cv_skills_count': len(cv_skills),
+            'jd_skills_count': len(jd_skills),
+            'cv_years': cv_years,
+            'jd_years': jd_years
+        }
+        
+        return round(final_score, 1), analysis_details
+
+    def extract_experience_years(self, text):
+        """Extract years of experience from text"""
+        return experience_years(text.lower())
+
+    def calculate_education_bonus(self, cv_text, jd_text):
+        """Calculate bonus for education and certifications (texts or DocumentFeatures)"""
+        cv_lower = cv_text.lower if isinstance(cv_text, DocumentFeatures) else cv_text.lower()
+        jd_lower = jd_text.lower if isinstance(jd_text, DocumentFeatures) else jd_text.lower()
+        
+        education_terms = ['bachelor', 'master', 'phd', 'degree', 'computer science', 
+                          'software engineering', 'information technology']
+        cert_terms = ['certified', 'certification', 'aws certified', 'google certified',
+                     'microsoft certified', 'mongodb certified']
+        
+        bonus = 0.0
+        
+        # Education matching
+        for term in education_terms:
+            if term in jd_lower and term in cv_lower:
+                bonus += 0.1
+        
+        # Certification matching
+        for term in cert_terms:
+            if term in jd_lower and term in cv_lower:
+                bonus += 0.15
+        
+        return min(bonus, 0.5)  # Cap at 50% bonus
+
+    def generate_comprehensive_feedback(self, cv_text, job_description, score, analysis_details):
+        """Generate detailed, actionable feedback"""
+        try:
+            feedback_sections = []
+            
+            # Overall assessment
+            if score >= 85:
+                feedback_sections.append("🎉 **Excellent Match!** Your resume strongly aligns with this MERN stack position.")
+            elif score >= 70:
+                feedback_sections.append("🚀 **Strong Candidate!** Your profile shows great potential for this role.")
+            elif score >= 55:
+                feedback_sections.append("👍 **Good Foundation** with clear opportunities for improvement.")
+            elif score >= 40:
+                feedback_sections.append("📈 **Decent Match** but requires targeted enhancements.")
+            else:
+                feedback_sections.append("⚠️ **Significant Gap** - consider major resume optimization.")
+            
+            # Skill analysis
+            skill_breakdown = analysis_details.get('skill_breakdown', {})
+            
+            if skill_breakdown.get('matched_skills'):
+                matched = skill_breakdown['matched_skills'][:6]  # Top 6
+                matched_list = [f"**{s['skill'].title()}** ({s['category']})" for s in matched]
+                feedback_sections.append(f"✅ **Strong Technical Skills:** {', '.join(matched_list)}")
+            
+            # Critical missing skills
+            if skill_breakdown.get('missing_critical'):
+                missing_critical = skill_breakdown['missing_critical'][:4]
+                critical_list = [f"**{s['skill'].title()}**" for s in missing_critical]
+                feedback_sections.append(f"🚨 **Critical Missing Skills:** {', '.join(critical_list)}")
+                feedback_sections.append("💡 *Focus on these first - they're essential for MERN stack roles.*")
+            
+            # Nice to have skills
+            if skill_breakdown.get('missing_nice_to_have'):
+                nice_to_have = skill_breakdown['missing_nice_to_have'][:3]
+                nice_list = [f"**{s['skill'].title()}**" for s in nice_to_have]
+                feedback_sections.append(f"📋 **Additional Skills to Consider:** {', '.join(nice_list)}")
+            
+            # Experience feedback
+            cv_years = analysis_details.get('cv_years', 0)
+            jd_years = analysis_details.get('jd_years', 0)
+            if jd_years > 0:
+                if cv_years >= jd_years:
+                    feedback_sections.append(f"✅ **Experience Match:** {cv_years} years (meets {jd_years} year requirement)")
+                else:
+                    feedback_sections.append(f"⏰ **Experience Gap:** {cv_years} years (needs {jd_years} years)")
+            
+            # Detailed scores
+            feedback_sections.append("## 📊 **Detailed Analysis**")
+            feedback_sections.append(f"- **Technical Skills Match:** {analysis_details.get('skill_score', 0)}%")
+            feedback_sections.append(f"- **Content Relevance:** {analysis_details.get('semantic_score', 0)}%") 
+            feedback_sections.append(f"- **Experience Alignment:** {analysis_details.get('experience_match', 0)}%")
+            
+            # Actionable recommendations
+            feedback_sections.append("## 🎯 **Recommendations**")
+            
+            if score < 70:
+                recommendations = [
+                    "🔧 Add specific MERN stack project examples",
+                    "📝 Include more technical keywords from the job description",
+                    "💼 Highlight relevant work experience with quantified achievements",
+                    "🏆 Add any relevant certifications or courses"
+                ]
+                feedback_sections.append("\n".join(recommendations))
+            else:
+                recommendations = [
+                    "✨ Fine-tune keyword optimization",
+                    "📈 Add metrics and quantified achievements",
+                    "🔍 Ensure all relevant projects are highlighted"
+                ]
+                feedback_sections.append("\n".join(recommendations))
+            
+            return "\n\n".join(feedback_sections)
+            
+        except Exception as e:
+            return self.generate_fallback_feedback(score)
+
+    def generate_fallback_feedback(self, score):
+        """Fallback feedback when detailed analysis fails"""
+        if score >= 75:
+            return "🎉 **Excellent Match!** Your resume shows strong alignment with MERN stack requirements."
+        elif score >= 60:
+            return "👍 **Good Match** with some optimization opportunities for better alignment."
+        elif score >= 45:
+            return "📊 **Fair Match** - focus on highlighting MERN stack experience and skills."
+        else:
+            return "📈 **Needs Improvement** - consider adding more relevant MERN stack experience and keywords."
+
+    @staticmethod
+    def match_level(score):
+        """(match level, color) for a score"""
+        if score >= 80:
+            return "Excellent Match", "🟢"
+        elif score >= 65:
+            return "Very Good Match", "🟡"
+        elif score >= 50:
+            return "Good Match", "🟡"
+        elif score >= 35:
+            return "Fair Match", "🟠"
+        else:
+            return "Needs Improvement", "🔴"
+
+    def process_resume(self, cv_file, job_description):
+        """Main processing function with enhanced error handling"""
+        try:
+            # Extract and validate text
+            raw_cv_text = self.extract_text(cv_file)
+            
+            if not raw_cv_text.strip():
+                raise ValueError("Could not extract meaningful text from the resume file")
+            
+            # Shown with the results, so that cached results show them too
+            warnings = []
+            truncated = getattr(raw_cv_text, 'truncated', None)
+            if truncated:
+                warnings.append(f"⚠️ Resume is very long; only the first {truncated['limit']} {truncated['budget']} were analyzed.")
+            
+            # Each document is analyzed once and shared by every step below
+            cv_features = self.document_features(raw_cv_text)
+            jd_features = self.document_features(job_description)
+            
+            if cv_features.length < 50:
+                warnings.append("⚠️ Resume seems quite short. Consider adding more details for better analysis.")
+            
+            # Perform analysis
+            score, analysis_details = self.calculate_advanced_similarity(cv_features, jd_features)
+            feedback = self.generate_comprehensive_feedback(raw_cv_text, job_description, score, analysis_details)
+            
+            match_level, match_color = self.match_level(score)
+            
+            return {
+                "score": score,
+                "feedback": feedback,
+                "match_level": match_level,
+                "match_color": match_color,
+                "cv_length": cv_features.length,
+                "jd_length": jd_features.length,
+                "analysis_details": analysis_details,
+                "warnings": warnings
+            }
+            
+        except Exception as e:
+            raise ValueError(f"Error processing resume: {str(e)}")
+
+    def rank_resumes(self, cv_files, job_description, workers=None):
+        """Analyze many resumes against one job description in parallel.
+
+        Yields (index, result, error) as each resume finishes; error is None on
+        success. With an extraction pool one resume per parser process is in
+        progress, so parsing runs on every core while the scoring overlaps it.
+        """
+        if workers is None:
+            workers = self.extraction_pool.workers if self.extraction_pool is not None else 1
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            futures = {executor.submit(self.process_resume, cv_file, job_description): index
+                       for index, cv_file in enumerate(cv_files)}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, str(e)
@@ -0,0 +1,123 @@
+"""Prometheus metrics for the matcher service.
+
+Latency histograms per analysis stage, document size histograms, in-flight
+gauges, error counters by failure type and cache hit ratios, exposed in the
+Prometheus text format by the /metrics endpoint. Recording a stage costs two
+perf_counter calls and one histogram observation, so metrics stay on in
+production.
+
+Under gunicorn set PROMETHEUS_MULTIPROC_DIR to an empty directory so that
+every worker's samples are aggregated (gunicorn.conf.py cleans up after
+exited workers).
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+                               REGISTRY, generate_latest, multiprocess)
+from prometheus_client.core import GaugeMetricFamily
+
+MULTIPROCESS = bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+STAGES = ('extraction', 'preprocess', 'job_profile', 'tfidf', 'word_match', 'fuzzy_skills',
+          'tech_terms', 'bigrams', 'scoring', 'feedback')
+
+STAGE_LATENCY = Histogram(
+    'resume_matcher_stage_seconds', 'Time spent in each analysis stage', ['stage'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+REQUEST_LATENCY = Histogram(
+    'resume_matcher_request_seconds', 'End-to-end request latency', ['endpoint'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+DOCUMENT_PAGES = Histogram(
+    'resume_matcher_document_pages', 'Pages per extracted PDF',
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100)
+)
+DOCUMENT_CHARACTERS = Histogram(
+    'resume_matcher_document_characters', 'Characters of text per analyzed resume',
+    buckets=(500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000)
+)
+DOCUMENT_TOKENS = Histogram(
+    'resume_matcher_document_tokens', 'Tokens per analyzed resume after preprocessing',
+    buckets=(50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000)
+)
+IN_FLIGHT = Gauge(
+    'resume_matcher_in_flight_requests', 'Requests inside an analysis endpoint, queued ones included', ['endpoint'],
+    multiprocess_mode='livesum'
+)
+ERRORS = Counter(
+    'resume_matcher_errors_total', 'Failed requests and stages by failure type', ['type']
+)
+
+# Children resolved once; labels() takes a lock on every call
+_stage_histograms = {stage: STAGE_LATENCY.labels(stage) for stage in STAGES}
+
+
+@contextmanager
+def stage_timer(stage):
+    """Record the duration of the enclosed block under an analysis stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stage_histograms[stage].observe(time.perf_counter() - start)
+
+
+def observe_document(text, tokens):
+    """Record the size of an analyzed resume (its text and token count)"""
+    DOCUMENT_CHARACTERS.observe(len(text))
+    DOCUMENT_TOKENS.observe(tokens)
+
+
+def count_error(error_type, count=1):
+    ERRORS.labels(error_type).inc(count)
+
+
+class CacheStatsCollector:
+    """Exposes the hit ratios of the caches that keep their own counters"""
+
+    def __init__(self, caches):
+        self.caches = caches  # name -> object with stats() returning hits/misses/hitRatio
+
+    def collect(self):
+        ratio = GaugeMetricFamily('resume_matcher_cache_hit_ratio', 'Cache hit ratio since start', labels=['cache', 'pid'])
+        lookups = GaugeMetricFamily('resume_matcher_cache_lookups', 'Cache lookups since start', labels=['cache', 'result', 'pid'])
+        pid = str(os.getpid())
+        for name, cache in self.caches.items():
+            stats = cache.stats()
+            ratio.add_metric([name, pid], stats['hitRatio'])
+            lookups.add_metric([name, 'hit', pid], stats['hits'])
+            lookups.add_metric([name, 'miss', pid], stats['misses'])
+        yield ratio
+        yield lookups
+
+
+_cache_collectors = []
+
+
+def register_caches(caches):
+    collector = CacheStatsCollector(caches)
+    _cache_collectors.append(collector)
+    if not MULTIPROCESS:
+        REGISTRY.register(collector)
+
+
+def render_metrics():
+    """(body, content type) for the /metrics endpoint"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        # Cache counters live in each worker; this reports the one serving the scrape
+        for collector in _cache_collectors:
+            registry.register(collector)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid):
+    """Drop a dead worker's live gauges (multiprocess mode)"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
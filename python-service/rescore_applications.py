@@ -0,0 +1,154 @@
+"""Re-score stored analyses from the feature store, without their files.
+
+After changing weights or thresholds in calculate_similarity:
+    python rescore_applications.py --store data/features --output rescored.ndjson
+
+Every pair recorded in the store (FEATURE_STORE_PATH, see feature_store.py)
+is scored again by the current ImprovedResumeMatcher from its stored
+features. Pairs are grouped by job, and the resumes of a few jobs at a time
+are scored against those jobs as one vectorized block; --workers processes
+each memory-map the store read-only and take a share of the blocks. Each output line holds one pair's recorded and
+new score; a summary is printed at the end.
+
+Use --tfidf-model to re-score with a corpus TF-IDF model (fitted with
+--preset api) instead of the service's TFIDF_MODEL_PATH.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from feature_store import FeatureStore, StoredScoringEngine
+
+# Resume × job cells scored per block (a few dense arrays of this size are held at once)
+DEFAULT_BLOCK_CELLS = 1000000
+
+_engine = None
+
+
+def job_groups(pairs):
+    """(job row, indices of its pairs) for every job of the stored pairs"""
+    jobs = np.asarray(pairs['job'])
+    order = np.argsort(jobs, kind='stable')
+    sorted_jobs = jobs[order]
+    starts = np.flatnonzero(np.r_[True, sorted_jobs[1:] != sorted_jobs[:-1]])
+    ends = np.r_[starts[1:], len(order)]
+    return [(int(sorted_jobs[start]), order[start:end]) for start, end in zip(starts, ends)]
+
+
+def blocks(pairs, groups, max_cells):
+    """Pair indices of consecutive job groups, batched while their resumes × jobs fit in max_cells"""
+    block, resumes, jobs = [], set(), 0
+    for _, pair_indices in groups:
+        group_resumes = set(pairs['resume'][pair_indices].tolist())
+        if block and len(resumes | group_resumes) * (jobs + 1) > max_cells:
+            yield np.concatenate(block)
+            block, resumes, jobs = [], set(), 0
+        block.append(pair_indices)
+        resumes |= group_resumes
+        jobs += 1
+    if block:
+        yield np.concatenate(block)
+
+
+def load_engine(store_path, tfidf_model_path=None):
+    from resume_matcher_api import ImprovedResumeMatcher
+    from tfidf_model import load_tfidf_model
+    matcher = ImprovedResumeMatcher()
+    if tfidf_model_path:
+        matcher.tfidf_model = load_tfidf_model(tfidf_model_path)
+        if matcher.tfidf_model is None:
+            raise ValueError(f"Could not load TF-IDF model from {tfidf_model_path}")
+    return StoredScoringEngine(matcher, FeatureStore(matcher, store_path, readonly=True))
+
+
+def init_worker():
+    """Map the store afresh in a forked worker rather than through the parent's maps"""
+    _engine.store.refresh()
+
+
+def rescore_block(pair_indices):
+    """(pair indices, new scores, approximate flags) of a block of pairs"""
+    pairs = _engine.store.pairs[pair_indices]
+    return (pair_indices, *_engine.score_pairs(pairs['resume'], pairs['job']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--store', default=os.environ.get('FEATURE_STORE_PATH'), help='Feature store directory')
+    parser.add_argument('--output', help='NDJSON file receiving one record per pair')
+    parser.add_argument('--changed-only', action='store_true', help='Only write pairs whose score changed')
+    parser.add_argument('--tfidf-model', metavar='MODEL_PATH', help='Corpus TF-IDF model to score with')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--block-cells', type=int, default=DEFAULT_BLOCK_CELLS,
+                        help='Resume × job cells scored at once')
+    args = parser.parse_args(argv)
+
+    if not args.store:
+        parser.error('--store (or FEATURE_STORE_PATH) is required')
+
+    global _engine
+    start = time.perf_counter()
+    _engine = load_engine(args.store, args.tfidf_model)
+    store = _engine.store
+    pairs = store.pairs
+    documents = store.documents
+    groups = job_groups(pairs)
+    tasks = blocks(pairs, groups, args.block_cells)
+
+    if args.workers > 1:
+        # Forked after the matcher is loaded, so workers share it copy-on-write
+        pool = multiprocessing.get_context('fork').Pool(args.workers, init_worker)
+        results = pool.imap_unordered(rescore_block, tasks)
+    else:
+        pool = None
+        results = map(rescore_block, tasks)
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else None
+    rescored = changed = approximate_count = 0
+    total_change = max_change = 0.0
+    try:
+        for indices, scores, approximate in results:
+            recorded = np.asarray(pairs['score'][indices])
+            changes = np.abs(scores - recorded)
+            rescored += len(indices)
+            changed += int(np.count_nonzero(changes > 0))
+            approximate_count += int(approximate.sum())
+            total_change += float(changes.sum())
+            max_change = max(max_change, float(changes.max(initial=0.0)))
+
+            if output is None:
+                continue
+            for i, pair, score, change, flag in zip(indices.tolist(), pairs[indices], scores.tolist(),
+                                                   changes.tolist(), approximate.tolist()):
+                if args.changed_only and not change:
+                    continue
+                output.write(json.dumps({
+                    'pair': i,
+                    'resume': bytes(documents[pair['resume']]['digest']).hex(),
+                    'job': bytes(documents[pair['job']]['digest']).hex(),
+                    'recordedAt': float(pair['recorded_at']),
+                    'recordedScore': float(pair['score']),
+                    'score': score,
+                    'approximate': flag
+                }) + '\n')
+    finally:
+        if output is not None:
+            output.close()
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    seconds = time.perf_counter() - start
+    print(f"Rescored {rescored} pairs of {len(groups)} jobs and {len(documents)} documents in {seconds:.1f}s "
+          f"({rescored / max(seconds, 1e-9):.0f} pairs/s): {changed} changed "
+          f"(mean change {total_change / max(rescored, 1):.2f}, max {max_change:.2f}), "
+          f"{approximate_count} approximate")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,557 @@
+"""Searchable index of stored resumes: top-K candidates for a job posting.
+
+Scoring every stored resume with calculate_similarity takes minutes once
+there are tens of thousands of them. A ResumeIndex keeps, for each resume,
+the features ImprovedResumeMatcher's scoring reads (words, technical terms,
+bigrams, skill categories, fuzzily matched skill terms and TF-IDF n-gram
+weights) as one row of a sparse matrix. Its columns are the inverted index:
+a query reads only the columns of the job's own terms and scores every
+resume with a few sparse products.
+
+Those scores differ from calculate_similarity's only by float rounding in
+the TF-IDF part, so every resume that can still reach the top K is rescored
+exactly before it is returned: search returns the scores calculate_similarity
+would give.
+
+Resumes are added to a small pending segment, sealed into an immutable one
+every RESUME_INDEX_DELTA_SIZE resumes; segments of similar size are merged,
+which drops deleted and replaced rows. With RESUME_INDEX_PATH set every
+change is appended to a journal that each process replays before it reads,
+so all gunicorn workers, and restarts, see the same index.
+
+Replay analyzes only the last record of each resume: records that a later
+update or delete supersedes are skipped. Once they outnumber the live
+resumes (and on compact) the journal is rewritten with one record per live
+resume and atomically replaced; a process that finds a new journal keeps
+the resumes it has already analyzed and only applies the differences.
+"""
+
+import fcntl
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+from scipy import sparse
+
+DEFAULT_JOURNAL_PATH = os.environ.get('RESUME_INDEX_PATH')
+DEFAULT_DELTA_SIZE = int(os.environ.get('RESUME_INDEX_DELTA_SIZE', 1000))
+
+# Resumes within this much of the K-th best approximate score are rescored
+# exactly: covers ties after rounding to 2 decimals and the float error of
+# the approximate TF-IDF part
+RESCORE_MARGIN = 0.011
+
+# Column key prefixes, one per scoring feature
+WORD = 'w '
+TECH_TERM = 't '
+BIGRAM = 'b '
+SKILL = 's '
+FUZZY_TERM = 'f '
+NGRAM = 'n '
+MODEL_TERM = 'm '
+
+
+def bigram_keys(bigrams):
+    """Column keys of hashed bigrams (see document_features.ngram_hashes); none when they could not be built"""
+    if bigrams is None:
+        return []
+    return [f"{BIGRAM}{bigram:016x}" for bigram in bigrams.tolist()]
+
+
+# Components a search sums per resume (SKILLS is followed by one column per
+# required skill, then one per required skill for its fuzzy matches)
+WORDS, TECH_TERMS, BIGRAMS, DOTS, CV_SHARED, JD_SHARED, SHARED_TERMS, SKILLS = range(8)
+
+# What a component sums: a feature's presence, its stored weight or its square
+BINARY, VALUE, SQUARED = range(3)
+
+
+class IndexedResume:
+    """A stored resume: its text, caller metadata and scalar features"""
+
+    def __init__(self, resume_id, text, metadata, length, has_bigrams, squared_norm, n_terms, keys, values):
+        self.id = resume_id
+        self.text = text                    # preprocessed text, rescored exactly on demand
+        self.metadata = metadata
+        self.length = length                # number of words
+        self.has_bigrams = has_bigrams      # False scores 15.0, like a failed comparison
+        self.squared_norm = squared_norm    # sum of squared TF-IDF n-gram weights
+        self.n_terms = n_terms              # distinct TF-IDF n-grams
+        self.keys = keys                    # column keys, until columns are assigned
+        self.values = values
+        self.columns = None
+        self.segment = None                 # None while pending
+        self.row = None
+
+
+class Segment:
+    """Immutable rows of the index, one column per feature key (CSC, so columns are posting lists)"""
+
+    def __init__(self, resumes, matrix):
+        self.resumes = resumes
+        self.matrix = matrix.tocsc()
+        self.live = np.ones(len(resumes), dtype=bool)
+        self.lengths = np.array([resume.length for resume in resumes], dtype=np.float64)
+        self.has_bigrams = np.array([resume.has_bigrams for resume in resumes], dtype=bool)
+        self.squared_norms = np.array([resume.squared_norm for resume in resumes], dtype=np.float64)
+        self.n_terms = np.array([resume.n_terms for resume in resumes], dtype=np.float64)
+
+    @classmethod
+    def from_resumes(cls, resumes, n_columns):
+        """Segment built from resumes whose columns are assigned"""
+        indptr = np.cumsum([0] + [len(resume.columns) for resume in resumes])
+        if resumes:
+            indices = np.concatenate([resume.columns for resume in resumes])
+            data = np.concatenate([resume.values for resume in resumes])
+        else:
+            indices, data = np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        return cls(resumes, sparse.csr_matrix((data, indices, indptr), shape=(len(resumes), n_columns)))
+
+    @classmethod
+    def merge(cls, segments, n_columns):
+        """One segment with the live rows of several"""
+        resumes, blocks = [], []
+        for segment in segments:
+            rows = np.flatnonzero(segment.live)
+            resumes.extend(segment.resumes[row] for row in rows)
+            block = segment.matrix.tocsr()[rows]
+            blocks.append(sparse.csr_matrix((block.data, block.indices, block.indptr),
+                                            shape=(len(rows), n_columns)))
+        return cls(resumes, sparse.vstack(blocks, format='csr'))
+
+    @property
+    def size(self):
+        return int(self.live.sum())
+
+
+class ResumeIndex:
+    """Resumes stored for search by job description, updated incrementally"""
+
+    def __init__(self, matcher, journal_path=DEFAULT_JOURNAL_PATH, delta_size=DEFAULT_DELTA_SIZE):
+        self.matcher = matcher
+        self.journal_path = journal_path
+        self.delta_size = delta_size
+        self._lock = threading.RLock()
+        self._vocabulary = {}
+        self._resumes = {}
+        self._segments = []
+        self._pending = []
+        self._pending_segment = None
+        self._journal_file = None           # (device, inode) of the journal replayed so far
+        self._journal_offset = 0
+        self._journal_records = 0           # records in that journal, superseded ones included
+        self.searches = 0
+
+    def __len__(self):
+        self.sync()
+        with self._lock:
+            return len(self._resumes)
+
+    def __contains__(self, resume_id):
+        self.sync()
+        with self._lock:
+            return resume_id in self._resumes
+
+    def get(self, resume_id):
+        """The stored resume for an ID, or None"""
+        self.sync()
+        with self._lock:
+            return self._resumes.get(resume_id)
+
+    def add(self, resume_id, text, metadata=None):
+        """Index a preprocessed resume, replacing any resume stored under the same ID"""
+        if not text:
+            raise ValueError('Resume text is empty')
+        resume = self.analyze(resume_id, text, metadata or {})
+        self._commit({'op': 'add', 'id': resume_id, 'text': text, 'metadata': metadata or {}}, resume)
+        return resume
+
+    def delete(self, resume_id):
+        """Remove a resume; returns whether it was stored"""
+        with self._lock:
+            self.sync()
+            if resume_id not in self._resumes:
+                return False
+            self._commit({'op': 'delete', 'id': resume_id})
+            return True
+
+    def analyze(self, resume_id, text, metadata):
+        """Every feature of a resume that its score against any job depends on"""
+        matcher = self.matcher
+        features = matcher.document_features(text)
+
+        features_by_key = {}
+        for word in features.token_set:
+            features_by_key[WORD + word] = 1.0
+        for term in features.tech_terms:
+            features_by_key[TECH_TERM + term] = 1.0
+        for bigram in bigram_keys(features.bigrams):
+            features_by_key[bigram] = 1.0
+        for skill_category in matcher.skill_categories(features.skill_hits):
+            features_by_key[SKILL + skill_category] = 1.0
+        for term in matcher.fuzzy_terms(features):
+            features_by_key[FUZZY_TERM + term] = 1.0
+
+        term_weights = matcher.tfidf_term_weights(text)
+        if matcher.tfidf_model is not None:
+            vector = matcher.tfidf_model.transform([text])
+            for column, value in zip(vector.indices, vector.data):
+                features_by_key[MODEL_TERM + str(column)] = value
+        else:
+            for term, weight in term_weights.items():
+                features_by_key[NGRAM + term] = weight
+
+        return IndexedResume(
+            resume_id, text, metadata,
+            length=features.length,
+            has_bigrams=features.bigrams is not None,
+            squared_norm=sum(weight ** 2 for weight in term_weights.values()),
+            n_terms=len(term_weights),
+            keys=list(features_by_key),
+            values=np.fromiter(features_by_key.values(), dtype=np.float32, count=len(features_by_key))
+        )
+
+    def _commit(self, record, resume=None):
+        """Journal a change (when there is a journal) and apply it"""
+        with self._lock:
+            if self.journal_path is None:
+                self._apply(record, resume)
+                return
+            with self._locked_journal() as journal:
+                self._replay(journal)
+                journal.write(json.dumps(record).encode('utf-8') + b'\n')
+                journal.flush()
+                self._journal_offset = journal.tell()
+                self._journal_records += 1
+                self._apply(record, resume)
+                if self._journal_records - len(self._resumes) > max(len(self._resumes), self.delta_size):
+                    self._rewrite_journal()
+
+    @contextmanager
+    def _locked_journal(self):
+        """The journal opened for appending under its flock (reopened if it was replaced meanwhile)"""
+        while True:
+            journal = open(self.journal_path, 'a+b')
+            try:
+                fcntl.flock(journal, fcntl.LOCK_EX)
+                opened, current = os.fstat(journal.fileno()), os.stat(self.journal_path)
+            except BaseException:
+                journal.close()
+                raise
+            if (opened.st_dev, opened.st_ino) == (current.st_dev, current.st_ino):
+                break
+            journal.close()
+        try:
+            yield journal
+        finally:
+            fcntl.flock(journal, fcntl.LOCK_UN)
+            journal.close()
+
+    def _rewrite_journal(self):
+        """Replace the journal with one add record per live resume (journal flock and lock held, replayed)"""
+        directory = os.path.dirname(os.path.abspath(self.journal_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as compacted:
+                for resume in self._resumes.values():
+                    compacted.write(json.dumps({'op': 'add', 'id': resume.id, 'text': resume.text,
+                                                'metadata': resume.metadata}).encode('utf-8') + b'\n')
+                compacted.flush()
+                os.fsync(compacted.fileno())
+                status = os.fstat(compacted.fileno())
+            os.replace(tmp_path, self.journal_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self._journal_file = (status.st_dev, status.st_ino)
+        self._journal_offset = status.st_size
+        self._journal_records = len(self._resumes)
+
+    def sync(self):
+        """Apply the changes other processes journaled since the last sync"""
+        if self.journal_path is None:
+            return
+        with self._lock:
+            try:
+                with open(self.journal_path, 'rb') as journal:
+                    self._replay(journal)
+            except FileNotFoundError:
+                pass
+
+    def _replay(self, journal):
+        status = os.fstat(journal.fileno())
+        replaced = (status.st_dev, status.st_ino) != self._journal_file
+        if replaced:
+            # First replay, or the journal was rewritten by another process: read it from the start
+            self._journal_file = (status.st_dev, status.st_ino)
+            self._journal_offset = self._journal_records = 0
+        journal.seek(self._journal_offset)
+        data = journal.read()
+        # A record still being written is picked up by the next sync
+        end = data.rfind(b'\n') + 1
+
+        # Only the last record of each resume is applied, in journal order
+        latest = {}
+        for line in data[:end].splitlines():
+            if line:
+                record = json.loads(line)
+                latest.pop(record['id'], None)
+                latest[record['id']] = record
+                self._journal_records += 1
+        if replaced:
+            # A rewritten journal lists every live resume; those analyzed already are kept
+            for resume_id in [resume_id for resume_id in self._resumes if resume_id not in latest]:
+                self._remove(resume_id)
+            latest = {resume_id: record for resume_id, record in latest.items() if not self._is_current(record)}
+        for record in latest.values():
+            self._apply(record)
+        self._journal_offset += end
+
+    def _is_current(self, record):
+        """Whether record adds exactly the resume already stored under its ID"""
+        resume = self._resumes.get(record['id'])
+        return (resume is not None and record['op'] == 'add' and resume.text == record['text']
+                and resume.metadata == (record.get('metadata') or {}))
+
+    def _apply(self, record, resume=None):
+        self._remove(record['id'])
+        if record['op'] != 'add':
+            return
+        if resume is None:
+            resume = self.analyze(record['id'], record['text'], record.get('metadata') or {})
+
+        resume.columns = np.fromiter((self._vocabulary.setdefault(key, len(self._vocabulary)) for key in resume.keys),
+                                     dtype=np.int32, count=len(resume.keys))
+        resume.keys = None
+        self._resumes[resume.id] = resume
+        self._pending.append(resume)
+        self._pending_segment = None
+        if len(self._pending) >= self.delta_size:
+            self._seal()
+
+    def _remove(self, resume_id):
+        resume = self._resumes.pop(resume_id, None)
+        if resume is None:
+            return
+        if resume.segment is None:
+            self._pending.remove(resume)
+            self._pending_segment = None
+        else:
+            resume.segment.live[resume.row] = False
+
+    def _seal(self):
+        """Turn the pending resumes into a segment, then merge segments of similar size"""
+        self._segments.append(Segment.from_resumes(self._pending, len(self._vocabulary)))
+        self._pending = []
+        self._pending_segment = None
+
+        # Like a binary counter: O(log n) segments, each row merged O(log n) times
+        while len(self._segments) > 1 and self._segments[-2].size <= 2 * self._segments[-1].size:
+            self._segments[-2:] = [Segment.merge(self._segments[-2:], len(self._vocabulary))]
+
+        # Only the last segment is new; its rows now hold the columns and values
+        segment = self._segments[-1]
+        for row, resume in enumerate(segment.resumes):
+            resume.segment, resume.row = segment, row
+            resume.values = resume.columns = None
+
+    def compact(self):
+        """Seal pending resumes and merge every segment into one (e.g. after a bulk load).
+
+        The journal is rewritten without the records that later ones supersede.
+        """
+        with self._lock:
+            self.sync()
+            if self.journal_path is not None and os.path.exists(self.journal_path):
+                with self._locked_journal() as journal:
+                    self._replay(journal)
+                    if self._journal_records > len(self._resumes):
+                        self._rewrite_journal()
+            if self._pending:
+                self._seal()
+            if len(self._segments) > 1 or any(segment.size < len(segment.resumes) for segment in self._segments):
+                self._segments = [Segment.merge(self._segments, len(self._vocabulary))]
+                for row, resume in enumerate(self._segments[0].resumes):
+                    resume.segment, resume.row = self._segments[0], row
+
+    def _snapshot(self):
+        """Segments to search and column lookup, taken under the lock"""
+        with self._lock:
+            self.sync()
+            if self._pending and self._pending_segment is None:
+                self._pending_segment = Segment.from_resumes(list(self._pending), len(self._vocabulary))
+            segments = list(self._segments)
+            if self._pending:
+                segments.append(self._pending_segment)
+            # The vocabulary only grows; columns added later are beyond the segments' shapes
+            return segments, self._vocabulary
+
+    def search(self, job_description, top_k=10):
+        """Best resumes for a preprocessed job description as [(score, IndexedResume)], best first.
+
+        Scores are those calculate_similarity gives for the same resume text;
+        resumes with equal scores are ordered by ID.
+        """
+        matcher = self.matcher
+        segments, vocabulary = self._snapshot()
+        self.searches += 1
+        live = np.concatenate([segment.live for segment in segments]) if segments else np.zeros(0, dtype=bool)
+        live_count = int(live.sum())
+        if top_k <= 0 or not live_count:
+            return []
+
+        job_profile = matcher.job_profiles.get_or_build(job_description)
+
+        query = self._query(job_profile, vocabulary)
+        components = [self._components(segment, job_profile, query) for segment in segments]
+        word_counts, tech_counts, bigram_counts, skill_matches, tfidf, uncertain = (
+            np.concatenate(parts) for parts in zip(*components))
+        lengths = np.concatenate([segment.lengths for segment in segments])
+        has_bigrams = np.concatenate([segment.has_bigrams for segment in segments])
+        rows = [resume for segment in segments for resume in segment.resumes]
+
+        jd_words = max(len(job_profile.words), 1)
+        jd_tech_terms = max(len(job_profile.tech_terms), 1)
+        jd_bigrams = max(len(job_profile.bigrams) if job_profile.bigrams is not None else 0, 1)
+        jd_skills = max(len(job_profile.skills), 1)
+        length_divisor = max(job_profile.length, 100)
+
+        # Resumes (or jobs) whose bigrams could not be built score 15.0, as in calculate_similarity
+        if job_profile.bigrams is None:
+            approximate = np.full(len(rows), 15.0)
+            failed = np.ones(len(rows), dtype=bool)
+        else:
+            approximate, _ = matcher.combine_scores_array(
+                word_counts / jd_words, skill_matches / jd_skills, tech_counts / jd_tech_terms,
+                bigram_counts / jd_bigrams, tfidf, np.minimum(lengths / length_divisor, 1.0) * 0.1)
+            failed = ~has_bigrams
+            approximate[failed] = 15.0
+        approximate[~live] = -np.inf
+
+        # Everything that can still be in the top K once rescored exactly
+        k = min(top_k, live_count)
+        kth_best = -np.partition(-approximate, k - 1)[k - 1]
+        candidates = np.flatnonzero(live & ((approximate >= kth_best - RESCORE_MARGIN) | (uncertain & ~failed)))
+
+        results = [(15.0, rows[i]) for i in candidates if failed[i]]
+        to_rescore = [i for i in candidates if not failed[i]]
+        if to_rescore:
+            exact_tfidf = matcher.batch_tfidf_similarity([rows[i].text for i in to_rescore], job_profile)
+            for i, tfidf_similarity in zip(to_rescore, exact_tfidf):
+                # Same arithmetic as score_against_job
+                score = matcher.combine_scores(
+                    int(word_counts[i]) / jd_words if job_profile.words else 0,
+                    float(skill_matches[i]) / jd_skills,
+                    int(tech_counts[i]) / jd_tech_terms if job_profile.tech_terms else 0,
+                    int(bigram_counts[i]) / jd_bigrams if len(job_profile.bigrams) else 0,
+                    tfidf_similarity,
+                    min(rows[i].length / length_divisor, 1.0) * 0.1)
+                results.append((score, rows[i]))
+
+        results.sort(key=lambda result: (-result[0], result[1].id))
+        return results[:top_k]
+
+    def _query(self, job_profile, vocabulary):
+        """What a search reads: (column, component, weight, source) for each of the job's stored features.
+
+        Sources: BINARY sums the feature's presence, VALUE its stored weight
+        and SQUARED its squared stored weight into the component.
+        """
+        entries = []
+        n_skills = len(job_profile.skills)
+
+        def want(key, component, weight=1.0, source=BINARY):
+            column = vocabulary.get(key)
+            if column is not None:
+                entries.append((column, component, weight, source))
+
+        for word in job_profile.words:
+            want(WORD + word, WORDS)
+        for term in job_profile.tech_terms:
+            want(TECH_TERM + term, TECH_TERMS)
+        for bigram in bigram_keys(job_profile.bigrams):
+            want(bigram, BIGRAMS)
+        for i, (skill_category, _, jd_terms) in enumerate(job_profile.skills):
+            want(SKILL + skill_category, SKILLS + i)
+            for term in jd_terms:
+                want(FUZZY_TERM + term, SKILLS + n_skills + i)
+        if job_profile.tfidf_vector is not None:
+            for column, weight in zip(job_profile.tfidf_vector.indices, job_profile.tfidf_vector.data):
+                want(MODEL_TERM + str(column), DOTS, weight, VALUE)
+        else:
+            for term, weight in job_profile.term_weights.items():
+                want(NGRAM + term, DOTS, weight, VALUE)
+                want(NGRAM + term, CV_SHARED, 1.0, SQUARED)
+                want(NGRAM + term, JD_SHARED, weight ** 2)
+                want(NGRAM + term, SHARED_TERMS)
+
+        columns, components, weights, sources = (np.array(values) for values in zip(*entries)) if entries else (
+            np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0, dtype=np.int64))
+        return columns, components, weights, sources, SKILLS + 2 * n_skills
+
+    def _components(self, segment, job_profile, query):
+        """Scoring components of every row of a segment against a job (matches counted, not yet ratios).
+
+        The job's columns are sliced out of the segment once; each component is
+        then a sparse product of that slice with the query.
+        """
+        columns, components, weights, sources, n_components = query
+        n_skills = len(job_profile.skills)
+
+        known = columns < segment.matrix.shape[1]
+        unique_columns, positions = np.unique(columns[known], return_inverse=True)
+        stored = segment.matrix[:, unique_columns].astype(np.float64)
+
+        totals = np.zeros((len(segment.resumes), n_components))
+        for source, values in ((BINARY, stored.sign()), (VALUE, stored), (SQUARED, stored.multiply(stored))):
+            selected = sources[known] == source
+            if selected.any():
+                source_query = sparse.csr_matrix(
+                    (weights[known][selected], (positions[selected], components[known][selected])),
+                    shape=(len(unique_columns), n_components))
+                totals += (values @ source_query).toarray()
+
+        # A required skill counts 1 when present, else 0.5 per fuzzily matched job term
+        has_skill = totals[:, SKILLS:SKILLS + n_skills]
+        skill_matches = (has_skill + (1 - has_skill) * 0.5 * totals[:, SKILLS + n_skills:]).sum(axis=1)
+
+        uncertain = np.zeros(len(segment.resumes), dtype=bool)
+        if job_profile.tfidf_vector is not None:
+            # Corpus model: rows are L2-normalised, the cosine is a dot product
+            tfidf = totals[:, DOTS]
+        else:
+            # Pair fit, derived as in batch_tfidf_similarity from the n-grams a row shares with the job
+            unique_weight = (1 + np.log(1.5)) ** 2
+            cv_shared = totals[:, CV_SHARED]
+            cv_norms = cv_shared + unique_weight * (segment.squared_norms - cv_shared)
+            jd_shared = totals[:, JD_SHARED]
+            jd_norms = jd_shared + unique_weight * (job_profile.squared_norm - jd_shared)
+            dots = totals[:, DOTS]
+            denominators = np.sqrt(cv_norms * jd_norms)
+            tfidf = np.divide(dots, denominators, out=np.zeros_like(dots), where=denominators > 0)
+
+            # Pairs whose joint vocabulary exceeds max_features get a truncated fit: always rescored
+            max_features = self.matcher.vectorizer.max_features
+            if max_features:
+                uncertain = segment.n_terms + len(job_profile.term_weights) - totals[:, SHARED_TERMS] > max_features
+
+        return totals[:, WORDS], totals[:, TECH_TERMS], totals[:, BIGRAMS], skill_matches, tfidf, uncertain
+
+    def stats(self):
+        self.sync()
+        with self._lock:
+            segments = list(self._segments)
+            return {
+                'resumes': len(self._resumes),
+                'segments': len(segments),
+                'pending': len(self._pending),
+                'deletedRows': sum(len(segment.resumes) - segment.size for segment in segments),
+                'vocabulary': len(self._vocabulary),
+                'storedValues': sum(segment.matrix.nnz for segment in segments),
+                'searches': self.searches,
+                'journal': self.journal_path,
+                'journalRecords': self._journal_records
+            }
@@ -1,43 +1,53 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
+from werkzeug.datastructures import FileStorage
 from flask_cors import CORS
+import io
 import os
-import pdfplumber
-import docx
 import string
-import nltk
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import PorterStemmer
-import tempfile
 import re
-from difflib import SequenceMatcher
+import time
+import numpy as np
+from skill_automaton import SkillAutomaton
+from fuzzy_index import FuzzySkillIndex
+from extraction_cache import ExtractionCache
+from extraction_pool import ExtractionPool, ExtractionError, ExtractionTimeout, DEFAULT_WORKERS as EXTRACTION_POOL_WORKERS
+from text_extraction import extraction_namespace, parse_document, preload_parsers
+from upload_buffer import UploadBuffer, BufferedUploadRequest
+from admission import AdmissionController, Rejected
+from analysis_jobs import AnalysisJobQueue, AnalysisJobWorkers, validate_callback_url
+from metrics import (stage_timer, observe_document, count_error, register_caches, render_metrics,
+                     IN_FLIGHT, REQUEST_LATENCY, DOCUMENT_PAGES)
+from job_profiles import JobProfile, JobProfileRegistry
+from resume_index import ResumeIndex
+from feature_store import FeatureStore
+from scoring_engine import ScoringEngine
+from mern_engine import EnhancedMERNResumeMatcher
+from document_features import DocumentFeatures, token_ids, ngram_hashes, shared_count
+from tfidf_model import load_tfidf_model
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import closing
+from functools import wraps
+from itertools import islice
 
-# Download required NLTK data
-try:
-    nltk.download('stopwords', quiet=True)
-    nltk.download('punkt', quiet=True)
-except:
-    pass
+# sklearn, nltk and the document parsers are imported on first use (or by
+# ImprovedResumeMatcher.warm_up) so that the service starts quickly. No NLTK
+# data is needed: nothing here uses its corpora or tokenizers.
 
 app = Flask(__name__)
+# Uploads are received into memory and hashed on the way in (see upload_buffer.py)
+app.request_class = BufferedUploadRequest
 CORS(app)
 
+WORD_PATTERN = re.compile(r'\w+')
+YEARS_PATTERN = re.compile(r'\b\d+\+?\s*years?\b')
+# Cached text is reused only by the same parsers, run with the same budgets
+EXTRACTION_NAMESPACE = extraction_namespace('api')
+
 class ImprovedResumeMatcher:
     def __init__(self):
-        # More generous TF-IDF configuration
-        self.vectorizer = TfidfVectorizer(
-            max_features=20000,
-            stop_words=None,
-            ngram_range=(1, 3),
-            min_df=1,
-            max_df=1.0,
-            sublinear_tf=True,
-            token_pattern=r'\b\w+\b',
-            lowercase=True
-        )
-        self.stemmer = PorterStemmer()
+        self._vectorizer = None
+        self._stemmer = None
         
         # Expanded skill synonyms for better matching
         self.skill_synonyms = {
@@ -67,31 +77,120 @@ class ImprovedResumeMatcher:
             'machine learning': ['machine learning', 'ml', 'ai', 'artificial intelligence', 'deep learning'],
             'data science': ['data science', 'data analysis', 'analytics', 'big data']
         }
+        
+        # Dictionary terms recognised as technical terms (matched as whole words)
+        self.technical_terms = [
+            'python', 'javascript', 'typescript', 'react', 'reactjs', 'react.js', 'reactnative',
+            'node', 'nodejs', 'node.js', 'docker', 'kubernetes', 'jenkins', 'git', 'github', 'gitlab',
+            'mongo', 'mongodb', 'sql', 'aws', 'azure', 'gcp', 'c++', 'c#', '.net', 'html', 'html5',
+            'css', 'css3', 'machine learning', 'data science', 'artificial intelligence', 'devops',
+            'agile', 'scrum'
+        ]
+        
+        # Build the skill automatons once; each scan is then a single pass over the text
+        self.synonym_automaton = SkillAutomaton()
+        for skill_category, variations in self.skill_synonyms.items():
+            for var in variations:
+                self.synonym_automaton.add(var, skill_category)
+        self.technical_term_automaton = SkillAutomaton(self.technical_terms, collapse_whitespace=True)
+        self.fuzzy_index = FuzzySkillIndex(
+            [var for variations in self.skill_synonyms.values() for var in variations], threshold=0.8)
+        
+        self.extraction_cache = ExtractionCache()
+        
+        # Parsing runs in separate processes with a deadline (0 workers parses in-process)
+        self.extraction_pool = ExtractionPool(parse_document) if EXTRACTION_POOL_WORKERS > 0 else None
+        
+        self.job_profiles = JobProfileRegistry(self.build_job_profile)
+        self.scoring_engine = ScoringEngine(self)
+        
+        # Corpus-fitted TF-IDF model (fit_tfidf_model.py); without one each pair is fitted on its own
+        self.tfidf_model = load_tfidf_model(os.environ.get('TFIDF_MODEL_PATH'))
+        
+        self.warmed_up = False
+
+    @property
+    def vectorizer(self):
+        """TF-IDF vectorizer, created on first use"""
+        if self._vectorizer is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            
+            # More generous TF-IDF configuration
+            self._vectorizer = TfidfVectorizer(
+                max_features=20000,
+                stop_words=None,
+                ngram_range=(1, 3),
+                min_df=1,
+                max_df=1.0,
+                sublinear_tf=True,
+                token_pattern=r'\b\w+\b',
+                lowercase=True
+            )
+        return self._vectorizer
+
+    @property
+    def stemmer(self):
+        """Porter stemmer, created on first use (importing nltk takes seconds)"""
+        if self._stemmer is None:
+            from nltk.stem import PorterStemmer
+            self._stemmer = PorterStemmer()
+        return self._stemmer
+
+    def warm_up(self):
+        """Import the heavy dependencies, build the lazy indexes and run every scoring stage once.
+
+        Called before a worker reports ready (gunicorn.conf.py, /ready) so
+        that no request pays for first-use initialisation.
+        """
+        preload_parsers()
+        
+        skills = ", ".join(variations[0] for variations in self.skill_synonyms.values())
+        sample_jd = self.preprocess_text(f"We need a developer with {skills} and 3+ years of experience.")
+        sample_cv = self.preprocess_text(f"I am a developer with 5 years of experience in {skills}.")
+        
+        # Built directly so the sample does not land in the job profile cache
+        job_profile = self.build_job_profile(sample_jd)
+        tfidf_similarity = self.batch_tfidf_similarity([sample_cv], job_profile)[0]
+        self.tfidf_similarity(sample_cv, sample_jd)
+        self.score_against_job(self.document_features(sample_cv), job_profile, tfidf_similarity)
+        self.warmed_up = True
 
     def extract_text_from_path(self, file_path):
         _, ext = os.path.splitext(file_path)
         ext = ext.lower().strip()
-        text = ""
-
+        
+        # Repeat uploads of the same file are served from the extraction cache
         try:
-            if ext == ".pdf":
-                with pdfplumber.open(file_path) as pdf:
-                    for page in pdf.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text += page_text + " "
-            elif ext == ".docx":
-                doc = docx.Document(file_path)
-                text = " ".join([para.text for para in doc.paragraphs])
-            elif ext == ".txt":
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    text = f.read()
-            else:
-                raise ValueError(f"Unsupported file format: '{ext}'. Use PDF, DOCX, or TXT.")
-        except Exception as e:
+            with open(file_path, 'rb') as f:
+                cache_key = self.extraction_cache.make_key(f.read(), ext, EXTRACTION_NAMESPACE)
+        except OSError as e:
             raise ValueError(f"Error extracting text from {ext} file: {str(e)}")
         
-        return text.strip()
+        with stage_timer('extraction'):
+            return self.extraction_cache.get_or_extract(
+                cache_key, lambda: self.parse_file(file_path, ext))
+
+    def extract_text_from_upload(self, upload, ext):
+        """Extract text from an UploadBuffer, keyed by the hash computed while it was received"""
+        cache_key = self.extraction_cache.key_for_digest(upload.digest, ext.lower().strip(), EXTRACTION_NAMESPACE)
+        with stage_timer('extraction'):
+            return self.extraction_cache.get_or_extract(
+                cache_key, lambda: self.parse_file(upload.source, ext.lower().strip()))
+
+    def parse_file(self, source, ext):
+        """Parse in an isolated worker when the extraction pool is enabled"""
+        if self.extraction_pool is None:
+            text, pages = parse_document(source, ext)
+        else:
+            try:
+                text, pages = self.extraction_pool.extract(source, ext)
+            except ExtractionTimeout:
+                count_error('extraction_timeout')
+                raise
+        
+        if pages is not None:
+            DOCUMENT_PAGES.observe(pages)
+        return text
 
     def preprocess_text(self, text):
         """Minimal preprocessing to preserve important terms"""
@@ -122,180 +221,393 @@ class ImprovedResumeMatcher:
         
         return " ".join(filtered_words)
 
-    def fuzzy_match_skills(self, cv_text, jd_text):
-        """Use fuzzy matching to find similar skills and terms"""
-        cv_lower = cv_text.lower()
-        jd_lower = jd_text.lower()
+    def required_skills(self, jd_lower, jd_present=None):
+        """Skill categories present in the job description, with the variations that matched"""
+        if jd_present is None:
+            jd_present = self.synonym_automaton.terms_in(jd_lower)
+        jd_categories = self.skill_categories(jd_present)
         
+        required = []
+        for skill_category, variations in self.skill_synonyms.items():
+            if skill_category in jd_categories:
+                jd_terms = [var for var in variations if var in jd_present]
+                required.append((skill_category, variations, jd_terms))
+        return required
+
+    def skill_categories(self, present_terms):
+        """Skill categories that any of the given skill variations belongs to"""
+        categories = set()
+        for term in present_terms:
+            categories.update(self.synonym_automaton.payloads(term))
+        return categories
+
+    def fuzzy_terms(self, cv_features):
+        """Skill variations fuzzily matched by the CV's words; each unique word is probed once"""
+        if cv_features.fuzzy_terms is None:
+            cv_features.fuzzy_terms = self.fuzzy_index.match_tokens(
+                cv_word for cv_word in cv_features.tokens if len(cv_word) > 3)
+        return cv_features.fuzzy_terms
+
+    def score_required_skills(self, cv_features, required_skills):
+        """Score a CV's features against skills already extracted from a job description"""
         matches = 0
-        total_skills = 0
+        cv_present = cv_features.skill_hits
         
-        for skill_category, variations in self.skill_synonyms.items():
-            # Check if any variation exists in job description
-            jd_has_skill = any(var in jd_lower for var in variations)
-            if jd_has_skill:
-                total_skills += 1
-                # Check if any variation exists in CV
-                cv_has_skill = any(var in cv_lower for var in variations)
-                if cv_has_skill:
-                    matches += 1
-                else:
-                    # Try fuzzy matching for partial matches
-                    for jd_term in variations:
-                        if jd_term in jd_lower:
-                            for cv_word in cv_lower.split():
-                                if len(cv_word) > 3 and SequenceMatcher(None, jd_term, cv_word).ratio() > 0.8:
-                                    matches += 0.5  # Partial credit for fuzzy matches
-                                    break
-        
-        return matches / max(total_skills, 1)
+        for skill_category, variations, jd_terms in required_skills:
+            # Check if any variation exists in CV
+            cv_has_skill = any(var in cv_present for var in variations)
+            if cv_has_skill:
+                matches += 1
+            else:
+                # Try fuzzy matching for partial matches
+                fuzzy_terms = self.fuzzy_terms(cv_features)
+                for jd_term in jd_terms:
+                    if jd_term in fuzzy_terms:
+                        matches += 0.5  # Partial credit for fuzzy matches
+        
+        return matches / max(len(required_skills), 1)
+
+    def fuzzy_match_skills(self, cv_text, jd_text):
+        """Use fuzzy matching to find similar skills and terms"""
+        return self.score_required_skills(self.document_features(cv_text), self.required_skills(jd_text.lower()))
 
     def extract_key_technical_terms(self, text):
         """Extract technical terms with better patterns"""
-        patterns = [
-            r'\b[A-Z]{2,10}\b',  # Acronyms (API, REST, SQL, etc.)
-            r'\b\w*[Ss]cript\b',  # JavaScript, TypeScript, etc.
-            r'\b[Pp]ython\b',
-            r'\b[Jj]ava[Ss]cript\b',
-            r'\b[Tt]ype[Ss]cript\b',
-            r'\b[Rr]eact(?:\.?js|[Nn]ative)?\b',
-            r'\b[Nn]ode(?:\.?js)?\b',
-            r'\b[Dd]ocker\b',
-            r'\b[Kk]ubernetes\b',
-            r'\b[Jj]enkins\b',
-            r'\b[Gg]it(?:[Hh]ub|[Ll]ab)?\b',
-            r'\b[Mm]ongo(?:[Dd][Bb])?\b',
-            r'\b[Ss][Qq][Ll]\b',
-            r'\b[Aa][Ww][Ss]\b',
-            r'\b[Aa]zure\b',
-            r'\b[Gg][Cc][Pp]\b',
-            r'\bC\+\+\b',
-            r'\bC#\b',
-            r'\b\.NET\b',
-            r'\b[Hh][Tt][Mm][Ll]5?\b',
-            r'\b[Cc][Ss][Ss]3?\b',
-            r'\b[Mm]achine\s+[Ll]earning\b',
-            r'\b[Dd]ata\s+[Ss]cience\b',
-            r'\b[Aa]rtificial\s+[Ii]ntelligence\b',
-            r'\b[Dd]ev[Oo]ps\b',
-            r'\b[Aa]gile\b',
-            r'\b[Ss]crum\b',
-            r'\b\d+\+?\s*years?\b',  # Experience
-        ]
+        text_lower = text.lower()
+        
+        # Dictionary terms, all found in a single automaton pass
+        key_terms = set(text_lower[start:end] for start, end, _, _ in
+                        self.technical_term_automaton.find_all(text_lower))
+        
+        # Acronyms (API, REST, SQL, etc.) and *Script words come from one tokenizer pass
+        for token in WORD_PATTERN.findall(text_lower):
+            if 2 <= len(token) <= 10 and token.isascii() and token.isalpha():
+                key_terms.add(token)
+            if token.endswith('script'):
+                key_terms.add(token)
+        
+        # Experience
+        key_terms.update(YEARS_PATTERN.findall(text_lower))
         
-        key_terms = []
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            key_terms.extend([match.lower() for match in matches])
+        return list(key_terms)
+
+    def word_set(self, text):
+        """Unique lowercased words of a text"""
+        return set(text.lower().split())
+
+    def bigram_set(self, text):
+        """Word bigrams used for phrase matching, as hashes"""
+        return self.token_bigrams(text.lower().split())
+
+    def token_bigrams(self, words):
+        """Hashed word bigrams of a token list (see document_features.ngram_hashes)"""
+        # Bounded by the length of the first word, not the word count; kept as-is
+        # because scores depend on it (IndexError when there are too few words)
+        count = len(words[0]) - 1
+        if count > len(words) - 1:
+            raise IndexError("list index out of range")
+        return ngram_hashes(token_ids(words[:count + 1]), 2)
+
+    def document_features(self, text):
+        """Analyze a (preprocessed) document once for both scoring and feedback"""
+        lower = text.lower()
+        
+        with stage_timer('word_match'):
+            tokens = lower.split()
+            token_set = set(tokens)
         
-        return list(set(key_terms))  # Remove duplicates
+        with stage_timer('bigrams'):
+            try:
+                bigrams = self.token_bigrams(tokens)
+            except IndexError:
+                bigrams = None  # Scored as a failed comparison
+        
+        with stage_timer('tech_terms'):
+            tech_terms = set(self.extract_key_technical_terms(text))
+        
+        return DocumentFeatures(
+            text=text,
+            lower=lower,
+            tokens=tokens,
+            token_set=token_set,
+            bigrams=bigrams,
+            tech_terms=tech_terms,
+            skill_hits=self.synonym_automaton.terms_in(lower),
+            length=len(tokens)
+        )
+
+    def features_of(self, document):
+        """DocumentFeatures for a text, or the features themselves if already built"""
+        if isinstance(document, DocumentFeatures):
+            return document
+        return self.document_features(document)
+
+    def build_job_profile(self, job_description):
+        """Compute every job-side feature once so it can be reused for every resume"""
+        features = self.document_features(job_description)
+        
+        return JobProfile(
+            text=job_description,
+            words=features.token_set,
+            bigrams=features.bigrams,
+            tech_terms=features.tech_terms,
+            skills=self.required_skills(features.lower, features.skill_hits),
+            length=features.length,
+            term_weights=self.tfidf_term_weights(job_description),
+            tfidf_vector=self.tfidf_model.transform([job_description]) if self.tfidf_model else None
+        )
+
+    def tfidf_term_counts(self, text):
+        """TF-IDF n-gram -> occurrences, in the order the vectorizer's analyzer first yields them"""
+        return Counter(self.vectorizer.build_analyzer()(text))
+
+    def tfidf_term_weights(self, text):
+        """TF-IDF n-gram -> sublinear term frequency, as the vectorizer weighs it before IDF"""
+        term_counts = self.tfidf_term_counts(text)
+        return {term: 1 + np.log(count) for term, count in term_counts.items()}
+
+    def tfidf_similarity(self, cv_text, job_description):
+        """TF-IDF cosine similarity fitted on the pair of documents"""
+        from sklearn.metrics.pairwise import cosine_similarity
+        try:
+            vectors = self.vectorizer.fit_transform([cv_text, job_description])
+            return cosine_similarity(vectors[0], vectors[1])[0][0]
+        except:
+            return 0.0
+
+    def batch_tfidf_similarity(self, cv_texts, job_profile):
+        """TF-IDF cosine of every CV against one job.
+
+        With a corpus-fitted model this is one sparse product of the transformed
+        CVs with the job's vector. Without one the result equals fitting each pair
+        separately: with a two-document corpus the smoothed IDF is 1 for terms in
+        both documents and 1 + ln(1.5) for terms in only one, so the per-pair
+        weights can be derived from the job's term frequencies and one CV count
+        matrix with sparse products, instead of one fit per CV.
+        """
+        if not cv_texts:
+            return np.zeros(0)
+        
+        if job_profile.tfidf_vector is not None:
+            # Rows are already L2-normalised
+            cv_vectors = self.tfidf_model.transform(cv_texts)
+            return (cv_vectors @ job_profile.tfidf_vector.T).toarray().ravel()
+        
+        from sklearn.feature_extraction.text import CountVectorizer
+        try:
+            count_vectorizer = CountVectorizer(analyzer=self.vectorizer.build_analyzer())
+            cv_matrix = count_vectorizer.fit_transform(cv_texts)
+        except ValueError:
+            return np.zeros(len(cv_texts))  # Empty vocabulary
+        
+        cv_matrix = cv_matrix.tocsr().astype(np.float64)
+        cv_matrix.data = np.log(cv_matrix.data) + 1  # sublinear_tf
+        
+        # Job weights aligned with the CV vocabulary (terms only in the job are
+        # accounted for through its squared norm)
+        jd_vector = np.zeros(cv_matrix.shape[1])
+        for term, index in count_vectorizer.vocabulary_.items():
+            jd_vector[index] = job_profile.term_weights.get(term, 0.0)
+        
+        jd_mask = (jd_vector > 0).astype(np.float64)
+        jd_squared = jd_vector ** 2
+        cv_squared = cv_matrix.multiply(cv_matrix).tocsr()
+        cv_present = cv_matrix.copy()
+        cv_present.data[:] = 1
+        unique_weight = (1 + np.log(1.5)) ** 2
+        
+        # Squared norms of each pair's TF-IDF vectors, shared terms weighted 1
+        cv_shared = cv_squared @ jd_mask
+        cv_norms = cv_shared + unique_weight * (np.asarray(cv_squared.sum(axis=1)).ravel() - cv_shared)
+        jd_shared = cv_present @ jd_squared
+        jd_norms = jd_shared + unique_weight * (job_profile.squared_norm - jd_shared)
+        
+        dots = cv_matrix @ jd_vector
+        denominators = np.sqrt(cv_norms * jd_norms)
+        similarities = np.divide(dots, denominators, out=np.zeros_like(dots), where=denominators > 0)
+        
+        # Pairs whose joint vocabulary exceeds max_features get a truncated fit
+        max_features = self.vectorizer.max_features
+        if max_features:
+            pair_vocab = np.diff(cv_matrix.indptr) + len(job_profile.term_weights) - (cv_present @ jd_mask)
+            for i in np.flatnonzero(pair_vocab > max_features):
+                similarities[i] = self.tfidf_similarity(cv_texts[i], job_profile.text)
+        
+        return similarities
+
+    def score_against_job(self, cv_features, job_profile, tfidf_similarity):
+        """Score a CV's features against a precomputed job profile"""
+        if job_profile.bigrams is None:
+            raise ValueError("Job description bigrams could not be built")
+        
+        # 1. Direct word matching (high weight)
+        cv_words = cv_features.token_set
+        jd_words = job_profile.words
+        
+        if len(jd_words) > 0:
+            word_match_ratio = len(cv_words.intersection(jd_words)) / len(jd_words)
+        else:
+            word_match_ratio = 0
+        
+        # 2. Technical skills matching with fuzzy logic
+        with stage_timer('fuzzy_skills'):
+            skill_match_score = self.score_required_skills(cv_features, job_profile.skills)
+        
+        # 3. Key technical terms matching
+        cv_tech_terms = cv_features.tech_terms
+        jd_tech_terms = job_profile.tech_terms
+        
+        if len(jd_tech_terms) > 0:
+            tech_terms_ratio = len(cv_tech_terms.intersection(jd_tech_terms)) / len(jd_tech_terms)
+        else:
+            tech_terms_ratio = 0
+        
+        # 4. N-gram matching for phrases
+        cv_bigrams = cv_features.bigrams
+        if cv_bigrams is None:
+            raise ValueError("Resume bigrams could not be built")
+        jd_bigrams = job_profile.bigrams
+        
+        if len(jd_bigrams) > 0:
+            bigram_ratio = shared_count(cv_bigrams, jd_bigrams) / len(jd_bigrams)
+        else:
+            bigram_ratio = 0
+        
+        # 5. Length and content quality bonus
+        cv_length = cv_features.length
+        jd_length = job_profile.length
+        
+        # Bonus for comprehensive resumes
+        length_bonus = min(cv_length / max(jd_length, 100), 1.0) * 0.1
+        
+        return self.combine_scores(word_match_ratio, skill_match_score, tech_terms_ratio, bigram_ratio,
+                                   tfidf_similarity, length_bonus)
+
+    def combine_scores(self, word_match_ratio, skill_match_score, tech_terms_ratio, bigram_ratio,
+                       tfidf_similarity, length_bonus):
+        """Final 10-98 score from the scoring components"""
+        # Weighted combination - more generous scoring
+        base_score = (
+            word_match_ratio * 0.25 +       # Direct word matches
+            skill_match_score * 0.25 +      # Skill matching (fuzzy)
+            tech_terms_ratio * 0.20 +       # Technical terms
+            bigram_ratio * 0.15 +           # Phrase matching
+            tfidf_similarity * 0.15 +       # Semantic similarity
+            length_bonus                    # Content quality bonus
+        )
+        
+        # More generous scaling to produce realistic scores
+        if base_score >= 0.7:
+            # Excellent matches: 80-98
+            final_score = 80 + (base_score - 0.7) * 60
+        elif base_score >= 0.5:
+            # Good matches: 65-80
+            final_score = 65 + (base_score - 0.5) * 75
+        elif base_score >= 0.3:
+            # Fair matches: 45-65
+            final_score = 45 + (base_score - 0.3) * 100
+        elif base_score >= 0.15:
+            # Poor matches: 25-45
+            final_score = 25 + (base_score - 0.15) * 133.33
+        else:
+            # Very poor matches: 10-25
+            final_score = 10 + base_score * 100
+        
+        # Apply additional bonuses for strong matches
+        if word_match_ratio > 0.4:
+            final_score += 5  # Strong keyword match bonus
+        if skill_match_score > 0.6:
+            final_score += 8  # Strong skill match bonus
+        if tech_terms_ratio > 0.5:
+            final_score += 5  # Technical terms bonus
+        
+        return round(min(final_score, 98), 2)  # Cap at 98 to remain realistic
+
+    def combine_scores_array(self, word_match_ratio, skill_match_score, tech_terms_ratio, bigram_ratio,
+                             tfidf_similarity, length_bonus):
+        """combine_scores over NumPy arrays of components: (unrounded scores, base scores).
+
+        Keep the two in sync: ScoringEngine relies on them agreeing exactly.
+        """
+        base_score = (
+            word_match_ratio * 0.25 +
+            skill_match_score * 0.25 +
+            tech_terms_ratio * 0.20 +
+            bigram_ratio * 0.15 +
+            tfidf_similarity * 0.15 +
+            length_bonus
+        )
+        
+        final_score = np.select(
+            [base_score >= 0.7, base_score >= 0.5, base_score >= 0.3, base_score >= 0.15],
+            [80 + (base_score - 0.7) * 60,
+             65 + (base_score - 0.5) * 75,
+             45 + (base_score - 0.3) * 100,
+             25 + (base_score - 0.15) * 133.33],
+            10 + base_score * 100
+        )
+        
+        final_score = (final_score
+                       + np.where(word_match_ratio > 0.4, 5, 0)
+                       + np.where(skill_match_score > 0.6, 8, 0)
+                       + np.where(tech_terms_ratio > 0.5, 5, 0))
+        
+        return np.minimum(final_score, 98), base_score
 
     def calculate_similarity(self, cv_text, job_description):
-        """Improved similarity calculation with higher, more realistic scores"""
-        if not cv_text or not job_description:
+        """Improved similarity calculation with higher, more realistic scores.
+
+        cv_text may also be the resume's DocumentFeatures, so that they can be
+        shared with generate_detailed_feedback.
+        """
+        if not job_description or not (cv_text.text if isinstance(cv_text, DocumentFeatures) else cv_text):
             return 0.0
         
         try:
-            # 1. Direct word matching (high weight)
-            cv_words = set(word.lower().strip() for word in cv_text.split() if len(word.strip()) > 0)
-            jd_words = set(word.lower().strip() for word in job_description.split() if len(word.strip()) > 0)
-            
-            if len(jd_words) > 0:
-                word_match_ratio = len(cv_words.intersection(jd_words)) / len(jd_words)
-            else:
-                word_match_ratio = 0
-            
-            # 2. Technical skills matching with fuzzy logic
-            skill_match_score = self.fuzzy_match_skills(cv_text, job_description)
-            
-            # 3. Key technical terms matching
-            cv_tech_terms = set(self.extract_key_technical_terms(cv_text))
-            jd_tech_terms = set(self.extract_key_technical_terms(job_description))
-            
-            if len(jd_tech_terms) > 0:
-                tech_terms_ratio = len(cv_tech_terms.intersection(jd_tech_terms)) / len(jd_tech_terms)
-            else:
-                tech_terms_ratio = 0
-            
-            # 4. N-gram matching for phrases
-            cv_bigrams = set([f"{words[i]} {words[i+1]}" for words in [cv_text.lower().split()] 
-                             for i in range(len(words[0])-1)])
-            jd_bigrams = set([f"{words[i]} {words[i+1]}" for words in [job_description.lower().split()] 
-                             for i in range(len(words[0])-1)])
-            
-            if len(jd_bigrams) > 0:
-                bigram_ratio = len(cv_bigrams.intersection(jd_bigrams)) / len(jd_bigrams)
-            else:
-                bigram_ratio = 0
-            
-            # 5. TF-IDF cosine similarity
-            try:
-                vectors = self.vectorizer.fit_transform([cv_text, job_description])
-                tfidf_similarity = cosine_similarity(vectors[0], vectors[1])[0][0]
-            except:
-                tfidf_similarity = 0.0
-            
-            # 6. Length and content quality bonus
-            cv_length = len(cv_text.split())
-            jd_length = len(job_description.split())
-            
-            # Bonus for comprehensive resumes
-            length_bonus = min(cv_length / max(jd_length, 100), 1.0) * 0.1
-            
-            # Weighted combination - more generous scoring
-            base_score = (
-                word_match_ratio * 0.25 +       # Direct word matches
-                skill_match_score * 0.25 +      # Skill matching (fuzzy)
-                tech_terms_ratio * 0.20 +       # Technical terms
-                bigram_ratio * 0.15 +           # Phrase matching
-                tfidf_similarity * 0.15 +       # Semantic similarity
-                length_bonus                    # Content quality bonus
-            )
-            
-            # More generous scaling to produce realistic scores
-            if base_score >= 0.7:
-                # Excellent matches: 80-98
-                final_score = 80 + (base_score - 0.7) * 60
-            elif base_score >= 0.5:
-                # Good matches: 65-80
-                final_score = 65 + (base_score - 0.5) * 75
-            elif base_score >= 0.3:
-                # Fair matches: 45-65
-                final_score = 45 + (base_score - 0.3) * 100
-            elif base_score >= 0.15:
-                # Poor matches: 25-45
-                final_score = 25 + (base_score - 0.15) * 133.33
-            else:
-                # Very poor matches: 10-25
-                final_score = 10 + base_score * 100
-            
-            # Apply additional bonuses for strong matches
-            if word_match_ratio > 0.4:
-                final_score += 5  # Strong keyword match bonus
-            if skill_match_score > 0.6:
-                final_score += 8  # Strong skill match bonus
-            if tech_terms_ratio > 0.5:
-                final_score += 5  # Technical terms bonus
-            
-            return round(min(final_score, 98), 2)  # Cap at 98 to remain realistic
+            cv_features = self.features_of(cv_text)
+            with stage_timer('job_profile'):
+                job_profile = self.job_profiles.get_or_build(job_description)
+            with stage_timer('tfidf'):
+                tfidf_similarity = self.batch_tfidf_similarity([cv_features.text], job_profile)[0]
+            with stage_timer('scoring'):
+                return self.score_against_job(cv_features, job_profile, tfidf_similarity)
             
         except Exception as e:
             print(f"Error calculating similarity: {e}")
+            count_error('scoring')
             return 15.0  # Minimum reasonable score instead of 0
 
+    def calculate_similarity_batch(self, cv_texts, job_description):
+        """Score many CVs (texts or DocumentFeatures) against one job description, computing the job side only once"""
+        return [row[0] for row in self.calculate_similarity_matrix(cv_texts, [job_description])]
+
+    def calculate_similarity_matrix(self, cv_texts, job_descriptions):
+        """Scores of every CV against every job description as rows of a matrix, equal to calculate_similarity"""
+        cv_features = [self.features_of(cv_text) for cv_text in cv_texts]
+        try:
+            with stage_timer('scoring'):
+                scores = self.scoring_engine.score_matrix(cv_features, job_descriptions).tolist()
+        except Exception:
+            # Fall back to pair-by-pair scoring so errors are handled identically
+            return [[self.calculate_similarity(features, job_description) for job_description in job_descriptions]
+                    for features in cv_features]
+        return scores
+
     def generate_detailed_feedback(self, cv_text, job_description, score):
-        """Generate more helpful and detailed feedback"""
+        """Generate more helpful and detailed feedback (cv_text may be DocumentFeatures)"""
         try:
-            cv_words = set(cv_text.lower().split())
-            jd_words = set(job_description.lower().split())
+            cv_features = self.features_of(cv_text)
+            job_profile = self.job_profiles.get_or_build(job_description)
+            cv_words = cv_features.token_set
+            jd_words = job_profile.words
             
             # Find matched and missing keywords
             matched_keywords = cv_words.intersection(jd_words)
             missing_keywords = jd_words - cv_words
             
             # Extract technical terms
-            cv_tech = set(self.extract_key_technical_terms(cv_text))
-            jd_tech = set(self.extract_key_technical_terms(job_description))
+            cv_tech = cv_features.tech_terms
+            jd_tech = job_profile.tech_terms
             
             matched_tech = cv_tech.intersection(jd_tech)
             missing_tech = jd_tech - cv_tech
@@ -348,83 +660,734 @@ class ImprovedResumeMatcher:
 # Initialize the improved matcher
 matcher = ImprovedResumeMatcher()
 
+# Weighted, category-aware MERN stack scoring (see mern_engine.py), for requests with scoringMode=mern
+mern_matcher = EnhancedMERNResumeMatcher()
+
+# Stored resumes searchable by job description (see resume_index.py)
+resume_index = ResumeIndex(matcher)
+
+# Features of every standard analysis, kept for re-scoring when FEATURE_STORE_PATH is set (see feature_store.py)
+feature_store = FeatureStore(matcher)
+
+ALLOWED_EXTENSIONS = ['.pdf', '.docx', '.txt']
+MAX_BATCH_RESUMES = int(os.environ.get('MAX_BATCH_RESUMES', 500))
+MAX_SEARCH_RESULTS = int(os.environ.get('MAX_SEARCH_RESULTS', 100))
+
+# Streamed batches (see stream_ranked_resumes) hold no results, so they may be larger
+MAX_STREAMED_RESUMES = int(os.environ.get('MAX_STREAMED_RESUMES', 5000))
+
+# The whole multipart body is received before a batch is scored. Its uploads share one in-memory
+# budget and are spilled to disk past it (see upload_buffer.py), so memory stays flat whatever the
+# batch size; the body itself is bounded here, and may hold one part per streamed resume
+MAX_REQUEST_BYTES = int(os.environ.get('MAX_REQUEST_BYTES', 512 * 1024 * 1024))
+app.config['MAX_CONTENT_LENGTH'] = MAX_REQUEST_BYTES
+app.config['MAX_FORM_PARTS'] = max(MAX_STREAMED_RESUMES, MAX_BATCH_RESUMES) + 16
+STREAM_WORKERS = int(os.environ.get('STREAM_WORKERS', max(EXTRACTION_POOL_WORKERS, 1)))
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Scoring models selectable per analysis with the scoringMode field
+STANDARD_SCORING = 'standard'
+MERN_SCORING = 'mern'
+SCORING_MODES = (STANDARD_SCORING, MERN_SCORING)
+DEFAULT_SCORING_MODE = os.environ.get('DEFAULT_SCORING_MODE', '').strip().lower() or STANDARD_SCORING
+if DEFAULT_SCORING_MODE not in SCORING_MODES:
+    raise ValueError(f'Unknown DEFAULT_SCORING_MODE {DEFAULT_SCORING_MODE!r}. Please use: {", ".join(SCORING_MODES)}')
+
+# Hit ratios of the caches on /metrics
+register_caches({'extraction': matcher.extraction_cache, 'job_profiles': matcher.job_profiles})
+
+# Bounds concurrent analyses in this process (see admission.py)
+admission = AdmissionController()
+
+# Failure type recorded for each error status of the analysis endpoints
+ERROR_TYPES = {
+    400: 'invalid_request',
+    404: 'unknown_job_profile',
+    422: 'extraction_failed',
+    429: 'rejected_queue_full',
+    500: 'internal',
+    503: 'rejected_saturated'
+}
+
+def instrumented(view):
+    """Record latency, in-flight requests and failures of an analysis endpoint"""
+    endpoint = view.__name__
+    
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        in_flight = IN_FLIGHT.labels(endpoint)
+        in_flight.inc()
+        start = time.perf_counter()
+        
+        def finish():
+            in_flight.dec()
+            REQUEST_LATENCY.labels(endpoint).observe(time.perf_counter() - start)
+        
+        try:
+            response = app.make_response(view(*args, **kwargs))
+        except BaseException:
+            finish()
+            raise
+        # A streamed response is in flight until its body has been sent
+        if response.is_streamed:
+            response.call_on_close(finish)
+        else:
+            finish()
+        if response.status_code >= 400:
+            count_error(ERROR_TYPES.get(response.status_code, 'other'))
+        return response
+    return wrapper
+
+def admission_controlled(view):
+    """Reject analyses beyond the in-flight and queue limits with 429/503 and Retry-After"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            admission.acquire()
+        except Rejected as e:
+            response = jsonify({'error': str(e), 'success': False})
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response, e.status
+        try:
+            response = app.make_response(view(*args, **kwargs))
+        except BaseException:
+            admission.release()
+            raise
+        # A streamed response keeps its slot until its body has been sent
+        if response.is_streamed:
+            response.call_on_close(admission.release)
+        else:
+            admission.release()
+        return response
+    return wrapper
+
+def get_match_level(score):
+    """Determine match level with more realistic thresholds"""
+    if score >= 75:
+        return "Excellent Match"
+    elif score >= 60:
+        return "Good Match"
+    elif score >= 40:
+        return "Fair Match"
+    else:
+        return "Needs Improvement"
+
+def extract_uploaded_text(resume_file):
+    """Extract the text of an upload straight from its in-memory buffer"""
+    file_ext = os.path.splitext(resume_file.filename)[1].lower()
+    upload = resume_file.stream
+    if not isinstance(upload, UploadBuffer):
+        upload = UploadBuffer.from_stream(upload, suffix=file_ext)
+    # Releases the buffer (and removes its spill file, if any) as soon as the text is out
+    with upload:
+        return matcher.extract_text_from_upload(upload, file_ext)
+
+def read_scoring_mode():
+    """The scoring mode asked for with scoringMode (standard by default), or (None, error response)"""
+    scoring_mode = request.form.get('scoringMode', '').strip().lower() or DEFAULT_SCORING_MODE
+    if scoring_mode not in SCORING_MODES:
+        return None, (jsonify({'error': f'Unknown scoring mode. Please use: {", ".join(SCORING_MODES)}', 'success': False}), 400)
+    return scoring_mode, None
+
+def read_job_description(scoring_mode=STANDARD_SCORING):
+    """Job description given inline or as a registered job profile ID.
+
+    Standard scoring takes it preprocessed and MERN scoring as given. Returns
+    (job_description, None) on success and (None, error response) otherwise.
+    """
+    job_profile_id = request.form.get('jobProfileId', '').strip()
+    if job_profile_id:
+        # Profiles hold the preprocessed text, which the MERN engine cannot use
+        if scoring_mode != STANDARD_SCORING:
+            return None, (jsonify({'error': 'Job profiles can only be used with standard scoring', 'success': False}), 400)
+        job_profile = matcher.job_profiles.get(job_profile_id)
+        if job_profile is None:
+            return None, (jsonify({'error': 'Unknown job profile', 'success': False}), 404)
+        return job_profile.text, None
+    
+    job_description = request.form.get('jobDescription', '').strip()
+    if not job_description:
+        return None, (jsonify({'error': 'Job description is required', 'success': False}), 400)
+    if scoring_mode == MERN_SCORING:
+        return job_description, None
+    return matcher.preprocess_text(job_description), None
+
+def resume_features(raw_cv_text, scoring_mode):
+    """DocumentFeatures of an extracted resume for the scoring mode"""
+    with stage_timer('preprocess'):
+        if scoring_mode == MERN_SCORING:
+            cv_features = mern_matcher.document_features(raw_cv_text)
+        else:
+            cv_features = matcher.document_features(matcher.preprocess_text(raw_cv_text))
+    observe_document(raw_cv_text, cv_features.length)
+    return cv_features
+
+def job_features(job_description, scoring_mode):
+    """What the scoring mode scores resumes against: the MERN engine's DocumentFeatures, or the preprocessed text"""
+    if scoring_mode == MERN_SCORING:
+        return mern_matcher.document_features(job_description)
+    return job_description
+
+def standard_result(cv_features, preprocessed_jd, score):
+    """Score, feedback and match level of a resume scored by ImprovedResumeMatcher"""
+    with stage_timer('feedback'):
+        feedback = matcher.generate_detailed_feedback(cv_features, preprocessed_jd, score)
+    record_analysis(cv_features, preprocessed_jd, score)
+    return {'score': score, 'feedback': feedback, 'matchLevel': get_match_level(score)}
+
+def record_analysis(cv_features, preprocessed_jd, score):
+    """Keep what a standard score was computed from, for rescore_applications.py; never fails the analysis"""
+    if not feature_store.enabled:
+        return
+    try:
+        feature_store.record(cv_features, preprocessed_jd, score)
+    except Exception as e:
+        app.logger.error(f"Error storing analysis features: {str(e)}")
+
+def mern_result(cv_features, jd_features):
+    """Score, feedback, match level and skill analysis of a resume scored by the MERN engine"""
+    with stage_timer('scoring'):
+        score, analysis_details = mern_matcher.calculate_advanced_similarity(cv_features, jd_features)
+    with stage_timer('feedback'):
+        feedback = mern_matcher.generate_comprehensive_feedback(cv_features.text, jd_features.text, score, analysis_details)
+    match_level, _ = mern_matcher.match_level(score)
+    
+    skill_breakdown = analysis_details.get('skill_breakdown', {})
+    return {
+        'score': score,
+        'feedback': feedback,
+        'matchLevel': match_level,
+        'analysis': {
+            'skillScore': analysis_details.get('skill_score'),
+            'semanticScore': analysis_details.get('semantic_score'),
+            'experienceMatch': analysis_details.get('experience_match'),
+            'educationBonus': analysis_details.get('education_bonus'),
+            'matchedSkills': skill_breakdown.get('matched_skills', []),
+            'missingCritical': skill_breakdown.get('missing_critical', []),
+            'missingNiceToHave': skill_breakdown.get('missing_nice_to_have', []),
+            'resumeYears': analysis_details.get('cv_years'),
+            'requiredYears': analysis_details.get('jd_years')
+        }
+    }
+
+def score_resume(cv_features, job, scoring_mode):
+    """Score, feedback and match level of one resume against job_features(...)"""
+    if scoring_mode == MERN_SCORING:
+        return mern_result(cv_features, job)
+    return standard_result(cv_features, job, matcher.calculate_similarity(cv_features, job))
+
+def analyze_resume(resume_file, job_description, scoring_mode=STANDARD_SCORING):
+    """Score and feedback for one uploaded resume, as (response body, HTTP status)"""
+    try:
+        # Validate file type
+        file_ext = os.path.splitext(resume_file.filename)[1].lower()
+        if file_ext not in ALLOWED_EXTENSIONS:
+            return {'error': f'Unsupported file type. Please use: {", ".join(ALLOWED_EXTENSIONS)}', 'success': False}, 400
+        
+        # Extract and process text
+        try:
+            raw_cv_text = extract_uploaded_text(resume_file)
+        except ExtractionError as e:
+            # Timed out, crashed or ran out of memory in its worker
+            return {'error': f'Could not extract text from the resume file: {str(e)}', 'success': False}, 422
+        
+        if not raw_cv_text.strip():
+            return {'error': 'Could not extract text from the resume file', 'success': False}, 400
+        
+        # Analyzed once, then shared by scoring and feedback
+        cv_features = resume_features(raw_cv_text, scoring_mode)
+        result = score_resume(cv_features, job_features(job_description, scoring_mode), scoring_mode)
+        
+        return {
+            **result,
+            'scoringMode': scoring_mode,
+            'truncated': truncation_of(raw_cv_text),
+            'success': True,
+            'message': 'Resume analyzed successfully'
+        }, 200
+        
+    except Exception as e:
+        app.logger.error(f"Error processing resume: {str(e)}")
+        return {
+            'error': f'Failed to process resume: {str(e)}',
+            'success': False
+        }, 500
+
+def truncation_of(raw_text):
+    """Which extraction budget cut a document short, or None (see text_extraction.TextBudget)"""
+    return getattr(raw_text, 'truncated', None)
+
+def read_resume_features(resume_file, scoring_mode=STANDARD_SCORING):
+    """(DocumentFeatures, truncation) of one resume of a batch; raises ValueError (or ExtractionError) if it cannot be read"""
+    file_ext = os.path.splitext(resume_file.filename or '')[1].lower()
+    if file_ext not in ALLOWED_EXTENSIONS:
+        raise ValueError(f'Unsupported file type. Please use: {", ".join(ALLOWED_EXTENSIONS)}')
+    raw_cv_text = extract_uploaded_text(resume_file)
+    if not raw_cv_text.strip():
+        raise ValueError('Could not extract text from the resume file')
+    return resume_features(raw_cv_text, scoring_mode), truncation_of(raw_cv_text)
+
+def rank_resumes(resume_files, job_description, scoring_mode=STANDARD_SCORING):
+    """Scores of many uploaded resumes, ranked, as (response body, HTTP status)"""
+    try:
+        # Extract every resume; failures are reported per file instead of failing the batch
+        results = []
+        scored = []
+        for index, resume_file in enumerate(resume_files):
+            filename = resume_file.filename or ''
+            try:
+                scored.append((index, filename, *read_resume_features(resume_file, scoring_mode)))
+            except Exception as e:
+                count_error('batch_file')
+                results.append({'index': index, 'filename': filename, 'error': str(e), 'success': False})
+        
+        job = job_features(job_description, scoring_mode)
+        if scoring_mode == MERN_SCORING:
+            resume_results = [mern_result(cv_features, job) for _, _, cv_features, _ in scored]
+        else:
+            scores = matcher.calculate_similarity_batch([cv for _, _, cv, _ in scored], job)
+            resume_results = [standard_result(cv_features, job, score)
+                              for (_, _, cv_features, _), score in zip(scored, scores)]
+        
+        ranked = []
+        for (index, filename, _, truncated), result in zip(scored, resume_results):
+            ranked.append({
+                'index': index,
+                'filename': filename,
+                **result,
+                'truncated': truncated,
+                'success': True
+            })
+        ranked.sort(key=lambda result: result['score'], reverse=True)
+        
+        return {
+            'results': ranked + results,
+            'analyzed': len(ranked),
+            'failed': len(results),
+            'scoringMode': scoring_mode,
+            'success': True,
+            'message': f'{len(ranked)} of {len(ranked) + len(results)} resumes analyzed successfully'
+        }, 200
+        
+    except Exception as e:
+        app.logger.error(f"Error processing resumes: {str(e)}")
+        return {
+            'error': f'Failed to process resumes: {str(e)}',
+            'success': False
+        }, 500
+
+def stream_ranked_resumes(resume_files, job_description, scoring_mode=STANDARD_SCORING):
+    """NDJSON records of resumes as each one is scored (in completion order), then a summary record.
+
+    Unlike rank_resumes nothing is held back until the end: a few resumes are
+    analyzed at a time and each record is written as soon as it is ready.
+    """
+    def analyze(index, resume_file):
+        filename = resume_file.filename or ''
+        try:
+            cv_features, truncated = read_resume_features(resume_file, scoring_mode)
+            return {
+                'index': index,
+                'filename': filename,
+                **score_resume(cv_features, job, scoring_mode),
+                'truncated': truncated,
+                'success': True
+            }
+        except Exception as e:
+            count_error('batch_file')
+            return {'index': index, 'filename': filename, 'error': str(e), 'success': False}
+    
+    analyzed = failed = 0
+    uploads = iter(enumerate(resume_files))
+    try:
+        job = job_features(job_description, scoring_mode)
+        with ThreadPoolExecutor(max_workers=STREAM_WORKERS) as executor:
+            # Keep only a bounded number of resumes in progress
+            pending = {executor.submit(analyze, index, resume_file)
+                       for index, resume_file in islice(uploads, 2 * STREAM_WORKERS)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record = future.result()
+                    if record['success']:
+                        analyzed += 1
+                    else:
+                        failed += 1
+                    for index, resume_file in islice(uploads, 1):
+                        pending.add(executor.submit(analyze, index, resume_file))
+                    yield app.json.dumps(record) + '\n'
+    except Exception as e:
+        app.logger.error(f"Error processing resumes: {str(e)}")
+        yield app.json.dumps({'error': f'Failed to process resumes: {str(e)}', 'success': False}) + '\n'
+        return
+    
+    yield app.json.dumps({
+        'done': True,
+        'analyzed': analyzed,
+        'failed': failed,
+        'scoringMode': scoring_mode,
+        'success': True,
+        'message': f'{analyzed} of {len(resume_files)} resumes analyzed successfully'
+    }) + '\n'
+
+def wants_stream():
+    """Whether the client asked for NDJSON records (Accept: application/x-ndjson or stream=true)"""
+    if request.form.get('stream', '').strip().lower() in ('1', 'true', 'yes'):
+        return True
+    return request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+def read_resume_upload():
+    """The single uploaded resume, or (None, error response) if there is none"""
+    if 'resume' not in request.files:
+        return None, (jsonify({'error': 'No resume file provided', 'success': False}), 400)
+    
+    resume_file = request.files['resume']
+    
+    if not resume_file.filename:
+        return None, (jsonify({'error': 'No file selected', 'success': False}), 400)
+    return resume_file, None
+
+def read_resume_uploads(max_resumes=MAX_BATCH_RESUMES):
+    """The uploaded batch of resumes, or (None, error response) if it is empty or too large"""
+    resume_files = request.files.getlist('resumes')
+    
+    if not resume_files:
+        return None, (jsonify({'error': 'No resume files provided', 'success': False}), 400)
+    
+    if len(resume_files) > max_resumes:
+        return None, (jsonify({'error': f'Too many resumes. Maximum per request is {max_resumes}', 'success': False}), 400)
+    return resume_files, None
+
+@app.errorhandler(413)
+def request_too_large(e):
+    """Bodies over MAX_REQUEST_BYTES, or with more parts than MAX_FORM_PARTS"""
+    return jsonify({'error': f'Request too large. Maximum is {MAX_REQUEST_BYTES // (1024 * 1024)} MB and {MAX_STREAMED_RESUMES} resumes', 'success': False}), 413
+
 @app.route('/api/match-resume', methods=['POST'])
+@instrumented
+@admission_controlled
 def match_resume():
-    temp_file_path = None
+    resume_file, error_response = read_resume_upload()
+    if error_response:
+        return error_response
+    
+    scoring_mode, error_response = read_scoring_mode()
+    if error_response:
+        return error_response
+        
+    job_description, error_response = read_job_description(scoring_mode)
+    if error_response:
+        return error_response
+    
+    body, status = analyze_resume(resume_file, job_description, scoring_mode)
+    return jsonify(body), status
+
+@app.route('/api/match-resumes', methods=['POST'])
+@instrumented
+@admission_controlled
+def match_resumes():
+    """Score many resumes against one job description and return them ranked, or stream them as NDJSON"""
+    stream = wants_stream()
+    resume_files, error_response = read_resume_uploads(MAX_STREAMED_RESUMES if stream else MAX_BATCH_RESUMES)
+    if error_response:
+        return error_response
+    
+    scoring_mode, error_response = read_scoring_mode()
+    if error_response:
+        return error_response
+        
+    job_description, error_response = read_job_description(scoring_mode)
+    if error_response:
+        return error_response
+    
+    if stream:
+        return request.hand_over_uploads(
+            Response(stream_with_context(stream_ranked_resumes(resume_files, job_description, scoring_mode)),
+                     mimetype=NDJSON_MIMETYPE, headers={'X-Accel-Buffering': 'no'}))
+    
+    body, status = rank_resumes(resume_files, job_description, scoring_mode)
+    return jsonify(body), status
+
+def uploaded_documents(resume_files):
+    """(filename, stream) of uploads, to be copied into an analysis job; each is released once copied"""
+    for resume_file in resume_files:
+        with resume_file.stream as upload:
+            yield resume_file.filename or '', upload
+
+def stored_uploads(documents):
+    """Uploads rebuilt from the documents stored with an analysis job, opened one at a time"""
+    for filename, path in documents:
+        with open(path, 'rb') as stream:
+            yield FileStorage(stream=stream, filename=filename)
+
+def job_payload(job_description, scoring_mode):
+    """What an analysis job stores to score against (see stored_job_description)"""
+    if scoring_mode == MERN_SCORING:
+        return {'jobDescription': job_description, 'scoringMode': scoring_mode}
+    return {'preprocessedJd': job_description}
+
+def stored_job_description(payload):
+    """(job description, scoring mode) stored with an analysis job"""
+    if payload.get('scoringMode') == MERN_SCORING:
+        return payload['jobDescription'], MERN_SCORING
+    return payload['preprocessedJd'], STANDARD_SCORING
+
+def run_match_resume_job(payload, documents):
+    with closing(stored_uploads(documents)) as uploads:
+        return analyze_resume(next(uploads), *stored_job_description(payload))
+
+def run_match_resumes_job(payload, documents):
+    return rank_resumes(stored_uploads(documents), *stored_job_description(payload))
+
+# Durable queue of analyses submitted for asynchronous processing (see analysis_jobs.py);
+# its workers are started in each serving process, never in the gunicorn master
+analysis_jobs = AnalysisJobQueue()
+analysis_job_workers = AnalysisJobWorkers(analysis_jobs, {
+    'match-resume': run_match_resume_job,
+    'match-resumes': run_match_resumes_job
+})
+
+def submit_analysis_job(kind, resume_files, job_description, scoring_mode):
+    """Queue an analysis and answer 202 with where to poll for it"""
+    callback_url = request.form.get('callbackUrl', '').strip() or None
+    if callback_url:
+        try:
+            validate_callback_url(callback_url)
+        except ValueError as e:
+            return jsonify({'error': str(e), 'success': False}), 400
+    
+    try:
+        job_id = analysis_jobs.submit(kind, job_payload(job_description, scoring_mode),
+                                      uploaded_documents(resume_files), callback_url)
+    except Rejected as e:
+        response = jsonify({'error': str(e), 'success': False})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, e.status
+    analysis_job_workers.wake()
+    
+    status_url = f'/api/analysis-jobs/{job_id}'
+    response = jsonify({
+        'jobId': job_id,
+        'status': 'queued',
+        'statusUrl': status_url,
+        'success': True,
+        'message': 'Analysis queued'
+    })
+    response.headers['Location'] = status_url
+    return response, 202
+
+@app.route('/api/analysis-jobs/match-resume', methods=['POST'])
+@instrumented
+def submit_match_resume():
+    """Queue /api/match-resume; the result is fetched from /api/analysis-jobs/<job_id>"""
+    resume_file, error_response = read_resume_upload()
+    if error_response:
+        return error_response
+    
+    scoring_mode, error_response = read_scoring_mode()
+    if error_response:
+        return error_response
+    
+    job_description, error_response = read_job_description(scoring_mode)
+    if error_response:
+        return error_response
+    
+    file_ext = os.path.splitext(resume_file.filename)[1].lower()
+    if file_ext not in ALLOWED_EXTENSIONS:
+        return jsonify({'error': f'Unsupported file type. Please use: {", ".join(ALLOWED_EXTENSIONS)}', 'success': False}), 400
+    
+    return submit_analysis_job('match-resume', [resume_file], job_description, scoring_mode)
+
+@app.route('/api/analysis-jobs/match-resumes', methods=['POST'])
+@instrumented
+def submit_match_resumes():
+    """Queue /api/match-resumes; the result is fetched from /api/analysis-jobs/<job_id>"""
+    resume_files, error_response = read_resume_uploads()
+    if error_response:
+        return error_response
+    
+    scoring_mode, error_response = read_scoring_mode()
+    if error_response:
+        return error_response
+    
+    job_description, error_response = read_job_description(scoring_mode)
+    if error_response:
+        return error_response
+    
+    return submit_analysis_job('match-resumes', resume_files, job_description, scoring_mode)
+
+@app.route('/api/analysis-jobs/<job_id>', methods=['GET'])
+def get_analysis_job(job_id):
+    """Status of an analysis job; once finished, 'result' is the body the synchronous endpoint would return"""
+    job = analysis_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown analysis job', 'success': False}), 404
+    return jsonify({**job, 'success': True})
+
+@app.route('/api/analysis-jobs', methods=['GET'])
+def analysis_job_stats():
+    return jsonify({**analysis_jobs.stats(), 'workersRunning': analysis_job_workers.running, 'success': True})
+
+@app.route('/api/job-profiles', methods=['POST'])
+def register_job_profile():
+    """Precompute a job profile so resumes can be scored against it by ID"""
+    data = request.get_json(silent=True) or request.form
+    job_description = (data.get('jobDescription') or '').strip()
+    
+    if not job_description:
+        return jsonify({'error': 'Job description is required', 'success': False}), 400
+    
+    job_profile = matcher.job_profiles.register(matcher.preprocess_text(job_description))
+    return jsonify({**job_profile.summary(), 'success': True, 'message': 'Job profile registered'}), 201
+
+@app.route('/api/job-profiles/<profile_id>', methods=['GET'])
+def get_job_profile(profile_id):
+    job_profile = matcher.job_profiles.get(profile_id)
+    if job_profile is None:
+        return jsonify({'error': 'Unknown job profile', 'success': False}), 404
+    return jsonify({**job_profile.summary(), 'success': True})
+
+@app.route('/api/job-profiles/<profile_id>', methods=['DELETE'])
+def delete_job_profile(profile_id):
+    if not matcher.job_profiles.unregister(profile_id):
+        return jsonify({'error': 'Unknown job profile', 'success': False}), 404
+    return jsonify({'success': True, 'message': 'Job profile removed'})
+
+@app.route('/api/resume-index/<resume_id>', methods=['PUT'])
+@instrumented
+@admission_controlled
+def index_resume(resume_id):
+    """Add a resume to the search index, or replace the one stored under this ID"""
     try:
-        # Check if file is present
         if 'resume' not in request.files:
             return jsonify({'error': 'No resume file provided', 'success': False}), 400
         
         resume_file = request.files['resume']
-        job_description = request.form.get('jobDescription', '').strip()
+        file_ext = os.path.splitext(resume_file.filename or '')[1].lower()
+        if file_ext not in ALLOWED_EXTENSIONS:
+            return jsonify({'error': f'Unsupported file type. Please use: {", ".join(ALLOWED_EXTENSIONS)}', 'success': False}), 400
         
-        if not resume_file.filename:
-            return jsonify({'error': 'No file selected', 'success': False}), 400
-            
-        if not job_description:
-            return jsonify({'error': 'Job description is required', 'success': False}), 400
-        
-        # Validate file type
-        allowed_extensions = ['.pdf', '.docx', '.txt']
-        file_ext = os.path.splitext(resume_file.filename)[1].lower()
-        if file_ext not in allowed_extensions:
-            return jsonify({'error': f'Unsupported file type. Please use: {", ".join(allowed_extensions)}', 'success': False}), 400
-        
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as tmp_file:
-            temp_file_path = tmp_file.name
-            resume_file.save(temp_file_path)
-        
-        # Extract and process text
-        raw_cv_text = matcher.extract_text_from_path(temp_file_path)
+        try:
+            raw_cv_text = extract_uploaded_text(resume_file)
+        except ExtractionError as e:
+            return jsonify({'error': f'Could not extract text from the resume file: {str(e)}', 'success': False}), 422
         
         if not raw_cv_text.strip():
             return jsonify({'error': 'Could not extract text from the resume file', 'success': False}), 400
         
-        preprocessed_cv = matcher.preprocess_text(raw_cv_text)
-        preprocessed_jd = matcher.preprocess_text(job_description)
+        replaced = resume_id in resume_index
+        with stage_timer('preprocess'):
+            preprocessed_cv = matcher.preprocess_text(raw_cv_text)
+        indexed = resume_index.add(resume_id, preprocessed_cv, {'filename': resume_file.filename})
         
-        # Calculate similarity and generate feedback
-        score = matcher.calculate_similarity(preprocessed_cv, preprocessed_jd)
-        feedback = matcher.generate_detailed_feedback(preprocessed_cv, preprocessed_jd, score)
+        return jsonify({
+            'resumeId': indexed.id,
+            'words': indexed.length,
+            'replaced': replaced,
+            'truncated': truncation_of(raw_cv_text),
+            'success': True,
+            'message': 'Resume indexed'
+        }), 200 if replaced else 201
         
-        # Determine match level with more realistic thresholds
-        if score >= 75:
-            match_level = "Excellent Match"
-        elif score >= 60:
-            match_level = "Good Match"
-        elif score >= 40:
-            match_level = "Fair Match"
-        else:
-            match_level = "Needs Improvement"
+    except Exception as e:
+        app.logger.error(f"Error indexing resume: {str(e)}")
+        return jsonify({
+            'error': f'Failed to index resume: {str(e)}',
+            'success': False
+        }), 500
+
+@app.route('/api/resume-index/<resume_id>', methods=['DELETE'])
+def unindex_resume(resume_id):
+    if not resume_index.delete(resume_id):
+        return jsonify({'error': 'Unknown resume', 'success': False}), 404
+    return jsonify({'success': True, 'message': 'Resume removed from the index'})
+
+@app.route('/api/resume-index/search', methods=['POST'])
+@instrumented
+@admission_controlled
+def search_resume_index():
+    """Top-K stored resumes for a job description, scored as /api/match-resume would score them"""
+    try:
+        preprocessed_jd, error_response = read_job_description()
+        if error_response:
+            return error_response
+        
+        try:
+            top_k = int(request.form.get('topK', 10))
+        except ValueError:
+            return jsonify({'error': 'topK must be an integer', 'success': False}), 400
+        if not 1 <= top_k <= MAX_SEARCH_RESULTS:
+            return jsonify({'error': f'topK must be between 1 and {MAX_SEARCH_RESULTS}', 'success': False}), 400
+        
+        results = resume_index.search(preprocessed_jd, top_k)
         
         return jsonify({
-            'score': score,
-            'feedback': feedback,
-            'matchLevel': match_level,
-            'success': True,
-            'message': 'Resume analyzed successfully'
+            'results': [{
+                'rank': rank,
+                'resumeId': indexed.id,
+                'score': score,
+                'matchLevel': get_match_level(score),
+                'metadata': indexed.metadata
+            } for rank, (score, indexed) in enumerate(results, 1)],
+            'indexed': len(resume_index),
+            'success': True
         })
         
     except Exception as e:
-        app.logger.error(f"Error processing resume: {str(e)}")
+        app.logger.error(f"Error searching resumes: {str(e)}")
         return jsonify({
-            'error': f'Failed to process resume: {str(e)}',
+            'error': f'Failed to search resumes: {str(e)}',
             'success': False
         }), 500
-    
-    finally:
-        # Clean up temporary file
-        if temp_file_path and os.path.exists(temp_file_path):
-            try:
-                os.unlink(temp_file_path)
-            except:
-                pass
+
+@app.route('/api/resume-index', methods=['GET'])
+def resume_index_stats():
+    return jsonify({**resume_index.stats(), 'success': True})
+
+@app.route('/api/feature-store', methods=['GET'])
+def feature_store_stats():
+    return jsonify({**feature_store.stats(), 'success': True})
 
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({'status': 'healthy', 'service': 'improved-resume-matcher'})
 
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness for load balancers: warmed up and with room in the analysis queue"""
+    stats = admission.stats()
+    warmed_up = matcher.warmed_up and mern_matcher.warmed_up
+    ready = warmed_up and stats['queued'] < admission.max_queued
+    return jsonify({
+        'ready': ready,
+        'warmedUp': warmed_up,
+        'queueDepth': stats['queued'],
+        'inFlight': stats['inFlight'],
+        'maxInFlight': stats['maxInFlight'],
+        'maxQueued': stats['maxQueued'],
+        'rejected': stats['rejected'],
+        'pid': os.getpid()
+    }), 200 if ready else 503
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics"""
+    body, content_type = render_metrics()
+    return body, 200, {'Content-Type': content_type}
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify({
+        'extractionCache': matcher.extraction_cache.stats(),
+        'jobProfiles': matcher.job_profiles.stats(),
+        'extractionPool': matcher.extraction_pool.stats() if matcher.extraction_pool else None,
+        'success': True
+    })
+
 if __name__ == '__main__':
-    app.run(debug=True, port=5001, host='0.0.0.0')
\ No newline at end of file
+    # Development server; use gunicorn.conf.py for production
+    matcher.warm_up()
+    mern_matcher.warm_up()
+    resume_index.sync()
+    analysis_job_workers.start()
+    app.run(debug=True, port=5001, host='0.0.0.0')
@@ -0,0 +1,228 @@
+"""Vectorized scoring of M resumes against N job descriptions.
+
+calculate_similarity computes each component of one pair's score with
+Python sets. A ScoringEngine encodes all the resumes and job descriptions as
+sparse matrices over the job descriptions' terms, computes every component
+for all M×N pairs with sparse matrix products, and applies the score scaling
+and bonuses with NumPy (ImprovedResumeMatcher.combine_scores_array).
+
+The result equals calculate_similarity for every pair. Overlap counts and
+ratios are computed with the same arithmetic; only the TF-IDF cosine is
+summed in a different order than the per-pair fit. The few cells where that
+last-bit difference could change the rounded score are scored pair by pair:
+a base score at a scaling threshold, a score at a rounding half-point, or a
+pair whose joint vocabulary exceeds max_features.
+"""
+
+import numpy as np
+from scipy import sparse
+
+from metrics import count_error
+
+# Distances within which float error in the TF-IDF part could change a score
+THRESHOLD_TOLERANCE = 1e-9      # base score to a scaling threshold
+HALF_POINT_TOLERANCE = 1e-6     # score, in hundredths, to a rounding half-point
+SCALING_THRESHOLDS = (0.7, 0.5, 0.3, 0.15)
+
+NO_HASHES = np.zeros(0, dtype=np.uint64)
+
+
+def vocabulary_of(rows):
+    """Term -> column for every term of some rows, in order of appearance"""
+    vocabulary = {}
+    for terms in rows:
+        for term in terms:
+            vocabulary.setdefault(term, len(vocabulary))
+    return vocabulary
+
+
+def term_matrix(rows, vocabulary, weights=False):
+    """Rows of terms (or term -> weight dicts with weights) as a CSR matrix; terms outside the vocabulary are dropped"""
+    indptr, indices, data = [0], [], []
+    for terms in rows:
+        for term in terms:
+            column = vocabulary.get(term)
+            if column is not None:
+                indices.append(column)
+                data.append(terms[term] if weights else 1.0)
+        indptr.append(len(indices))
+    return sparse.csr_matrix((np.array(data, dtype=np.float64), indices, indptr), shape=(len(rows), len(vocabulary)))
+
+
+def hash_matrix(rows, vocabulary):
+    """Rows of sorted hash arrays as a binary CSR matrix over a sorted hash vocabulary; hashes outside it are dropped"""
+    hashes = np.concatenate(rows) if rows else np.zeros(0, dtype=np.uint64)
+    row_of = np.repeat(np.arange(len(rows)), [len(row) for row in rows])
+    if len(vocabulary):
+        columns = np.minimum(np.searchsorted(vocabulary, hashes), len(vocabulary) - 1)
+        present = vocabulary[columns] == hashes
+    else:
+        columns = np.zeros(len(hashes), dtype=np.int64)
+        present = np.zeros(len(hashes), dtype=bool)
+    return sparse.csr_matrix((np.ones(int(present.sum())), (row_of[present], columns[present])),
+                             shape=(len(rows), len(vocabulary)))
+
+
+def pair_products(cv_matrix, jd_matrix):
+    """Dense M×N products of resume rows with job rows"""
+    return (cv_matrix @ jd_matrix.T).toarray()
+
+
+def ratios(counts, totals):
+    """counts / total per job column, 0 for jobs with nothing to match"""
+    totals = np.asarray(totals, dtype=np.float64)
+    return np.divide(counts, totals, out=np.zeros_like(counts), where=totals > 0)
+
+
+class ScoringEngine:
+    """Score matrices for ImprovedResumeMatcher"""
+
+    def __init__(self, matcher):
+        self.matcher = matcher
+
+    def score_matrix(self, cv_texts, job_descriptions):
+        """M×N array of calculate_similarity(cv_texts[i], job_descriptions[j]).
+
+        cv_texts are preprocessed resumes or their DocumentFeatures,
+        job_descriptions preprocessed job descriptions.
+        """
+        matcher = self.matcher
+        cv_features = [matcher.features_of(cv_text) for cv_text in cv_texts]
+        scores = np.zeros((len(cv_features), len(job_descriptions)))
+
+        # Empty documents score 0
+        rows = [i for i, features in enumerate(cv_features) if features.text]
+        columns = [j for j, job_description in enumerate(job_descriptions) if job_description]
+        if not rows or not columns:
+            return scores
+
+        cvs = [cv_features[i] for i in rows]
+        jobs = [matcher.job_profiles.get_or_build(job_descriptions[j]) for j in columns]
+        block, ambiguous = self._score_block(cvs, jobs)
+
+        for i, j in zip(*np.nonzero(ambiguous)):
+            block[i, j] = matcher.calculate_similarity(cvs[i], jobs[j].text)
+        scores[np.ix_(rows, columns)] = block
+        return scores
+
+    def _score_block(self, cvs, jobs):
+        """Rounded scores of non-empty resumes against job profiles, and the cells to score pair by pair"""
+        matcher = self.matcher
+
+        # 1. Direct word matching
+        words = vocabulary_of(job.words for job in jobs)
+        word_match_ratio = ratios(
+            pair_products(term_matrix([cv.token_set for cv in cvs], words), term_matrix([job.words for job in jobs], words)),
+            [len(job.words) for job in jobs])
+
+        # 2. Required skills: 1 when present, else 0.5 per fuzzily matched job term
+        skill_match_score = ratios(self._skill_matches(cvs, jobs), [max(len(job.skills), 1) for job in jobs])
+
+        # 3. Key technical terms
+        tech_terms = vocabulary_of(job.tech_terms for job in jobs)
+        tech_terms_ratio = ratios(
+            pair_products(term_matrix([cv.tech_terms for cv in cvs], tech_terms),
+                          term_matrix([job.tech_terms for job in jobs], tech_terms)),
+            [len(job.tech_terms) for job in jobs])
+
+        # 4. Bigrams (hashed; see document_features.ngram_hashes)
+        job_bigrams = [job.bigrams if job.bigrams is not None else NO_HASHES for job in jobs]
+        bigrams = np.unique(np.concatenate(job_bigrams))
+        bigram_ratio = ratios(
+            pair_products(hash_matrix([cv.bigrams if cv.bigrams is not None else NO_HASHES for cv in cvs], bigrams),
+                          hash_matrix(job_bigrams, bigrams)),
+            [len(hashes) for hashes in job_bigrams])
+
+        # 5. TF-IDF and length bonus
+        tfidf_similarity, oversized = self._tfidf(cvs, jobs)
+        cv_lengths = np.array([cv.length for cv in cvs], dtype=np.float64)
+        jd_lengths = np.array([max(job.length, 100) for job in jobs], dtype=np.float64)
+        length_bonus = np.minimum(cv_lengths[:, None] / jd_lengths[None, :], 1.0) * 0.1
+
+        final_score, base_score = matcher.combine_scores_array(
+            word_match_ratio, skill_match_score, tech_terms_ratio, bigram_ratio, tfidf_similarity, length_bonus)
+        scores = np.round(final_score, 2)
+
+        hundredths = final_score * 100
+        ambiguous = oversized | (np.abs(hundredths - np.floor(hundredths) - 0.5) < HALF_POINT_TOLERANCE)
+        for threshold in SCALING_THRESHOLDS:
+            ambiguous |= np.abs(base_score - threshold) < THRESHOLD_TOLERANCE
+
+        # Pairs whose bigrams could not be built score 15.0, like a failed comparison
+        failed = np.array([cv.bigrams is None for cv in cvs])[:, None] | np.array([job.bigrams is None for job in jobs])[None, :]
+        scores[failed] = 15.0
+        if failed.any():
+            print(f"Error calculating similarity: bigrams could not be built for {int(failed.sum())} pairs")
+            count_error('scoring', int(failed.sum()))
+        return scores, ambiguous & ~failed
+
+    def _skill_matches(self, cvs, jobs):
+        matcher = self.matcher
+        matches = np.zeros((len(cvs), len(jobs)))
+        if not any(job.skills for job in jobs):
+            return matches
+
+        cv_categories = [matcher.skill_categories(cv.skill_hits) for cv in cvs]
+        fuzzy_terms = vocabulary_of(jd_terms for job in jobs for _, _, jd_terms in job.skills)
+        cv_fuzzy = term_matrix([matcher.fuzzy_terms(cv) for cv in cvs], fuzzy_terms) if fuzzy_terms else None
+
+        for skill_category in matcher.skill_synonyms:
+            required = [[jd_terms for category, _, jd_terms in job.skills if category == skill_category] for job in jobs]
+            if not any(required):
+                continue
+            required_by = np.array([bool(terms) for terms in required], dtype=np.float64)
+            has_skill = np.array([skill_category in categories for categories in cv_categories], dtype=np.float64)[:, None]
+            if cv_fuzzy is not None:
+                fuzzy_matches = pair_products(cv_fuzzy, term_matrix([terms[0] if terms else () for terms in required], fuzzy_terms))
+            else:
+                fuzzy_matches = 0.0
+            matches += required_by[None, :] * (has_skill + (1 - has_skill) * 0.5 * fuzzy_matches)
+        return matches
+
+    def _tfidf(self, cvs, jobs):
+        """TF-IDF cosines (M×N) and the pairs whose per-pair fit would be truncated to max_features"""
+        matcher = self.matcher
+        no_pairs = np.zeros((len(cvs), len(jobs)), dtype=bool)
+
+        if matcher.tfidf_model is not None:
+            # Corpus model: rows are L2-normalised, the cosine is a dot product
+            cv_vectors = self.tfidf_vectors(cvs)
+            jd_vectors = sparse.vstack([job.tfidf_vector for job in jobs], format='csr')
+            return pair_products(cv_vectors, jd_vectors), no_pairs
+
+        # Fitting a pair alone weighs a term by IDF 1 when both documents have it and
+        # 1 + ln(1.5) otherwise (see batch_tfidf_similarity), so every cosine follows
+        # from the weights of the terms a pair shares plus each document's squared norm
+        cv_weights = self.term_weights(cvs)
+        ngrams = vocabulary_of(job.term_weights for job in jobs)
+        cv_matrix = term_matrix(cv_weights, ngrams, weights=True)
+        jd_matrix = term_matrix([job.term_weights for job in jobs], ngrams, weights=True)
+        cv_present, jd_present = cv_matrix.sign(), jd_matrix.sign()
+        unique_weight = (1 + np.log(1.5)) ** 2
+
+        cv_squared = np.array([sum(weight ** 2 for weight in weights.values()) for weights in cv_weights])
+        cv_shared = pair_products(cv_matrix.multiply(cv_matrix), jd_present)
+        cv_norms = cv_shared + unique_weight * (cv_squared[:, None] - cv_shared)
+        jd_squared = np.array([job.squared_norm for job in jobs])
+        jd_shared = pair_products(cv_present, jd_matrix.multiply(jd_matrix))
+        jd_norms = jd_shared + unique_weight * (jd_squared[None, :] - jd_shared)
+
+        dots = pair_products(cv_matrix, jd_matrix)
+        denominators = np.sqrt(cv_norms * jd_norms)
+        similarities = np.divide(dots, denominators, out=np.zeros_like(dots), where=denominators > 0)
+
+        max_features = matcher.vectorizer.max_features
+        if not max_features:
+            return similarities, no_pairs
+        pair_vocabulary = (np.array([len(weights) for weights in cv_weights])[:, None]
+                           + np.array([len(job.term_weights) for job in jobs])[None, :]
+                           - pair_products(cv_present, jd_present))
+        return similarities, pair_vocabulary > max_features
+
+    def term_weights(self, cvs):
+        """TF-IDF n-gram -> sublinear term frequency of each resume"""
+        return [self.matcher.tfidf_term_weights(cv.text) for cv in cvs]
+
+    def tfidf_vectors(self, cvs):
+        """The resumes' rows from the corpus TF-IDF model"""
+        return self.matcher.tfidf_model.transform([cv.text for cv in cvs])
@@ -0,0 +1,170 @@
+"""Aho-Corasick automaton for matching a whole skill dictionary in one pass.
+
+The matchers used to run one regex or substring scan per skill term, so the
+cost of every request grew with the size of the taxonomy. The automaton is
+built once from the skill dictionaries and reports every hit, with its offset,
+in a single left-to-right scan of the document.
+"""
+
+from collections import deque
+
+
+def is_word_char(ch):
+    """Same definition of a word character as the regex \\w class"""
+    return ch.isalnum() or ch == '_'
+
+
+def is_word_boundary(text, position):
+    """Equivalent of the regex \\b assertion at a position in text"""
+    before = position > 0 and is_word_char(text[position - 1])
+    after = position < len(text) and is_word_char(text[position])
+    return before != after
+
+
+class SkillAutomaton:
+    """Multi-pattern matcher over a dictionary of lowercase skill terms.
+
+    Terms are lowercased when added and documents are expected to be lowercase
+    already, as both matchers lowercase text before looking for skills. Each
+    term can carry any number of payloads (e.g. the skill categories it belongs
+    to). With collapse_whitespace a space inside a term matches any run of
+    whitespace, like \\s+ in a regex.
+    """
+
+    def __init__(self, terms=(), collapse_whitespace=False):
+        self.collapse_whitespace = collapse_whitespace
+        self._terms = []
+        self._payloads = []
+        self._term_ids = {}
+        self._goto = [{}]
+        self._fail = [0]
+        self._outputs = [()]
+        self._dirty = False
+
+        for term in terms:
+            self.add(term)
+
+    def __len__(self):
+        return len(self._terms)
+
+    def __contains__(self, term):
+        return self._normalize(term) in self._term_ids
+
+    def _normalize(self, term):
+        term = term.lower().strip()
+        if self.collapse_whitespace:
+            term = " ".join(term.split())
+        return term
+
+    def add(self, term, payload=None):
+        """Add a term (and optionally a payload reported with its hits)"""
+        term = self._normalize(term)
+        if not term:
+            raise ValueError("Cannot add an empty term")
+
+        term_id = self._term_ids.get(term)
+        if term_id is None:
+            term_id = len(self._terms)
+            self._term_ids[term] = term_id
+            self._terms.append(term)
+            self._payloads.append([])
+
+            # Extend the trie
+            state = 0
+            for ch in term:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                state = next_state
+            self._dirty = True
+
+        if payload is not None and payload not in self._payloads[term_id]:
+            self._payloads[term_id].append(payload)
+
+    def payloads(self, term):
+        """Payloads registered for a term"""
+        term_id = self._term_ids.get(self._normalize(term))
+        return list(self._payloads[term_id]) if term_id is not None else []
+
+    def build(self):
+        """Compute failure links and merged outputs (done lazily before a scan)"""
+        goto, fail = self._goto, self._fail
+
+        # Own outputs are the terms ending exactly at a state
+        outputs = [()] * len(goto)
+        for term_id, term in enumerate(self._terms):
+            state = 0
+            for ch in term:
+                state = goto[state][ch]
+            outputs[state] = (term_id,)
+
+        # Breadth-first so that every failure target is complete before use
+        queue = deque()
+        for state in goto[0].values():
+            fail[state] = 0
+            queue.append(state)
+
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in goto[state].items():
+                fallback = fail[state]
+                while fallback and ch not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(ch, 0)
+                outputs[next_state] = outputs[next_state] + outputs[fail[next_state]]
+                queue.append(next_state)
+
+        self._outputs = outputs
+        self._dirty = False
+
+    def find_all(self, text, whole_words=True):
+        """Return (start, end, term, payloads) for every occurrence of every term.
+
+        Hits are ordered by end offset. With whole_words only hits delimited by
+        word boundaries on both sides (as with \\b...\\b) are reported; without
+        it every substring occurrence is, as with `term in text`.
+        """
+        if self._dirty:
+            self.build()
+
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        terms, payloads = self._terms, self._payloads
+        collapse = self.collapse_whitespace
+        positions = []
+        previous_space = False
+        state = 0
+        hits = []
+
+        for index, ch in enumerate(text):
+            if collapse:
+                if ch.isspace():
+                    if previous_space:
+                        continue
+                    previous_space = True
+                    ch = ' '
+                else:
+                    previous_space = False
+                positions.append(index)
+
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+
+            for term_id in outputs[state]:
+                end = index + 1
+                if collapse:
+                    start = positions[len(positions) - len(terms[term_id])]
+                else:
+                    start = end - len(terms[term_id])
+                if whole_words and not (is_word_boundary(text, start) and is_word_boundary(text, end)):
+                    continue
+                hits.append((start, end, terms[term_id], payloads[term_id]))
+
+        return hits
+
+    def terms_in(self, text, whole_words=False):
+        """Set of terms occurring anywhere in text"""
+        return set(term for _, _, term, _ in self.find_all(text, whole_words))
@@ -1,614 +1,25 @@
+import hashlib
+import json
 import os
-import pdfplumber
-import docx
-import string
-import nltk
+import time
 import streamlit as st
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import PorterStemmer
-import re
-from difflib import SequenceMatcher
-import numpy as np
-from collections import Counter
-import json
-
-# Download required NLTK data
-try:
-    nltk.download('stopwords', quiet=True)
-    nltk.download('punkt', quiet=True)
-except:
-    pass
-
-class EnhancedMERNResumeMatcher:
-    def __init__(self):
-        # Advanced TF-IDF configuration for better semantic understanding
-        self.vectorizer = TfidfVectorizer(
-            max_features=25000,
-            stop_words=None,
-            ngram_range=(1, 4),  # Extended n-grams for better phrase matching
-            min_df=1,
-            max_df=0.95,
-            sublinear_tf=True,
-            token_pattern=r'\b\w+(?:\.\w+)*\b',  # Better pattern for tech terms
-            lowercase=True,
-            use_idf=True
-        )
-        self.stemmer = PorterStemmer()
-        
-        # Enhanced skill categories with weighted importance for MERN stack
-        self.skill_categories = {
-            # Core MERN Stack (High Priority)
-            'mongodb': {
-                'terms': ['mongodb', 'mongo', 'mongoose', 'atlas', 'nosql', 'document database', 'bson'],
-                'weight': 2.5,
-                'category': 'Database'
-            },
-            'express': {
-                'terms': ['express', 'expressjs', 'express.js', 'express server', 'middleware'],
-                'weight': 2.5,
-                'category': 'Backend Framework'
-            },
-            'react': {
-                'terms': ['react', 'reactjs', 'react.js', 'jsx', 'react hooks', 'react router', 'redux', 
-                         'context api', 'react native', 'next.js', 'nextjs', 'gatsby'],
-                'weight': 2.5,
-                'category': 'Frontend Framework'
-            },
-            'nodejs': {
-                'terms': ['nodejs', 'node.js', 'node', 'npm', 'yarn', 'event loop', 'async/await'],
-                'weight': 2.5,
-                'category': 'Runtime Environment'
-            },
-            
-            # Essential JavaScript/TypeScript (High Priority)
-            'javascript': {
-                'terms': ['javascript', 'js', 'ecmascript', 'es6', 'es2015', 'es2017', 'es2020', 
-                         'vanilla js', 'modern javascript', 'async', 'promises', 'closures'],
-                'weight': 2.0,
-                'category': 'Programming Language'
-            },
-            'typescript': {
-                'terms': ['typescript', 'ts', 'type annotations', 'interfaces', 'generics'],
-                'weight': 1.8,
-                'category': 'Programming Language'
-            },
-            
-            # Frontend Technologies (Medium-High Priority)
-            'html_css': {
-                'terms': ['html', 'html5', 'css', 'css3', 'sass', 'scss', 'less', 'responsive design',
-                         'flexbox', 'grid', 'bootstrap', 'tailwind', 'material-ui', 'styled-components'],
-                'weight': 1.5,
-                'category': 'Frontend Technologies'
-            },
-            
-            # State Management (Medium-High Priority)
-            'state_management': {
-                'terms': ['redux', 'redux toolkit', 'context api', 'zustand', 'recoil', 'mobx',
-                         'state management', 'global state'],
-                'weight': 1.8,
-                'category': 'State Management'
-            },
-            
-            # Development Tools (Medium Priority)
-            'development_tools': {
-                'terms': ['webpack', 'babel', 'vite', 'parcel', 'eslint', 'prettier', 'git', 'github',
-                         'gitlab', 'version control', 'npm', 'yarn', 'package manager'],
-                'weight': 1.3,
-                'category': 'Development Tools'
-            },
-            
-            # Testing (Medium Priority)
-            'testing': {
-                'terms': ['jest', 'enzyme', 'react testing library', 'cypress', 'selenium', 'mocha',
-                         'chai', 'unit testing', 'integration testing', 'e2e testing', 'tdd', 'bdd'],
-                'weight': 1.4,
-                'category': 'Testing'
-            },
-            
-            # Cloud & Deployment (Medium Priority)
-            'cloud_deployment': {
-                'terms': ['aws', 'azure', 'gcp', 'heroku', 'netlify', 'vercel', 'docker', 'kubernetes',
-                         'k8s', 'ci/cd', 'jenkins', 'github actions', 'gitlab ci'],
-                'weight': 1.3,
-                'category': 'Cloud & Deployment'
-            },
-            
-            # API & Communication (Medium Priority)
-            'api_communication': {
-                'terms': ['rest', 'restful', 'api', 'graphql', 'apollo', 'axios', 'fetch', 'websockets',
-                         'socket.io', 'jwt', 'authentication', 'authorization'],
-                'weight': 1.6,
-                'category': 'API & Communication'
-            },
-            
-            # Additional Databases (Lower Priority for MERN but relevant)
-            'other_databases': {
-                'terms': ['postgresql', 'mysql', 'redis', 'elasticsearch', 'firebase', 'firestore'],
-                'weight': 1.0,
-                'category': 'Additional Databases'
-            },
-            
-            # Soft Skills & Methodologies (Lower Priority but Important)
-            'methodologies': {
-                'terms': ['agile', 'scrum', 'kanban', 'sprint', 'jira', 'trello', 'collaboration',
-                         'team work', 'problem solving', 'debugging'],
-                'weight': 0.8,
-                'category': 'Methodologies'
-            }
-        }
-
-    def extract_text(self, file):
-        """Enhanced text extraction with better error handling"""
-        if hasattr(file, 'name'):
-            _, ext = os.path.splitext(file.name)
-        else:
-            raise ValueError("Invalid file object")
-            
-        ext = ext.lower().strip()
-        text = ""
-
-        try:
-            if ext == ".pdf":
-                with pdfplumber.open(file) as pdf:
-                    for page in pdf.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text += page_text + " "
-                        
-                        # Extract text from tables if present
-                        tables = page.extract_tables()
-                        for table in tables:
-                            for row in table:
-                                if row:
-                                    text += " ".join([cell for cell in row if cell]) + " "
-                                    
-            elif ext == ".docx":
-                doc = docx.Document(file)
-                # Extract from paragraphs
-                text = " ".join([para.text for para in doc.paragraphs])
-                
-                # Extract from tables
-                for table in doc.tables:
-                    for row in table.rows:
-                        for cell in row.cells:
-                            text += " " + cell.text
-                            
-            elif ext == ".txt":
-                text = file.read().decode("utf-8")
-            else:
-                raise ValueError(f"Unsupported file format: '{ext}'. Use PDF, DOCX, or TXT.")
-                
-            return text.strip()
-            
-        except Exception as e:
-            raise ValueError(f"Error extracting text from {ext} file: {str(e)}")
-
-    def advanced_text_preprocessing(self, text):
-        """Advanced preprocessing specifically optimized for tech resumes"""
-        if not text:
-            return ""
-        
-        # Normalize text
-        text = text.lower()
-        
-        # Handle common tech abbreviations and variations
-        tech_normalizations = {
-            r'\bnode\.?js\b': 'nodejs',
-            r'\breact\.?js\b': 'react',
-            r'\bexpress\.?js\b': 'express',
-            r'\bnext\.?js\b': 'nextjs',
-            r'\bmongo\s*db\b': 'mongodb',
-            r'\btype\s*script\b': 'typescript',
-            r'\bj\s*s\b': 'javascript',
-            r'\bhtml\s*5?\b': 'html',
-            r'\bcss\s*3?\b': 'css',
-            r'\brest\s*ful?\b': 'restful',
-            r'\bapi\s*s?\b': 'api',
-            r'\bci\s*/?\s*cd\b': 'cicd',
-            r'\baws\b': 'amazon web services',
-            r'\bgcp\b': 'google cloud platform'
-        }
-        
-        for pattern, replacement in tech_normalizations.items():
-            text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
-        
-        # Clean up whitespace and special characters
-        text = re.sub(r'[^\w\s\.\+\#\-/]', ' ', text)
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Keep technical terms and remove only basic stop words
-        basic_stopwords = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 
-                          'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being'}
-        
-        words = text.split()
-        filtered_words = [word for word in words 
-                         if word not in basic_stopwords or len(word) <= 3 or word.isdigit()]
-        
-        return " ".join(filtered_words)
-
-    def extract_skills_with_context(self, text):
-        """Extract skills with surrounding context for better matching"""
-        skills_found = {}
-        text_lower = text.lower()
-        
-        for skill_name, skill_data in self.skill_categories.items():
-            terms = skill_data['terms']
-            weight = skill_data['weight']
-            category = skill_data['category']
-            
-            skill_matches = []
-            for term in terms:
-                # Look for the term with context
-                pattern = rf'\b{re.escape(term)}\b'
-                matches = list(re.finditer(pattern, text_lower))
-                
-                for match in matches:
-                    start, end = match.span()
-                    # Get context around the match
-                    context_start = max(0, start - 50)
-                    context_end = min(len(text_lower), end + 50)
-                    context = text_lower[context_start:context_end]
-                    
-                    skill_matches.append({
-                        'term': term,
-                        'context': context,
-                        'position': start
-                    })
-            
-            if skill_matches:
-                skills_found[skill_name] = {
-                    'matches': skill_matches,
-                    'count': len(skill_matches),
-                    'weight': weight,
-                    'category': category
-                }
-        
-        return skills_found
-
-    def calculate_semantic_similarity(self, cv_text, jd_text):
-        """Advanced semantic similarity using multiple techniques"""
-        try:
-            # TF-IDF Cosine Similarity
-            vectors = self.vectorizer.fit_transform([cv_text, jd_text])
-            tfidf_similarity = cosine_similarity(vectors[0], vectors[1])[0][0]
-            
-            # Jaccard Similarity for exact matches
-            cv_words = set(cv_text.split())
-            jd_words = set(jd_text.split())
-            jaccard_sim = len(cv_words.intersection(jd_words)) / len(cv_words.union(jd_words))
-            
-            # N-gram overlap
-            def get_ngrams(text, n):
-                words = text.split()
-                return set([' '.join(words[i:i+n]) for i in range(len(words)-n+1)])
-            
-            cv_bigrams = get_ngrams(cv_text, 2)
-            jd_bigrams = get_ngrams(jd_text, 2)
-            cv_trigrams = get_ngrams(cv_text, 3)
-            jd_trigrams = get_ngrams(jd_text, 3)
-            
-            bigram_sim = len(cv_bigrams.intersection(jd_bigrams)) / max(len(jd_bigrams), 1)
-            trigram_sim = len(cv_trigrams.intersection(jd_trigrams)) / max(len(jd_trigrams), 1)
-            
-            # Weighted combination
-            semantic_score = (
-                tfidf_similarity * 0.4 +
-                jaccard_sim * 0.3 +
-                bigram_sim * 0.2 +
-                trigram_sim * 0.1
-            )
-            
-            return min(semantic_score, 1.0)
-            
-        except Exception as e:
-            st.warning(f"Semantic similarity calculation error: {e}")
-            return 0.0
-
-    def calculate_skill_match_score(self, cv_skills, jd_skills):
-        """Calculate weighted skill matching score"""
-        total_weight = 0
-        matched_weight = 0
-        
-        skill_breakdown = {
-            'matched_skills': [],
-            'missing_critical': [],
-            'missing_nice_to_have': []
-        }
-        
-        for skill_name, jd_skill_data in jd_skills.items():
-            weight = jd_skill_data['weight']
-            category = jd_skill_data['category']
-            total_weight += weight
-            
-            if skill_name in cv_skills:
-                # Calculate match strength based on frequency and context
-                cv_count = cv_skills[skill_name]['count']
-                jd_count = jd_skill_data['count']
-                
-                # Higher score for multiple mentions
-                frequency_bonus = min(cv_count / max(jd_count, 1), 2.0)
-                match_score = weight * frequency_bonus
-                matched_weight += match_score
-                
-                skill_breakdown['matched_skills'].append({
-                    'skill': skill_name,
-                    'category': category,
-                    'strength': frequency_bonus
-                })
-            else:
-                if weight >= 2.0:  # Critical skills
-                    skill_breakdown['missing_critical'].append({
-                        'skill': skill_name,
-                        'category': category,
-                        'weight': weight
-                    })
-                else:  # Nice to have skills
-                    skill_breakdown['missing_nice_to_have'].append({
-                        'skill': skill_name,
-                        'category': category,
-                        'weight': weight
-                    })
-        
-        skill_score = matched_weight / max(total_weight, 1)
-        return skill_score, skill_breakdown
-
-    def calculate_advanced_similarity(self, cv_text, job_description):
-        """Enhanced similarity calculation with multiple factors"""
-        if not cv_text or not job_description:
-            return 0.0, {}
-        
-        try:
-            # Preprocess texts
-            cv_processed = self.advanced_text_preprocessing(cv_text)
-            jd_processed = self.advanced_text_preprocessing(job_description)
-            
-            # Extract skills with context
-            cv_skills = self.extract_skills_with_context(cv_text)
-            jd_skills = self.extract_skills_with_context(job_description)
-            
-            # Calculate different similarity components
-            semantic_score = self.calculate_semantic_similarity(cv_processed, jd_processed)
-            skill_score, skill_breakdown = self.calculate_skill_match_score(cv_skills, jd_skills)
-            
-            # Experience and years calculation
-            cv_years = self.extract_experience_years(cv_text)
-            jd_years = self.extract_experience_years(job_description)
-            experience_match = min(cv_years / max(jd_years, 1), 1.5) if jd_years > 0 else 1.0
-            
-            # Education and certification bonus
-            education_bonus = self.calculate_education_bonus(cv_text, job_description)
-            
-            # Content quality factors
-            cv_length = len(cv_text.split())
-            quality_factor = min(cv_length / 200, 1.2)  # Bonus for comprehensive resumes
-            
-            # Weighted final score calculation
-            base_score = (
-                semantic_score * 0.25 +      # General semantic similarity
-                skill_score * 0.45 +         # Technical skills (most important)
-                experience_match * 0.15 +    # Experience level match
-                education_bonus * 0.10 +     # Education/certification bonus
-                quality_factor * 0.05        # Content quality
-            )
-            
-            # Apply scaling for realistic scores
-            if base_score >= 0.8:
-                final_score = 85 + (base_score - 0.8) * 65  # 85-98%
-            elif base_score >= 0.6:
-                final_score = 70 + (base_score - 0.6) * 75  # 70-85%
-            elif base_score >= 0.4:
-                final_score = 50 + (base_score - 0.4) * 100 # 50-70%
-            elif base_score >= 0.2:
-                final_score = 30 + (base_score - 0.2) * 100 # 30-50%
-            else:
-                final_score = 15 + base_score * 75          # 15-30%
-            
-            # Additional bonuses
-            if skill_score > 0.7:
-                final_score += 5  # Strong technical skills bonus
-            if len(skill_breakdown['missing_critical']) == 0:
-                final_score += 8  # No missing critical skills bonus
-            
-            final_score = min(final_score, 98)  # Cap at 98%
-            
-            analysis_details = {
-                'semantic_score': round(semantic_score * 100, 2),
-                'skill_score': round(skill_score * 100, 2),
-                'experience_match': round(experience_match * 100, 2),
-                'education_bonus': round(education_bonus * 100, 2),
-                'skill_breakdown': skill_breakdown,
-                'cv_skills_count': len(cv_skills),
-                'jd_skills_count': len(jd_skills),
-                'cv_years': cv_years,
-                'jd_years': jd_years
-            }
-            
-            return round(final_score, 1), analysis_details
-            
-        except Exception as e:
-            st.error(f"Error in similarity calculation: {e}")
-            return 25.0, {}
+from extraction_pool import ExtractionPool
+from text_extraction import parse_with_tables
+from mern_engine import EnhancedMERNResumeMatcher
+from incremental_scoring import IncrementalScorer
 
-    def extract_experience_years(self, text):
-        """Extract years of experience from text"""
-        patterns = [
-            r'(\d+)[\+\-\s]*years?\s+(?:of\s+)?experience',
-            r'(\d+)[\+\-\s]*yrs?\s+(?:of\s+)?experience',
-            r'experience[:\s]+(\d+)[\+\-\s]*years?',
-            r'(\d+)[\+\-\s]*years?\s+in',
-            r'over\s+(\d+)\s+years?',
-            r'more\s+than\s+(\d+)\s+years?'
-        ]
-        
-        years = []
-        for pattern in patterns:
-            matches = re.findall(pattern, text.lower())
-            years.extend([int(match) for match in matches if match.isdigit()])
-        
-        return max(years) if years else 0
+# --- Enhanced Streamlit Interface ---
 
-    def calculate_education_bonus(self, cv_text, jd_text):
-        """Calculate bonus for education and certifications"""
-        cv_lower = cv_text.lower()
-        jd_lower = jd_text.lower()
-        
-        education_terms = ['bachelor', 'master', 'phd', 'degree', 'computer science', 
-                          'software engineering', 'information technology']
-        cert_terms = ['certified', 'certification', 'aws certified', 'google certified',
-                     'microsoft certified', 'mongodb certified']
-        
-        bonus = 0.0
-        
-        # Education matching
-        for term in education_terms:
-            if term in jd_lower and term in cv_lower:
-                bonus += 0.1
-        
-        # Certification matching
-        for term in cert_terms:
-            if term in jd_lower and term in cv_lower:
-                bonus += 0.15
-        
-        return min(bonus, 0.5)  # Cap at 50% bonus
+# Analyses kept per process (see analyze_resume)
+ANALYSIS_CACHE_ENTRIES = int(os.environ.get('MERN_ANALYSIS_CACHE_ENTRIES', 256))
+ANALYSIS_CACHE_TTL_SECONDS = int(os.environ.get('MERN_ANALYSIS_CACHE_TTL_SECONDS', 3600))
 
-    def generate_comprehensive_feedback(self, cv_text, job_description, score, analysis_details):
-        """Generate detailed, actionable feedback"""
-        try:
-            feedback_sections = []
-            
-            # Overall assessment
-            if score >= 85:
-                feedback_sections.append("🎉 **Excellent Match!** Your resume strongly aligns with this MERN stack position.")
-            elif score >= 70:
-                feedback_sections.append("🚀 **Strong Candidate!** Your profile shows great potential for this role.")
-            elif score >= 55:
-                feedback_sections.append("👍 **Good Foundation** with clear opportunities for improvement.")
-            elif score >= 40:
-                feedback_sections.append("📈 **Decent Match** but requires targeted enhancements.")
-            else:
-                feedback_sections.append("⚠️ **Significant Gap** - consider major resume optimization.")
-            
-            # Skill analysis
-            skill_breakdown = analysis_details.get('skill_breakdown', {})
-            
-            if skill_breakdown.get('matched_skills'):
-                matched = skill_breakdown['matched_skills'][:6]  # Top 6
-                matched_list = [f"**{s['skill'].title()}** ({s['category']})" for s in matched]
-                feedback_sections.append(f"✅ **Strong Technical Skills:** {', '.join(matched_list)}")
-            
-            # Critical missing skills
-            if skill_breakdown.get('missing_critical'):
-                missing_critical = skill_breakdown['missing_critical'][:4]
-                critical_list = [f"**{s['skill'].title()}**" for s in missing_critical]
-                feedback_sections.append(f"🚨 **Critical Missing Skills:** {', '.join(critical_list)}")
-                feedback_sections.append("💡 *Focus on these first - they're essential for MERN stack roles.*")
-            
-            # Nice to have skills
-            if skill_breakdown.get('missing_nice_to_have'):
-                nice_to_have = skill_breakdown['missing_nice_to_have'][:3]
-                nice_list = [f"**{s['skill'].title()}**" for s in nice_to_have]
-                feedback_sections.append(f"📋 **Additional Skills to Consider:** {', '.join(nice_list)}")
-            
-            # Experience feedback
-            cv_years = analysis_details.get('cv_years', 0)
-            jd_years = analysis_details.get('jd_years', 0)
-            if jd_years > 0:
-                if cv_years >= jd_years:
-                    feedback_sections.append(f"✅ **Experience Match:** {cv_years} years (meets {jd_years} year requirement)")
-                else:
-                    feedback_sections.append(f"⏰ **Experience Gap:** {cv_years} years (needs {jd_years} years)")
-            
-            # Detailed scores
-            feedback_sections.append("## 📊 **Detailed Analysis**")
-            feedback_sections.append(f"- **Technical Skills Match:** {analysis_details.get('skill_score', 0)}%")
-            feedback_sections.append(f"- **Content Relevance:** {analysis_details.get('semantic_score', 0)}%") 
-            feedback_sections.append(f"- **Experience Alignment:** {analysis_details.get('experience_match', 0)}%")
-            
-            # Actionable recommendations
-            feedback_sections.append("## 🎯 **Recommendations**")
-            
-            if score < 70:
-                recommendations = [
-                    "🔧 Add specific MERN stack project examples",
-                    "📝 Include more technical keywords from the job description",
-                    "💼 Highlight relevant work experience with quantified achievements",
-                    "🏆 Add any relevant certifications or courses"
-                ]
-                feedback_sections.append("\n".join(recommendations))
-            else:
-                recommendations = [
-                    "✨ Fine-tune keyword optimization",
-                    "📈 Add metrics and quantified achievements",
-                    "🔍 Ensure all relevant projects are highlighted"
-                ]
-                feedback_sections.append("\n".join(recommendations))
-            
-            return "\n\n".join(feedback_sections)
-            
-        except Exception as e:
-            return self.generate_fallback_feedback(score)
+# Parser processes shared by every session (0 parses in the server process)
+EXTRACTION_WORKERS = int(os.environ.get('MERN_EXTRACTION_WORKERS', os.cpu_count() or 1))
+MAX_RANKED_RESUMES = int(os.environ.get('MERN_MAX_RANKED_RESUMES', 200))
 
-    def generate_fallback_feedback(self, score):
-        """Fallback feedback when detailed analysis fails"""
-        if score >= 75:
-            return "🎉 **Excellent Match!** Your resume shows strong alignment with MERN stack requirements."
-        elif score >= 60:
-            return "👍 **Good Match** with some optimization opportunities for better alignment."
-        elif score >= 45:
-            return "📊 **Fair Match** - focus on highlighting MERN stack experience and skills."
-        else:
-            return "📈 **Needs Improvement** - consider adding more relevant MERN stack experience and keywords."
-
-    def process_resume(self, cv_file, job_description):
-        """Main processing function with enhanced error handling"""
-        try:
-            # Extract and validate text
-            raw_cv_text = self.extract_text(cv_file)
-            
-            if not raw_cv_text.strip():
-                raise ValueError("Could not extract meaningful text from the resume file")
-            
-            if len(raw_cv_text.split()) < 50:
-                st.warning("⚠️ Resume seems quite short. Consider adding more details for better analysis.")
-            
-            # Perform analysis
-            score, analysis_details = self.calculate_advanced_similarity(raw_cv_text, job_description)
-            feedback = self.generate_comprehensive_feedback(raw_cv_text, job_description, score, analysis_details)
-            
-            # Determine match level
-            if score >= 80:
-                match_level = "Excellent Match"
-                match_color = "🟢"
-            elif score >= 65:
-                match_level = "Very Good Match"
-                match_color = "🟡"
-            elif score >= 50:
-                match_level = "Good Match"
-                match_color = "🟡"
-            elif score >= 35:
-                match_level = "Fair Match"
-                match_color = "🟠"
-            else:
-                match_level = "Needs Improvement"
-                match_color = "🔴"
-            
-            return {
-                "score": score,
-                "feedback": feedback,
-                "match_level": match_level,
-                "match_color": match_color,
-                "cv_length": len(raw_cv_text.split()),
-                "jd_length": len(job_description.split()),
-                "analysis_details": analysis_details
-            }
-            
-        except Exception as e:
-            raise ValueError(f"Error processing resume: {str(e)}")
-
-# --- Enhanced Streamlit Interface ---
+SINGLE_MODE = "👤 Analyze One Resume"
+RANKING_MODE = "🏆 Rank Multiple Resumes"
 
 st.set_page_config(
     page_title="MERN Stack Resume Matcher", 
@@ -636,27 +47,171 @@ st.title("⚛️ MERN Stack Resume Matcher")
 st.markdown("**Advanced AI-powered resume analysis specifically optimized for MERN stack positions**")
 st.markdown("---")
 
+@st.cache_resource(show_spinner=False)
+def load_matcher():
+    """One matcher per process, shared by every session"""
+    matcher = EnhancedMERNResumeMatcher()
+    if EXTRACTION_WORKERS > 0:
+        matcher.extraction_pool = ExtractionPool(parse_with_tables, workers=EXTRACTION_WORKERS)
+    return matcher
+
+@st.cache_data(ttl=ANALYSIS_CACHE_TTL_SECONDS, max_entries=ANALYSIS_CACHE_ENTRIES, show_spinner=False)
+def analyze_resume(resume_key, job_key, _cv_file, _job_description):
+    """process_resume, cached by resume file hash (plus extension) and job description hash"""
+    return load_matcher().process_resume(_cv_file, _job_description)
+
+def content_key(data, suffix=""):
+    """SHA-256 of a resume file's bytes or a job description's text"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(data).hexdigest() + suffix
+
+def ranking_row(cv_file, result):
+    """One candidate's row of the ranking table"""
+    details = result.get('analysis_details', {})
+    skill_breakdown = details.get('skill_breakdown', {})
+    return {
+        "Candidate": cv_file.name,
+        "Score": result['score'],
+        "Match Level": f"{result['match_color']} {result['match_level']}",
+        "Technical Skills": details.get('skill_score', 0),
+        "Content Relevance": details.get('semantic_score', 0),
+        "Experience (years)": details.get('cv_years', 0),
+        "Matched Skills": len(skill_breakdown.get('matched_skills', [])),
+        "Missing Critical": ", ".join(skill['skill'].replace('_', ' ').title()
+                                      for skill in skill_breakdown.get('missing_critical', []))
+    }
+
+def show_ranking(cv_files, job_description):
+    """Rank resumes against the job description, filling the table in as each one finishes"""
+    progress = st.progress(0.0, text=f"🔄 Analyzing {len(cv_files)} resumes...")
+    table = st.empty()
+    rows, results, failures = [], {}, []
+    
+    for done, (index, result, error) in enumerate(matcher.rank_resumes(cv_files, job_description), 1):
+        if error is None:
+            results[index] = result
+            rows.append(ranking_row(cv_files[index], result))
+            rows.sort(key=lambda row: row["Score"], reverse=True)
+            table.dataframe(
+                rows, use_container_width=True, hide_index=True,
+                column_config={
+                    "Score": st.column_config.ProgressColumn("Score", format="%.1f%%", min_value=0, max_value=100),
+                    "Technical Skills": st.column_config.NumberColumn(format="%.1f%%"),
+                    "Content Relevance": st.column_config.NumberColumn(format="%.1f%%")
+                })
+        else:
+            failures.append((cv_files[index].name, error))
+        progress.progress(done / len(cv_files), text=f"🔄 Analyzed {done} of {len(cv_files)} resumes")
+    
+    progress.progress(1.0, text=f"✅ Ranked {len(results)} of {len(cv_files)} resumes")
+    for name, error in failures:
+        st.error(f"❌ {name}: {error}")
+    
+    # Per-candidate skill breakdown, best match first
+    if results:
+        st.markdown("### 🛠️ Candidate Skill Breakdown")
+    for rank, (index, result) in enumerate(sorted(results.items(), key=lambda item: item[1]['score'], reverse=True), 1):
+        skill_breakdown = result.get('analysis_details', {}).get('skill_breakdown', {})
+        with st.expander(f"#{rank} {result['match_color']} {cv_files[index].name} — {result['score']}%"):
+            for warning in result.get('warnings', []):
+                st.warning(warning)
+            skill_col1, skill_col2, skill_col3 = st.columns(3)
+            with skill_col1:
+                st.markdown("**✅ Matched Skills**")
+                for skill in skill_breakdown.get('matched_skills', []):
+                    st.write(f"• {skill['skill'].replace('_', ' ').title()} ({skill['category']})")
+            with skill_col2:
+                st.markdown("**🚨 Missing Critical**")
+                for skill in skill_breakdown.get('missing_critical', []):
+                    st.write(f"🔴 {skill['skill'].replace('_', ' ').title()}")
+            with skill_col3:
+                st.markdown("**📋 Nice to Have**")
+                for skill in skill_breakdown.get('missing_nice_to_have', []):
+                    st.write(f"🟡 {skill['skill'].replace('_', ' ').title()}")
+
+def live_scorer(cv_file):
+    """This session's IncrementalScorer for the uploaded resume, rebuilt when another resume is uploaded"""
+    resume_key = content_key(cv_file.getvalue(), os.path.splitext(cv_file.name)[1].lower())
+    live = st.session_state.get('live_scorer')
+    if live is None or live[0] != resume_key:
+        cv_features = matcher.document_features(matcher.extract_text(cv_file))
+        live = (resume_key, IncrementalScorer(matcher, cv_features))
+        st.session_state['live_scorer'] = live
+    return live[1]
+
+def show_live_score(cv_file, job_description):
+    """Score and missing skills against the job description as it is edited"""
+    scorer = live_scorer(cv_file)
+    started = time.perf_counter()
+    score, analysis_details = scorer.update(job_description)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    
+    # Shown as the change since the previous edit
+    previous_score = st.session_state.get('live_previous_score', score)
+    st.session_state['live_previous_score'] = score
+    if not analysis_details:
+        st.info("💡 The live score appears once the resume and the description both have text.")
+        return
+    
+    match_level, match_color = matcher.match_level(score)
+    st.markdown("#### ⚡ Live Score")
+    live_col1, live_col2, live_col3, live_col4 = st.columns(4)
+    with live_col1:
+        st.metric("Overall Match Score", f"{score}%", delta=round(score - previous_score, 1) or None)
+    with live_col2:
+        st.metric("Technical Skills", f"{analysis_details['skill_score']:.1f}%")
+    with live_col3:
+        st.metric("Content Relevance", f"{analysis_details['semantic_score']:.1f}%")
+    with live_col4:
+        st.metric("Experience Match", f"{analysis_details['experience_match']:.1f}%")
+    st.caption(f"{match_color} {match_level} · updated in {elapsed_ms:.0f} ms")
+    
+    skill_breakdown = analysis_details['skill_breakdown']
+    missing_col1, missing_col2 = st.columns(2)
+    with missing_col1:
+        st.markdown("**🚨 Missing Critical**")
+        for skill in skill_breakdown['missing_critical']:
+            st.write(f"🔴 {skill['skill'].replace('_', ' ').title()}")
+    with missing_col2:
+        st.markdown("**📋 Nice to Have**")
+        for skill in skill_breakdown['missing_nice_to_have']:
+            st.write(f"🟡 {skill['skill'].replace('_', ' ').title()}")
+
 # Initialize the enhanced matcher
-if 'enhanced_matcher' not in st.session_state:
-    st.session_state.enhanced_matcher = EnhancedMERNResumeMatcher()
+matcher = load_matcher()
 
-matcher = st.session_state.enhanced_matcher
+analysis_mode = st.radio("Mode:", (SINGLE_MODE, RANKING_MODE), horizontal=True)
+cv_file = None
+cv_files = []
 
 # Main layout
 col1, col2 = st.columns([1, 1])
 
 with col1:
-    st.header("📄 Upload Your Resume")
-    cv_file = st.file_uploader(
-        "Choose your resume file", 
-        type=["pdf", "docx", "txt"],
-        help="Supported formats: PDF, DOCX, TXT (Max size: 10MB)"
-    )
-    
-    if cv_file:
-        st.success(f"✅ Resume uploaded: {cv_file.name}")
-        file_size = len(cv_file.getvalue()) / 1024
-        st.info(f"📊 File size: {file_size:.1f} KB")
+    if analysis_mode == RANKING_MODE:
+        st.header("📚 Upload Resumes")
+        cv_files = st.file_uploader(
+            "Choose the candidates' resume files",
+            type=["pdf", "docx", "txt"],
+            accept_multiple_files=True,
+            help=f"Supported formats: PDF, DOCX, TXT (Max size: 10MB each, up to {MAX_RANKED_RESUMES} files)"
+        ) or []
+        
+        if cv_files:
+            st.success(f"✅ {len(cv_files)} resumes uploaded")
+    else:
+        st.header("📄 Upload Your Resume")
+        cv_file = st.file_uploader(
+            "Choose your resume file", 
+            type=["pdf", "docx", "txt"],
+            help="Supported formats: PDF, DOCX, TXT (Max size: 10MB)"
+        )
+        
+        if cv_file:
+            st.success(f"✅ Resume uploaded: {cv_file.name}")
+            file_size = len(cv_file.getvalue()) / 1024
+            st.info(f"📊 File size: {file_size:.1f} KB")
 
 with col2:
     st.header("💼 Job Description")
@@ -665,6 +220,10 @@ with col2:
         ("📝 Paste Description", "📁 Upload File"),
         horizontal=True
     )
+    live_scoring = analysis_mode == SINGLE_MODE and input_method == "📝 Paste Description" and st.toggle(
+        "⚡ Live score while editing",
+        help="Update the score and missing skills whenever the description is edited (Ctrl+Enter or click outside the box), without re-analyzing the resume"
+    )
 
 job_description = ""
 
@@ -680,6 +239,15 @@ if input_method == "📝 Paste Description":
         
         if word_count < 100:
             st.warning("⚠️ Job description seems short. More details will improve analysis accuracy.")
+    
+    if live_scoring:
+        if not cv_file:
+            st.info("📄 Upload your resume to see the score update as you edit the description.")
+        elif job_description:
+            try:
+                show_live_score(cv_file, job_description)
+            except Exception as e:
+                st.error(f"❌ Error during live scoring: {e}")
 
 else:
     job_file = st.file_uploader(
@@ -700,7 +268,20 @@ else:
 st.markdown("---")
 st.header("🔍 Advanced Analysis")
 
-if st.button("🚀 Analyze MERN Stack Match", type="primary", use_container_width=True):
+if analysis_mode == RANKING_MODE:
+    if st.button("🏁 Rank Candidates", type="primary", use_container_width=True):
+        if not cv_files:
+            st.error("❌ Please upload at least one resume file.")
+        elif len(cv_files) > MAX_RANKED_RESUMES:
+            st.error(f"❌ Too many resumes. Please upload at most {MAX_RANKED_RESUMES}.")
+        elif not job_description:
+            st.error("❌ Please provide the job description.")
+        elif len(job_description.split()) < 20:
+            st.error("❌ Job description is too short for meaningful analysis.")
+        else:
+            show_ranking(cv_files, job_description)
+
+elif st.button("🚀 Analyze MERN Stack Match", type="primary", use_container_width=True):
     if not cv_file:
         st.error("❌ Please upload your resume file.")
     elif not job_description:
@@ -710,7 +291,12 @@ if st.button("🚀 Analyze MERN Stack Match", type="primary", use_container_widt
     else:
         try:
             with st.spinner("🔄 Analyzing your MERN stack resume... This may take a moment."):
-                result = matcher.process_resume(cv_file, job_description)
+                result = analyze_resume(
+                    content_key(cv_file.getvalue(), os.path.splitext(cv_file.name)[1].lower()),
+                    content_key(job_description), cv_file, job_description)
+            
+            for warning in result.get('warnings', []):
+                st.warning(warning)
             
             # Display results with enhanced formatting
             score = result['score']
@@ -0,0 +1,222 @@
+"""Document parsers shared by the matcher service and its extraction workers.
+
+Kept at module level so that worker processes can import and run them. The
+format libraries are imported on first use of each format.
+
+Extraction is bounded: at most EXTRACTION_MAX_PAGES pages are read, text
+stops growing at EXTRACTION_MAX_CHARS characters and is cut to
+EXTRACTION_MAX_TOKENS whitespace-separated tokens, so a small upload that
+expands into a huge string cannot blow up the preprocessing and TF-IDF steps
+after it. A truncated document is still analyzed; its ExtractedText says
+which budget was hit.
+"""
+
+import io
+import os
+import re
+from itertools import islice
+
+MAX_PAGES = int(os.environ.get('EXTRACTION_MAX_PAGES', 50))
+MAX_CHARS = int(os.environ.get('EXTRACTION_MAX_CHARS', 500000))
+MAX_TOKENS = int(os.environ.get('EXTRACTION_MAX_TOKENS', 50000))
+
+# Bump whenever a parser's output changes, so that text cached by the previous parsers is not reused
+PARSER_VERSION = 1
+
+# TXT files are decoded this many characters at a time
+TEXT_CHUNK_CHARS = 64 * 1024
+
+TOKEN_PATTERN = re.compile(r'\S+')
+
+
+def extraction_namespace(name):
+    """Extraction cache namespace for name's parsers, at this parser version and these budgets"""
+    return f"{name}.v{PARSER_VERSION}.p{MAX_PAGES}.c{MAX_CHARS}.t{MAX_TOKENS}"
+
+
+class ExtractedText(str):
+    """Extracted text; truncated is None, or the budget that cut it short as {'budget', 'limit'}"""
+
+    def __new__(cls, text, truncated=None):
+        extracted = super().__new__(cls, text)
+        extracted.truncated = truncated
+        return extracted
+
+    def __reduce__(self):
+        # Crosses the extraction pool's process boundary with its truncation note
+        return (ExtractedText, (str(self), self.truncated))
+
+
+class TextBudget:
+    """Collects the parts of a document (pages, paragraphs, cells) within the page and character budgets.
+
+    The text is the parts joined by single spaces, so collecting is linear
+    in the size of the document rather than quadratic like repeated +=.
+    """
+
+    def __init__(self, max_pages=None, max_chars=None, max_tokens=None):
+        self.max_pages = MAX_PAGES if max_pages is None else max_pages
+        self.max_chars = MAX_CHARS if max_chars is None else max_chars
+        self.max_tokens = MAX_TOKENS if max_tokens is None else max_tokens
+        self.parts = []
+        self.chars = 0
+        self.truncated = None
+
+    @property
+    def full(self):
+        return self.truncated is not None
+
+    def allow_page(self, page_number):
+        """Whether page page_number (from 0) is within the page budget"""
+        if self.full:
+            return False
+        if self.max_pages and page_number >= self.max_pages:
+            self.truncated = {'budget': 'pages', 'limit': self.max_pages}
+            return False
+        return True
+
+    def add(self, part):
+        """Add a part; returns False once the character budget is used up"""
+        if self.full:
+            return False
+        if self.max_chars and self.chars + len(part) > self.max_chars:
+            part = part[:max(self.max_chars - self.chars, 0)]
+            self.truncated = {'budget': 'characters', 'limit': self.max_chars}
+        self.parts.append(part)
+        self.chars += len(part) + 1
+        return not self.full
+
+    def text(self):
+        """The collected text, stripped and cut to the token budget"""
+        text = " ".join(self.parts).strip()
+        if self.max_tokens:
+            # Start of the first token past the budget, without splitting the whole text
+            beyond = next(islice(TOKEN_PATTERN.finditer(text), self.max_tokens, None), None)
+            if beyond is not None:
+                text = text[:beyond.start()].rstrip()
+                self.truncated = self.truncated or {'budget': 'tokens', 'limit': self.max_tokens}
+        return ExtractedText(text, self.truncated)
+
+
+def preload_parsers():
+    """Import every format's parser up front (see ImprovedResumeMatcher.warm_up)"""
+    import pdfplumber
+    import docx
+
+
+def parse_file(source, ext):
+    """Parse a PDF, DOCX or TXT document into plain text (an ExtractedText).
+
+    source is a file path or the document's bytes.
+    """
+    return parse_document(source, ext)[0]
+
+
+def read_text(stream, budget, newline=None):
+    """Decode a UTF-8 byte stream chunk by chunk into budget (newline as for open())"""
+    reader = io.TextIOWrapper(stream, encoding='utf-8', newline=newline)
+    chunks = []
+    chars = 0
+    while True:
+        chunk = reader.read(TEXT_CHUNK_CHARS)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        chars += len(chunk)
+        if budget.max_chars and chars > budget.max_chars:
+            break
+    # Leave the caller's stream open
+    reader.detach()
+    # A single part, so no separator is added between chunks
+    budget.add("".join(chunks))
+
+
+def parse_document(source, ext, budget=None):
+    """Like parse_file, returning (text, page count); the page count is None except for PDFs"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    budget = budget or TextBudget()
+    pages = None
+
+    try:
+        if ext == ".pdf":
+            import pdfplumber
+            with pdfplumber.open(source) as pdf:
+                pages = len(pdf.pages)
+                for page_number, page in enumerate(pdf.pages):
+                    if not budget.allow_page(page_number):
+                        break
+                    page_text = page.extract_text()
+                    # Drop the page's parsed layout objects; only its text is kept
+                    page.flush_cache()
+                    if page_text and not budget.add(page_text):
+                        break
+        elif ext == ".docx":
+            import docx
+            doc = docx.Document(source)
+            for para in doc.paragraphs:
+                if not budget.add(para.text):
+                    break
+        elif ext == ".txt":
+            if hasattr(source, 'read'):
+                read_text(source, budget)
+            else:
+                with open(source, 'rb') as f:
+                    read_text(f, budget)
+        else:
+            raise ValueError(f"Unsupported file format: '{ext}'. Use PDF, DOCX, or TXT.")
+    except Exception as e:
+        raise ValueError(f"Error extracting text from {ext} file: {str(e)}")
+
+    return budget.text(), pages
+
+
+def parse_with_tables(source, ext, budget=None):
+    """Like parse_document, also reading the text of PDF and DOCX tables (the Streamlit app's parser).
+
+    TXT files are decoded without newline translation. Returns the text only.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    budget = budget or TextBudget()
+
+    try:
+        if ext == ".pdf":
+            import pdfplumber
+            with pdfplumber.open(source) as pdf:
+                for page_number, page in enumerate(pdf.pages):
+                    if not budget.allow_page(page_number):
+                        break
+                    page_text = page.extract_text()
+                    if page_text:
+                        budget.add(page_text)
+
+                    # Extract text from tables if present
+                    for table in page.extract_tables():
+                        for row in table:
+                            if row:
+                                budget.add(" ".join([cell for cell in row if cell]))
+                    page.flush_cache()
+                    if budget.full:
+                        break
+        elif ext == ".docx":
+            import docx
+            doc = docx.Document(source)
+            for para in doc.paragraphs:
+                budget.add(para.text)
+            for table in doc.tables:
+                for row in table.rows:
+                    for cell in row.cells:
+                        budget.add(cell.text)
+        elif ext == ".txt":
+            if hasattr(source, 'read'):
+                read_text(source, budget, newline='')
+            else:
+                with open(source, 'rb') as f:
+                    read_text(f, budget, newline='')
+        else:
+            raise ValueError(f"Unsupported file format: '{ext}'. Use PDF, DOCX, or TXT.")
+    except Exception as e:
+        raise ValueError(f"Error extracting text from {ext} file: {str(e)}")
+
+    return budget.text()
@@ -0,0 +1,111 @@
+"""Single-scan normalization of documents for EnhancedMERNResumeMatcher.
+
+Preprocessing used to apply each of TECH_NORMALIZATIONS with its own re.sub,
+then a character cleanup, a whitespace collapse and a split; experience
+parsing lowercased the text again and ran six findall passes. Here a
+document is lowercased once, the replacements are one alternation scanned
+once, the cleanup, collapse and split are one token scan that the stop-word
+filter consumes, and every experience pattern is tried in one lookahead
+scan. The output is identical to the chain of substitutions.
+
+Why one scan of the alternation reproduces the chain: no two patterns can
+match at the same position (their literal prefixes differ), no match can
+start inside another's match, and no replacement creates a match for a later
+pattern. The one interaction left is that html/css/api with an empty suffix
+also consume the whitespace after them, gluing the next word on ("html css"
+becomes "htmlcss"). In the chain that word then has no leading word boundary
+for the patterns applied after the gluing one, while the earlier patterns and
+the gluing pattern's own pass had already seen it. normalize_tech_terms keeps
+exactly that rule.
+"""
+
+import re
+
+# Applied in this order by the original chain; the order decides which patterns
+# still match a word glued onto a preceding replacement
+TECH_NORMALIZATIONS = [
+    (r'\bnode\.?js\b', 'nodejs'),
+    (r'\breact\.?js\b', 'react'),
+    (r'\bexpress\.?js\b', 'express'),
+    (r'\bnext\.?js\b', 'nextjs'),
+    (r'\bmongo\s*db\b', 'mongodb'),
+    (r'\btype\s*script\b', 'typescript'),
+    (r'\bj\s*s\b', 'javascript'),
+    (r'\bhtml\s*5?\b', 'html'),
+    (r'\bcss\s*3?\b', 'css'),
+    (r'\brest\s*ful?\b', 'restful'),
+    (r'\bapi\s*s?\b', 'api'),
+    (r'\bci\s*/?\s*cd\b', 'cicd'),
+    (r'\baws\b', 'amazon web services'),
+    (r'\bgcp\b', 'google cloud platform')
+]
+
+
+def tech_alternative(pattern):
+    """Pattern r'\\bx...' as a case-sensitive 'x' followed by its case-insensitive rest in a group.
+
+    An alternation whose branches all start with a literal lets the regex
+    engine skip ahead to candidate characters instead of trying every branch
+    at every position, which is most of the cost on long documents. In
+    lowercased text the only characters other than themselves that
+    IGNORECASE matches to ASCII letters are 'ı' and 'ſ' (for i and s), neither
+    of which starts a pattern. The lookbehind is the leading \\b: the character
+    before x is not a word character.
+    """
+    first, rest = pattern[2], pattern[3:]
+    return f'{first}(?<!\\w\\w)((?i:{rest}))'
+
+
+# Group i + 1 is pattern i (the patterns have no groups of their own)
+TECH_PATTERN = re.compile('|'.join(tech_alternative(pattern) for pattern, _ in TECH_NORMALIZATIONS))
+TECH_REPLACEMENTS = [replacement for _, replacement in TECH_NORMALIZATIONS]
+
+# Runs of the characters kept by the cleanup: everything else became a space,
+# and spaces only separated words
+TOKEN_PATTERN = re.compile(r'[\w\.\+\#\-/]+')
+
+BASIC_STOPWORDS = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+                   'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being'}
+# Words of three characters or fewer and numbers were always kept
+DROPPED_STOPWORDS = frozenset(word for word in BASIC_STOPWORDS if len(word) > 3 and not word.isdigit())
+
+# Every years-of-experience pattern, tried at every position so that overlapping
+# matches of different patterns are all seen (as separate findall passes saw them)
+EXPERIENCE_PATTERN = re.compile(
+    r'(?=(\d+)(?:[\+\-\s]*years?\s+(?:of\s+)?experience'
+    r'|[\+\-\s]*yrs?\s+(?:of\s+)?experience'
+    r'|[\+\-\s]*years?\s+in)'
+    r'|experience[:\s]+(\d+)[\+\-\s]*years?'
+    r'|over\s+(\d+)\s+years?'
+    r'|more\s+than\s+(\d+)\s+years?)'
+)
+
+
+def normalize_tech_terms(text):
+    """Apply TECH_NORMALIZATIONS to lowercased text in one scan"""
+    glued_end = -1
+    glued_by = None
+
+    def replace(match):
+        nonlocal glued_end, glued_by
+        index = match.lastindex - 1
+        if match.start() == glued_end and index > glued_by:
+            # This word was glued onto the previous replacement before this pattern's turn
+            return match.group()
+        if match.group()[-1].isspace():
+            glued_end, glued_by = match.end(), index
+        return TECH_REPLACEMENTS[index]
+
+    return TECH_PATTERN.sub(replace, text)
+
+
+def normalize(text_lower):
+    """Preprocessed text of a lowercased document (see advanced_text_preprocessing)"""
+    tokens = TOKEN_PATTERN.findall(normalize_tech_terms(text_lower))
+    return " ".join([token for token in tokens if token not in DROPPED_STOPWORDS])
+
+
+def experience_years(text_lower):
+    """Largest number of years of experience stated in a lowercased document, or 0"""
+    return max((int(years) for match in EXPERIENCE_PATTERN.finditer(text_lower)
+                for years in match.groups() if years), default=0)
@@ -0,0 +1,197 @@
+"""Corpus-fitted TF-IDF model stored as a versioned, memory-mappable artifact.
+
+Fitting a vectorizer on just the two documents being compared gives IDF
+weights with almost no statistical meaning and rebuilds the vocabulary on
+every request. A TfidfModel is fitted offline over historical resumes and job
+postings (see fit_tfidf_model.py); the service loads it once and only
+transforms documents. IDF weights can be refreshed incrementally as new
+documents arrive with partial_fit, without refitting the vocabulary.
+
+Artifact layout (one directory per version):
+    manifest.json    format, version, analyzer settings, document count
+    vocabulary.json  terms in column order
+    df.npy           document frequency per term
+    idf.npy          smoothed IDF per term (memory-mapped when loaded)
+"""
+
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+
+import numpy as np
+
+FORMAT_VERSION = 1
+LATEST_FILE = 'LATEST'
+
+
+def new_version():
+    """Default version string: UTC timestamp"""
+    return datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')
+
+
+class TfidfModel:
+    """Fixed vocabulary plus document frequencies, transforming like TfidfVectorizer.
+
+    Uses smoothed IDF, optional sublinear TF and L2 normalisation, matching the
+    settings of the matchers' vectorizers.
+    """
+
+    def __init__(self, vocabulary, document_frequencies, n_documents, ngram_range=(1, 3),
+                 token_pattern=r'\b\w+\b', lowercase=True, sublinear_tf=True, version=None, idf=None):
+        self.vocabulary = vocabulary
+        self.document_frequencies = document_frequencies
+        self.n_documents = n_documents
+        self.ngram_range = tuple(ngram_range)
+        self.token_pattern = token_pattern
+        self.lowercase = lowercase
+        self.sublinear_tf = sublinear_tf
+        self.version = version or new_version()
+        self._idf = idf
+
+        # sklearn is imported lazily: it dominates the service's import time
+        from sklearn.feature_extraction.text import CountVectorizer
+        self._counter = CountVectorizer(
+            vocabulary=vocabulary,
+            ngram_range=self.ngram_range,
+            token_pattern=token_pattern,
+            lowercase=lowercase
+        )
+
+    @classmethod
+    def fit(cls, documents, ngram_range=(1, 3), token_pattern=r'\b\w+\b', lowercase=True,
+            sublinear_tf=True, max_features=None, min_df=1, max_df=1.0, version=None):
+        """Build the vocabulary and document frequencies from a corpus"""
+        from sklearn.feature_extraction.text import CountVectorizer
+        counter = CountVectorizer(
+            ngram_range=ngram_range,
+            token_pattern=token_pattern,
+            lowercase=lowercase,
+            max_features=max_features,
+            min_df=min_df,
+            max_df=max_df,
+            binary=True
+        )
+        presence = counter.fit_transform(documents)
+        document_frequencies = np.asarray(presence.sum(axis=0), dtype=np.float64).ravel()
+
+        return cls(
+            vocabulary=counter.vocabulary_,
+            document_frequencies=document_frequencies,
+            n_documents=presence.shape[0],
+            ngram_range=ngram_range,
+            token_pattern=token_pattern,
+            lowercase=lowercase,
+            sublinear_tf=sublinear_tf,
+            version=version
+        )
+
+    @property
+    def idf(self):
+        """Smoothed IDF: ln((1 + n) / (1 + df)) + 1"""
+        if self._idf is None:
+            self._idf = np.log((1 + self.n_documents) / (1 + self.document_frequencies)) + 1
+        return self._idf
+
+    def partial_fit(self, documents):
+        """Fold new documents into the document frequencies (vocabulary stays fixed)"""
+        presence = self._counter.transform(documents)
+        presence.data[:] = 1
+
+        # Loaded arrays may be read-only memory maps
+        self.document_frequencies = np.array(self.document_frequencies, dtype=np.float64)
+        self.document_frequencies += np.asarray(presence.sum(axis=0)).ravel()
+        self.n_documents += presence.shape[0]
+        self._idf = None
+        return self
+
+    def transform(self, documents):
+        """L2-normalised TF-IDF rows (scipy CSR) for the documents"""
+        return self.transform_counts(self._counter.transform(documents))
+
+    def transform_counts(self, counts):
+        """L2-normalised TF-IDF rows from term counts over the vocabulary (CSR with sorted indices)"""
+        from sklearn.preprocessing import normalize
+        vectors = counts.astype(np.float64)
+        if self.sublinear_tf:
+            np.log(vectors.data, vectors.data)
+            vectors.data += 1
+        vectors.data *= self.idf[vectors.indices]
+        return normalize(vectors, norm='l2', copy=False)
+
+    def manifest(self):
+        return {
+            'format': FORMAT_VERSION,
+            'version': self.version,
+            'createdAt': datetime.now(timezone.utc).isoformat(),
+            'nDocuments': int(self.n_documents),
+            'nFeatures': len(self.vocabulary),
+            'ngramRange': list(self.ngram_range),
+            'tokenPattern': self.token_pattern,
+            'lowercase': self.lowercase,
+            'sublinearTf': self.sublinear_tf
+        }
+
+    def save(self, output_dir):
+        """Write the artifact to output_dir/<version>/ and point LATEST at it"""
+        model_dir = os.path.join(output_dir, self.version)
+        os.makedirs(model_dir, exist_ok=True)
+
+        terms = [None] * len(self.vocabulary)
+        for term, index in self.vocabulary.items():
+            terms[index] = term
+
+        with open(os.path.join(model_dir, 'vocabulary.json'), 'w', encoding='utf-8') as f:
+            json.dump(terms, f)
+        np.save(os.path.join(model_dir, 'df.npy'), np.asarray(self.document_frequencies, dtype=np.float64))
+        np.save(os.path.join(model_dir, 'idf.npy'), np.asarray(self.idf, dtype=np.float64))
+        # Manifest last: a directory without one is an incomplete artifact
+        with open(os.path.join(model_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.manifest(), f, indent=2)
+
+        fd, tmp_path = tempfile.mkstemp(dir=output_dir)
+        with os.fdopen(fd, 'w') as f:
+            f.write(self.version)
+        os.replace(tmp_path, os.path.join(output_dir, LATEST_FILE))
+        return model_dir
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Load a model version directory, or the LATEST version under path"""
+        latest_path = os.path.join(path, LATEST_FILE)
+        if os.path.exists(latest_path):
+            with open(latest_path) as f:
+                path = os.path.join(path, f.read().strip())
+
+        with open(os.path.join(path, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('format') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported TF-IDF model format: {manifest.get('format')}")
+
+        with open(os.path.join(path, 'vocabulary.json'), encoding='utf-8') as f:
+            terms = json.load(f)
+
+        # Memory-mapped arrays are shared through the page cache by every worker
+        mmap_mode = 'r' if mmap else None
+        return cls(
+            vocabulary={term: index for index, term in enumerate(terms)},
+            document_frequencies=np.load(os.path.join(path, 'df.npy'), mmap_mode=mmap_mode),
+            n_documents=manifest['nDocuments'],
+            ngram_range=manifest['ngramRange'],
+            token_pattern=manifest['tokenPattern'],
+            lowercase=manifest['lowercase'],
+            sublinear_tf=manifest['sublinearTf'],
+            version=manifest['version'],
+            idf=np.load(os.path.join(path, 'idf.npy'), mmap_mode=mmap_mode)
+        )
+
+
+def load_tfidf_model(path):
+    """Load the model configured for a matcher, or None to fall back to per-pair fitting"""
+    if not path:
+        return None
+    try:
+        return TfidfModel.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Could not load TF-IDF model from {path}: {e}")
+        return None
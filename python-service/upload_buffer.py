@@ -0,0 +1,198 @@
+"""In-memory buffering of uploaded resumes.
+
+Uploads used to be saved to a temporary file and re-opened by path for
+extraction, although the Node backend has already written the same file to
+disk. UploadBuffer is handed to Werkzeug as the stream for each uploaded
+file: the content is hashed while it is being received and kept in memory.
+
+Memory is bounded per request, not only per file: an upload larger than
+UPLOAD_SPILL_BYTES is spilled to a temporary file, and so is every upload
+received once the request's uploads hold UPLOAD_REQUEST_MEMORY_BYTES in
+memory together. A spilled upload keeps only its path between being
+received and being read, so a large batch does not hold a file descriptor
+per resume either.
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+import threading
+
+from flask import Request
+
+DEFAULT_SPILL_BYTES = int(os.environ.get('UPLOAD_SPILL_BYTES', 512 * 1024))
+DEFAULT_REQUEST_MEMORY_BYTES = int(os.environ.get('UPLOAD_REQUEST_MEMORY_BYTES', 32 * 1024 * 1024))
+COPY_CHUNK_SIZE = 64 * 1024
+
+
+class MemoryBudget:
+    """Bytes that the uploads of one request may hold in memory together"""
+
+    def __init__(self, limit=DEFAULT_REQUEST_MEMORY_BYTES):
+        self.limit = limit
+        self.used = 0
+        self._lock = threading.Lock()   # buffers are released by the threads that extract them
+
+    def reserve(self, size):
+        with self._lock:
+            if self.used + size > self.limit:
+                return False
+            self.used += size
+            return True
+
+    def release(self, size):
+        with self._lock:
+            self.used -= size
+
+
+class UploadBuffer:
+    """Write-once file object that hashes its content and spills to disk past a size or its request's budget"""
+
+    def __init__(self, spill_bytes=DEFAULT_SPILL_BYTES, suffix=None, budget=None):
+        self.spill_bytes = spill_bytes
+        self.suffix = suffix
+        self.budget = budget
+        self.size = 0
+        self.path = None            # temporary file once spilled
+        self._hash = hashlib.sha256()
+        self._file = io.BytesIO()   # None while a spill file is closed between writing and reading
+        self._offset = 0            # where a closed spill file is reopened
+        self._reserved = 0          # bytes held in memory against the budget
+        self._closed = False
+
+    @classmethod
+    def from_stream(cls, stream, spill_bytes=DEFAULT_SPILL_BYTES, suffix=None, budget=None):
+        """Copy any readable stream into a buffer"""
+        buffer = cls(spill_bytes, suffix, budget)
+        while True:
+            chunk = stream.read(COPY_CHUNK_SIZE)
+            if not chunk:
+                break
+            buffer.write(chunk)
+        buffer.seek(0)
+        return buffer
+
+    @property
+    def digest(self):
+        """SHA-256 of everything written so far"""
+        return self._hash.hexdigest()
+
+    @property
+    def spilled(self):
+        return self.path is not None
+
+    @property
+    def source(self):
+        """What the parsers read: the bytes, or the spill file path"""
+        if self.spilled:
+            if self._file is not None:
+                self._file.flush()
+            return self.path
+        return self._file.getvalue()
+
+    def write(self, data):
+        self._hash.update(data)
+        self.size += len(data)
+        if not self.spilled and (self.size > self.spill_bytes or not self._reserve(len(data))):
+            self._spill()
+        return self._opened('r+b').write(data)
+
+    def _reserve(self, size):
+        if self.budget is None:
+            return True
+        if not self.budget.reserve(size):
+            return False
+        self._reserved += size
+        return True
+
+    def _release(self):
+        if self._reserved:
+            self.budget.release(self._reserved)
+            self._reserved = 0
+
+    def _spill(self):
+        fd, self.path = tempfile.mkstemp(suffix=self.suffix)
+        spill_file = os.fdopen(fd, 'w+b')
+        spill_file.write(self._file.getbuffer())
+        self._file = spill_file
+        self._release()
+
+    def _opened(self, mode='rb'):
+        """The file, reopening a spill file closed after writing"""
+        if self._file is None:
+            self._file = open(self.path, mode)
+            self._file.seek(self._offset)
+        return self._file
+
+    def read(self, size=-1):
+        return self._opened().read(size)
+
+    def seek(self, offset, whence=0):
+        if self.spilled and whence == io.SEEK_SET:
+            # Werkzeug rewinds each upload once it is received: the spill file is
+            # closed until it is read, rather than held open for the whole request
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._offset = offset
+            return offset
+        return self._opened().seek(offset, whence)
+
+    def tell(self):
+        return self._offset if self._file is None else self._file.tell()
+
+    def readable(self):
+        return True
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        self._closed = True
+        self._release()
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            self.path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class BufferedUploadRequest(Request):
+    """Flask request whose file uploads are received into UploadBuffers sharing one memory budget"""
+
+    upload_budget = None
+    uploads_handed_over = False
+
+    def hand_over_uploads(self, response):
+        """Close the uploads with a streamed response that reads them after the view has returned"""
+        self.uploads_handed_over = True
+        response.call_on_close(super().close)
+        return response
+
+    def close(self):
+        # Flask closes the request as soon as the view returns
+        if not self.uploads_handed_over:
+            super().close()
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.upload_budget is None:
+            self.upload_budget = MemoryBudget()
+        _, ext = os.path.splitext(filename or '')
+        return UploadBuffer(suffix=ext.lower() or None, budget=self.upload_budget)
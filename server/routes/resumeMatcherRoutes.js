@@ -50,6 +50,43 @@ const upload = multer({
 const PYTHON_SERVICE_URL =
   process.env.PYTHON_SERVICE_URL || "http://localhost:5001";
 
+// Relay a failed call to the Python service as an error response
+const sendServiceError = (res, error, defaultMessage) => {
+  let errorMessage = defaultMessage;
+  let statusCode = 500;
+
+  if (error.code === "ECONNREFUSED") {
+    errorMessage =
+      "Resume processing service is unavailable. Please try again later.";
+    statusCode = 503;
+  } else if (error.response?.data?.error) {
+    errorMessage = error.response.data.error;
+    statusCode = error.response.status || 400;
+    // Pass admission-control backoff hints (429/503) on to the client
+    if (error.response.headers?.["retry-after"]) {
+      res.set("Retry-After", error.response.headers["retry-after"]);
+    }
+  } else if (error.message.includes("Invalid file type")) {
+    errorMessage = error.message;
+    statusCode = 400;
+  }
+
+  res.status(statusCode).json({
+    success: false,
+    error: errorMessage,
+  });
+};
+
+const removeUploadedFile = (uploadedFilePath) => {
+  if (uploadedFilePath && fs.existsSync(uploadedFilePath)) {
+    try {
+      fs.unlinkSync(uploadedFilePath);
+    } catch (cleanupError) {
+      console.error("Error cleaning up uploaded file:", cleanupError.message);
+    }
+  }
+};
+
 // Resume matching endpoint
 router.post("/match-resume", upload.single("resume"), async (req, res) => {
   let uploadedFilePath = null;
@@ -79,6 +116,10 @@ router.post("/match-resume", upload.single("resume"), async (req, res) => {
       contentType: req.file.mimetype,
     });
     formData.append("jobDescription", req.body.jobDescription.trim());
+    // "standard" (default) or "mern"; validated by the Python service
+    if (req.body.scoringMode) {
+      formData.append("scoringMode", req.body.scoringMode.trim());
+    }
 
     // Call Python microservice
     const response = await axios.post(
@@ -103,35 +144,104 @@ router.post("/match-resume", upload.single("resume"), async (req, res) => {
     });
   } catch (error) {
     console.error("Error processing resume:", error.message);
+    sendServiceError(res, error, "Failed to process resume");
+  } finally {
+    // Clean up uploaded file
+    removeUploadedFile(uploadedFilePath);
+  }
+});
+
+// Queue a resume analysis; answers at once with a job ID to poll
+router.post("/match-resume/jobs", upload.single("resume"), async (req, res) => {
+  let uploadedFilePath = null;
+
+  try {
+    if (!req.file) {
+      return res.status(400).json({
+        success: false,
+        error: "No resume file uploaded",
+      });
+    }
 
-    let errorMessage = "Failed to process resume";
-    let statusCode = 500;
-
-    if (error.code === "ECONNREFUSED") {
-      errorMessage =
-        "Resume processing service is unavailable. Please try again later.";
-      statusCode = 503;
-    } else if (error.response?.data?.error) {
-      errorMessage = error.response.data.error;
-      statusCode = error.response.status || 400;
-    } else if (error.message.includes("Invalid file type")) {
-      errorMessage = error.message;
-      statusCode = 400;
+    if (!req.body.jobDescription || !req.body.jobDescription.trim()) {
+      return res.status(400).json({
+        success: false,
+        error: "Job description is required",
+      });
     }
 
-    res.status(statusCode).json({
-      success: false,
-      error: errorMessage,
+    uploadedFilePath = req.file.path;
+
+    const formData = new FormData();
+    formData.append("resume", fs.createReadStream(uploadedFilePath), {
+      filename: req.file.originalname,
+      contentType: req.file.mimetype,
     });
-  } finally {
-    // Clean up uploaded file
-    if (uploadedFilePath && fs.existsSync(uploadedFilePath)) {
-      try {
-        fs.unlinkSync(uploadedFilePath);
-      } catch (cleanupError) {
-        console.error("Error cleaning up uploaded file:", cleanupError.message);
-      }
+    formData.append("jobDescription", req.body.jobDescription.trim());
+    // "standard" (default) or "mern"; validated by the Python service
+    if (req.body.scoringMode) {
+      formData.append("scoringMode", req.body.scoringMode.trim());
     }
+    // The Python service POSTs the finished job here
+    if (req.body.callbackUrl) {
+      formData.append("callbackUrl", req.body.callbackUrl.trim());
+    }
+
+    const response = await axios.post(
+      `${PYTHON_SERVICE_URL}/api/analysis-jobs/match-resume`,
+      formData,
+      {
+        headers: {
+          ...formData.getHeaders(),
+        },
+        timeout: 30000,
+      }
+    );
+
+    res.status(202).json({
+      success: true,
+      data: {
+        jobId: response.data.jobId,
+        status: response.data.status,
+        message: response.data.message || "Analysis queued",
+      },
+    });
+  } catch (error) {
+    console.error("Error queueing resume analysis:", error.message);
+    sendServiceError(res, error, "Failed to queue resume analysis");
+  } finally {
+    removeUploadedFile(uploadedFilePath);
+  }
+});
+
+// Status of a queued analysis, with its result once finished
+router.get("/match-resume/jobs/:jobId", async (req, res) => {
+  try {
+    const response = await axios.get(
+      `${PYTHON_SERVICE_URL}/api/analysis-jobs/${encodeURIComponent(
+        req.params.jobId
+      )}`,
+      { timeout: 5000 }
+    );
+    const job = response.data;
+    const result = job.result;
+
+    res.json({
+      success: true,
+      data: {
+        jobId: job.jobId,
+        status: job.status,
+        ...(result?.success && {
+          score: result.score,
+          feedback: result.feedback,
+          message: result.message || "Resume analyzed successfully",
+        }),
+        ...(result && !result.success && { error: result.error }),
+      },
+    });
+  } catch (error) {
+    console.error("Error fetching resume analysis:", error.message);
+    sendServiceError(res, error, "Failed to fetch resume analysis");
   }
 });
 